@@ -1,7 +1,9 @@
+import asyncio
 import os
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
-from openai import AsyncOpenAI, APIError, RateLimitError
+import httpx
+from openai import APIError, AsyncOpenAI, DefaultAsyncHttpxClient, RateLimitError
 from tenacity import retry, retry_if_exception_type, stop_after_attempt
 
 from pr_agent.algo.ai_handlers.base_ai_handler import BaseAiHandler
@@ -11,6 +13,16 @@ from pr_agent.log import get_logger
 MODEL_RETRIES = 2
 DEFAULT_GROQ_BASE = "https://api.groq.com/openai/v1"
 
+try:
+    import h2  # noqa: F401  (httpx only needs it importable to negotiate HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Handlers are created per request/job; their clients are shared per (base URL, key) so TLS
+# connections outlive any single handler. A client is tied to the event loop that created it.
+_SHARED_CLIENTS: Dict[Tuple[str, str], Tuple[asyncio.AbstractEventLoop, AsyncOpenAI]] = {}
+
 
 class GroqAIHandler(BaseAiHandler):
     """
@@ -30,7 +42,19 @@ class GroqAIHandler(BaseAiHandler):
 
     def _get_client(self) -> AsyncOpenAI:
         if self._client is None:
-            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.api_base)
+            loop = asyncio.get_running_loop()
+            key = (self.api_base, self.api_key)
+            shared = _SHARED_CLIENTS.get(key)
+            if shared is None or shared[0] is not loop:
+                # One pooled client per process and loop: concurrent fix requests share keep-alive
+                # connections (multiplexed over a single one when HTTP/2 is available).
+                http_client = DefaultAsyncHttpxClient(
+                    http2=HTTP2_AVAILABLE,
+                    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                )
+                shared = (loop, AsyncOpenAI(api_key=self.api_key, base_url=self.api_base, http_client=http_client))
+                _SHARED_CLIENTS[key] = shared
+            self._client = shared[1]
         return self._client
 
     def _normalize_model(self, model: str) -> str:
@@ -40,6 +64,13 @@ class GroqAIHandler(BaseAiHandler):
             return model.split("/", 1)[1]
         return model
 
+    def _build_messages(self, system: str, user: str) -> list:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": user})
+        return messages
+
     @retry(
         retry=retry_if_exception_type((APIError, RateLimitError)),
         stop=stop_after_attempt(MODEL_RETRIES),
@@ -52,10 +83,7 @@ class GroqAIHandler(BaseAiHandler):
         if not model:
             raise ValueError("Model name is required for Groq chat completion")
 
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-        messages.append({"role": "user", "content": user})
+        messages = self._build_messages(system, user)
 
         try:
             response = await self._get_client().chat.completions.create(
@@ -71,6 +99,12 @@ class GroqAIHandler(BaseAiHandler):
         if not response.choices:
             raise APIError("Empty response from Groq")
 
+        # Prefix caching is automatic on OpenAI-compatible endpoints; surface hits to verify prompt layout.
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+            get_logger().debug("Groq usage: prompt_tokens={} cached_tokens={}", usage.prompt_tokens, cached_tokens)
+
         choice = response.choices[0]
         content = choice.message.content if choice.message else ""
         finish_reason = choice.finish_reason or "stop"
@@ -79,3 +113,32 @@ class GroqAIHandler(BaseAiHandler):
             print(f"\nAI response:\n{content}")
 
         return content, finish_reason
+
+    async def chat_completion_stream(self, model: str, system: str, user: str, temperature: float = 0.2):
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+
+        Not retried: a partially consumed stream cannot be replayed transparently.
+        """
+        model = self._normalize_model(model)
+        if not model:
+            raise ValueError("Model name is required for Groq chat completion")
+
+        try:
+            stream = await self._get_client().chat.completions.create(
+                model=model,
+                messages=self._build_messages(system, user),
+                temperature=temperature,
+                timeout=get_settings().config.ai_timeout,
+                stream=True,
+            )
+        except Exception as exc:
+            get_logger().error(f"Groq API error: {exc}")
+            raise
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content if chunk.choices[0].delta else None
+            if delta:
+                yield delta
@@ -18,6 +18,7 @@ Author: BlackboxTester Team
 
 import os
 import json
+from collections import OrderedDict
 from typing import Dict, List, Optional, Set, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
@@ -27,6 +28,13 @@ from pathlib import Path
 _tree_sitter_initialized = False
 _parsers = {}
 
+# Parsed files shared across builders, keyed by (absolute path, mtime_ns, size): the files of one
+# repo job import the same modules, and each build_codegraph_v2 call would otherwise re-parse them.
+# Only the parse (symbols, imports) is shared; dependencies depend on the builder's repo_path and
+# on which files exist, so each builder resolves them itself.
+_NODE_CACHE: "OrderedDict[Tuple[str, int, int], CodeGraphNode]" = OrderedDict()
+NODE_CACHE_MAX = 1024
+
 
 class Language(Enum):
     PYTHON = "python"
@@ -226,6 +234,21 @@ class CodeGraphBuilder:
         language = detect_language(file_path)
         
         try:
+            st = os.stat(file_path)
+            cache_key = (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+            shared = _NODE_CACHE.get(cache_key)
+            if shared is not None:
+                _NODE_CACHE.move_to_end(cache_key)
+                node = CodeGraphNode(
+                    file_path=file_path,
+                    language=shared.language,
+                    symbols=shared.symbols,
+                    imports=shared.imports,
+                    dependencies=self._resolve_imports(shared.imports)
+                )
+                self._file_cache[file_path] = node
+                return node
+
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
         except Exception:
@@ -239,6 +262,9 @@ class CodeGraphBuilder:
             node = self._parse_with_regex(file_path, content, language)
         
         self._file_cache[file_path] = node
+        _NODE_CACHE[cache_key] = node
+        while len(_NODE_CACHE) > NODE_CACHE_MAX:
+            _NODE_CACHE.popitem(last=False)
         return node
     
     def _parse_with_tree_sitter(self, file_path: str, content: str, 
@@ -14,15 +14,59 @@ This matches CodeRabbit's "Apply Fix" feature.
 Author: BlackboxTester Team
 """
 
+import asyncio
+import json
 import os
 import re
-from typing import Optional, List, Dict, Any
+from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, Tuple
 
-from pr_agent.log import get_logger
-from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
+from pr_agent.algo.response_cache import ResponseCache, prompt_cache_key
+from pr_agent.algo.utils import fast_json_dumps, fast_json_loads
 from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+
+if TYPE_CHECKING:
+    from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
+
+
+_FENCE_OPEN = re.compile(r'^```\w*\n?')
+_FENCE_CLOSE = re.compile(r'\n?```$')
+
+FIX_SYSTEM_PROMPT = "You are a security-focused code fixer. Generate precise, minimal fixes."
+
+# Raw fix responses keyed by prompt hash; only responses that parsed into a fix are stored.
+# The prompt holds the issue and the code around it, so a repeat of the same issue is not re-sent.
+_FIX_CACHE = ResponseCache(
+    maxsize=int(get_settings().get("ai.fix_cache_size", 512)),
+    ttl=float(get_settings().get("ai.fix_cache_ttl", 3600)),
+)
+
+
+# Analyzer severities worth an automatic fix; issues without a severity are always kept
+FIX_SEVERITIES = frozenset(
+    severity.upper() for severity in get_settings().get("ai.fix_severities", ["BLOCKER", "CRITICAL", "MAJOR"])
+)
+
+
+def line_offsets(content: str) -> List[int]:
+    """Offset of the start of every line in content (index 0 is line 1)."""
+    return [0] + [match.end() for match in re.finditer("\n", content)]
+
+
+@dataclass
+class _FileIndex:
+    """A file's content with its lines and line offsets, built once and shared by all of its fixes."""
+    content: str
+    lines: List[str]
+    offsets: List[int]
+    
+    @classmethod
+    def build(cls, content: str) -> "_FileIndex":
+        return cls(content=content, lines=content.splitlines(), offsets=line_offsets(content))
 
 
 class FixType(Enum):
@@ -34,6 +78,88 @@ class FixType(Enum):
     REFACTOR = "refactor"
 
 
+# Keywords in a static-analyzer issue type, by fix category. Checked in order:
+# security > performance > style > refactor; anything else is a bug.
+_ISSUE_TYPE_PATTERNS = (
+    (re.compile("security|injection|xss|csrf|vulnerability"), FixType.SECURITY),
+    (re.compile("performance|slow|optimize"), FixType.PERFORMANCE),
+    (re.compile("style|format|naming|convention"), FixType.STYLE),
+    (re.compile("refactor|duplicate|complexity"), FixType.REFACTOR),
+)
+
+
+# Fixes for analyzer rules that have one canonical rewrite, so no LLM call is needed.
+# A template gets (affected line text, line number, all file lines) and returns
+# (original_code, fixed_code, explanation), or None to leave the issue to the LLM.
+StaticFixTemplate = Callable[[str, int, List[str]], Optional[Tuple[str, str, str]]]
+# rule id -> (template, confidence, validated)
+_STATIC_FIXES: Dict[str, Tuple[StaticFixTemplate, float, bool]] = {}
+
+
+def register_static_fix(
+    rule_id: str, template: StaticFixTemplate, confidence: float = 0.95, validated: bool = True
+) -> None:
+    """
+    Register a deterministic fix for an analyzer rule (e.g. "python:S4790").
+
+    Pass validated=False (and a lower confidence) for rewrites that are mechanical but change
+    behaviour, so they are offered as suggestions rather than applied as checked fixes.
+    """
+    _STATIC_FIXES[rule_id] = (template, confidence, validated)
+
+
+_WEAK_HASH_RE = re.compile(r"\bhashlib\.(?:md5|sha1)\(")
+_NOT_FOR_SECURITY_RE = re.compile(r"\busedforsecurity\s*=\s*False\b")
+_HARDCODED_SECRET_RE = re.compile(
+    r"^(\s*)(\w*(?:password|passwd|pwd|secret|token)\w*)(\s*=\s*)(['\"])[^'\"]*\4(\s*(?:#.*)?)$", re.IGNORECASE
+)
+_LOOSE_EQUALITY_RE = re.compile(r"(?<![=!<>])(==|!=)(?!=)")
+_STRING_LITERAL_RE = re.compile(r"""(['"`])(?:\\.|(?!\1).)*\1""")
+# `x == null` deliberately matches undefined too, so those comparisons are not mechanical
+_NULLISH_RE = re.compile(r"\b(?:null|undefined)\b")
+
+
+def _fix_weak_hash(line: str, line_number: int, lines: List[str]) -> Optional[Tuple[str, str, str]]:
+    # usedforsecurity=False marks a plain checksum; a call continuing on the next line may say so there
+    if _NOT_FOR_SECURITY_RE.search(line) or line.count("(") != line.count(")"):
+        return None
+    fixed = _WEAK_HASH_RE.sub("hashlib.sha256(", line)
+    if fixed == line:
+        return None
+    return line, fixed, "MD5 and SHA-1 are broken; use SHA-256."
+
+
+def _fix_hardcoded_secret(line: str, line_number: int, lines: List[str]) -> Optional[Tuple[str, str, str]]:
+    match = _HARDCODED_SECRET_RE.match(line)
+    # Only when os is already imported, so the one-line fix is complete on its own
+    if not match or not any(re.match(r"\s*import os\b", other) for other in lines):
+        return None
+    indent, name, assign, _, trailer = match.groups()
+    fixed = f'{indent}{name}{assign}os.environ.get("{name.upper()}"){trailer}'
+    return line, fixed, f"Read {name} from the environment instead of hard-coding it."
+
+
+def _fix_loose_equality(line: str, line_number: int, lines: List[str]) -> Optional[Tuple[str, str, str]]:
+    code = _STRING_LITERAL_RE.sub("", line)
+    operators = _LOOSE_EQUALITY_RE.findall(line)
+    # Only a line whose single loose operator is the flagged one, outside string literals.
+    # A "/" may start a regex literal or a comment the regex above can't see into, and
+    # null/undefined comparisons change meaning; leave all of those to the LLM.
+    if len(operators) != 1 or len(_LOOSE_EQUALITY_RE.findall(code)) != 1:
+        return None
+    if "/" in code or _NULLISH_RE.search(code):
+        return None
+    fixed = _LOOSE_EQUALITY_RE.sub(lambda match: match.group(1) + "=", line)
+    return line, fixed, "Use strict equality to avoid type coercion."
+
+
+# Every stored or compared digest changes with the algorithm, so this is only a suggestion
+register_static_fix("python:S4790", _fix_weak_hash, confidence=0.6, validated=False)
+register_static_fix("python:S2068", _fix_hardcoded_secret)
+register_static_fix("javascript:S1440", _fix_loose_equality)
+register_static_fix("typescript:S1440", _fix_loose_equality)
+
+
 @dataclass
 class GeneratedFix:
     """Represents a one-click applicable fix."""
@@ -75,24 +201,49 @@ class GeneratedFix:
             "is_validated": self.is_validated
         }
     
-    def apply_to_content(self, file_content: str) -> str:
-        """Apply this fix to file content."""
-        lines = file_content.splitlines(keepends=True)
+    def to_json_bytes(self) -> bytes:
+        """Serialize to compact JSON for the wire."""
+        return fast_json_dumps(self.to_dict())
+    
+    def apply_to_content(self, file_content: str, offsets: Optional[List[int]] = None) -> str:
+        """
+        Apply this fix to file content.
+        
+        Args:
+            file_content: Content of the file
+            offsets: line_offsets(file_content), if already computed
+        """
+        if offsets is None:
+            offsets = line_offsets(file_content)
+        # A trailing newline does not start another line
+        line_count = len(offsets) - (1 if offsets[-1] == len(file_content) else 0)
         
         # Replace the affected lines
         # Convert to 0-indexed
-        start_idx = self.start_line - 1
-        end_idx = self.end_line
+        start_idx = min(max(self.start_line - 1, 0), line_count)
+        end_idx = min(self.end_line, line_count)
+        start = offsets[start_idx] if start_idx < len(offsets) else len(file_content)
+        end = offsets[end_idx] if end_idx < len(offsets) else len(file_content)
         
         # Ensure fixed_code ends with newline if original lines did
-        fixed_lines = self.fixed_code
-        if lines[start_idx:end_idx] and lines[end_idx-1].endswith('\n'):
-            if not fixed_lines.endswith('\n'):
-                fixed_lines += '\n'
+        fixed_code = self.fixed_code
+        if end_idx > start_idx and file_content[end - 1] == '\n':
+            if not fixed_code.endswith('\n'):
+                fixed_code += '\n'
         
-        # Reconstruct
-        new_lines = lines[:start_idx] + [fixed_lines] + lines[end_idx:]
-        return ''.join(new_lines)
+        return file_content[:start] + fixed_code + file_content[end:]
+
+
+def apply_fixes_to_content(file_content: str, fixes: List[GeneratedFix]) -> str:
+    """
+    Apply several non-overlapping fixes to one file.
+    
+    Fixes are applied bottom-up, so one line offset table stays valid for all of them.
+    """
+    offsets = line_offsets(file_content)
+    for fix in sorted(fixes, key=lambda fix: fix.start_line, reverse=True):
+        file_content = fix.apply_to_content(file_content, offsets)
+    return file_content
 
 
 class FixGenerator:
@@ -100,15 +251,22 @@ class FixGenerator:
     Generates one-click applicable fixes using LLM.
     """
     
-    def __init__(self, ai_handler: LiteLLMAIHandler = None):
+    def __init__(self, ai_handler: Optional["LiteLLMAIHandler"] = None):
         """
         Initialize FixGenerator.
         
         Args:
             ai_handler: Optional AI handler, creates new one if not provided
         """
-        self.ai_handler = ai_handler or LiteLLMAIHandler()
+        if ai_handler is None:
+            # litellm is slow to import; only pay for it when no handler is injected
+            from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
+            ai_handler = LiteLLMAIHandler()
+        self.ai_handler = ai_handler
         self.logger = get_logger()
+        # Bounds in-flight LLM calls when fixes for several issues are generated together
+        self._semaphore = asyncio.Semaphore(int(get_settings().get("ai.concurrency", 8)))
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "static_fixes": 0}
     
     async def generate_fix(
         self,
@@ -119,7 +277,10 @@ class FixGenerator:
         file_content: str,
         affected_line: int,
         context_code: str = "",
-        fix_type: FixType = FixType.BUG
+        fix_type: FixType = FixType.BUG,
+        force_refresh: bool = False,
+        file_index: Optional[_FileIndex] = None,
+        rule_id: Optional[str] = None
     ) -> Optional[GeneratedFix]:
         """
         Generate a one-click fix for an issue.
@@ -133,13 +294,31 @@ class FixGenerator:
             affected_line: Line number where issue occurs
             context_code: Additional code context (optional)
             fix_type: Category of fix
+            force_refresh: Ask the model even if an identical prompt was answered before
+            file_index: _FileIndex.build(file_content), if already built
+            rule_id: Analyzer rule (e.g. "python:S4790"); rules in the static fix table skip the LLM
             
         Returns:
             GeneratedFix if successful, None if generation failed
         """
         try:
+            if file_index is None:
+                file_index = _FileIndex.build(file_content)
+            
+            static_fix = self._static_fix(
+                rule_id=rule_id,
+                issue_id=issue_id,
+                issue_message=issue_message,
+                file_path=file_path,
+                file_index=file_index,
+                affected_line=affected_line,
+                fix_type=fix_type
+            )
+            if static_fix is not None:
+                return static_fix
+            
             # Extract the code around the affected line
-            lines = file_content.splitlines()
+            lines = file_index.lines
             
             # Get context window (5 lines before and after)
             start_line = max(1, affected_line - 5)
@@ -157,14 +336,25 @@ class FixGenerator:
                 context_code=context_code
             )
             
-            # Call LLM
-            response, _ = await self.ai_handler.chat_completion(
-                model=get_settings().config.model,
-                system="You are a security-focused code fixer. Generate precise, minimal fixes.",
-                user=prompt
-            )
+            model = get_settings().config.model
+            cache_key = prompt_cache_key(model, FIX_SYSTEM_PROMPT, prompt)
+            response = None if force_refresh else _FIX_CACHE.get(cache_key)
+            
+            if response is None:
+                self.stats["cache_misses"] += 1
+                # Call LLM
+                async with self._semaphore:
+                    response, _ = await self.ai_handler.chat_completion(
+                        model=model,
+                        system=FIX_SYSTEM_PROMPT,
+                        user=prompt
+                    )
+                cached = False
+            else:
+                self.stats["cache_hits"] += 1
+                cached = True
             
-            # Parse response
+            # Parse response (also on a hit: the original_code check depends on the current file content)
             fix = self._parse_fix_response(
                 response=response,
                 issue_id=issue_id,
@@ -172,8 +362,11 @@ class FixGenerator:
                 file_path=file_path,
                 file_content=file_content,
                 affected_line=affected_line,
-                fix_type=fix_type
+                fix_type=fix_type,
+                file_index=file_index
             )
+            if fix is not None and not cached:
+                _FIX_CACHE.set(cache_key, response)
             
             return fix
             
@@ -181,6 +374,40 @@ class FixGenerator:
             self.logger.error(f"Fix generation failed: {e}")
             return None
     
+    def _static_fix(
+        self,
+        rule_id: Optional[str],
+        issue_id: str,
+        issue_message: str,
+        file_path: str,
+        file_index: _FileIndex,
+        affected_line: int,
+        fix_type: FixType
+    ) -> Optional[GeneratedFix]:
+        """Build a fix from the static fix table, or return None if the rule has no template."""
+        entry = _STATIC_FIXES.get(rule_id) if rule_id else None
+        if entry is None or not 1 <= affected_line <= len(file_index.lines):
+            return None
+        template, confidence, validated = entry
+        result = template(file_index.lines[affected_line - 1], affected_line, file_index.lines)
+        if result is None:
+            return None
+        original_code, fixed_code, explanation = result
+        self.stats["static_fixes"] += 1
+        return GeneratedFix(
+            issue_id=issue_id,
+            issue_message=issue_message,
+            fix_type=fix_type,
+            file_path=file_path,
+            start_line=affected_line,
+            end_line=affected_line,
+            original_code=original_code,
+            fixed_code=fixed_code,
+            explanation=explanation,
+            confidence=confidence,
+            is_validated=validated
+        )
+    
     def _build_fix_prompt(
         self,
         issue_message: str,
@@ -232,48 +459,20 @@ Return ONLY valid JSON, no markdown code blocks."""
         file_path: str,
         file_content: str,
         affected_line: int,
-        fix_type: FixType
+        fix_type: FixType,
+        file_index: Optional[_FileIndex] = None
     ) -> Optional[GeneratedFix]:
         """Parse LLM response into GeneratedFix object."""
-        import json
-        
         try:
-            # Clean up response - remove markdown code blocks if present
-            response = response.strip()
-            if response.startswith("```"):
-                # Remove ```json and ```
-                response = re.sub(r'^```\w*\n?', '', response)
-                response = re.sub(r'\n?```$', '', response)
-            
-            data = json.loads(response)
-            
-            # Validate required fields
-            required = ["original_code", "fixed_code", "explanation", "start_line", "end_line"]
-            for field in required:
-                if field not in data:
-                    self.logger.warning(f"Missing field in fix response: {field}")
-                    return None
-            
-            # Validate that original code exists in file
-            if data["original_code"] not in file_content:
-                self.logger.warning("Original code not found in file - fix may be inaccurate")
-                # Try to find similar code
-                lines = file_content.splitlines()
-                actual_start = max(1, data["start_line"])
-                actual_end = min(len(lines), data["end_line"])
-                data["original_code"] = '\n'.join(lines[actual_start-1:actual_end])
-            
-            return GeneratedFix(
+            data = fast_json_loads(self._strip_code_fence(response))
+            return self._fix_from_data(
+                data=data,
                 issue_id=issue_id,
                 issue_message=issue_message,
-                fix_type=fix_type,
                 file_path=file_path,
-                start_line=data["start_line"],
-                end_line=data["end_line"],
-                original_code=data["original_code"],
-                fixed_code=data["fixed_code"],
-                explanation=data["explanation"],
-                confidence=data.get("confidence", 0.7)
+                file_content=file_content,
+                fix_type=fix_type,
+                file_index=file_index
             )
             
         except json.JSONDecodeError as e:
@@ -283,6 +482,229 @@ Return ONLY valid JSON, no markdown code blocks."""
             self.logger.error(f"Error parsing fix response: {e}")
             return None
     
+    @staticmethod
+    def _strip_code_fence(response: str) -> str:
+        """Clean up response - remove markdown code blocks if present."""
+        response = response.strip()
+        if response.startswith("```json\n") and response.endswith("\n```"):
+            # The usual shape; no regex needed
+            return response[len("```json\n"):-len("\n```")]
+        if response.startswith("```"):
+            # Remove ```json and ```
+            response = _FENCE_OPEN.sub('', response)
+            response = _FENCE_CLOSE.sub('', response)
+        return response
+    
+    def _fix_from_data(
+        self,
+        data: Dict[str, Any],
+        issue_id: str,
+        issue_message: str,
+        file_path: str,
+        file_content: str,
+        fix_type: FixType,
+        file_index: Optional[_FileIndex] = None
+    ) -> Optional[GeneratedFix]:
+        """Validate one decoded fix object and build a GeneratedFix from it."""
+        # Validate required fields
+        required = ["original_code", "fixed_code", "explanation", "start_line", "end_line"]
+        for field in required:
+            if field not in data:
+                self.logger.warning(f"Missing field in fix response: {field}")
+                return None
+        
+        # Validate that original code exists in file
+        offsets = file_index.offsets if file_index is not None else None
+        if not self._original_code_found(data, file_content, offsets):
+            self.logger.warning("Original code not found in file - fix may be inaccurate")
+            # Try to find similar code
+            lines = file_index.lines if file_index is not None else file_content.splitlines()
+            actual_start = max(1, data["start_line"])
+            actual_end = min(len(lines), data["end_line"])
+            data["original_code"] = '\n'.join(lines[actual_start-1:actual_end])
+        
+        return GeneratedFix(
+            issue_id=issue_id,
+            issue_message=issue_message,
+            fix_type=fix_type,
+            file_path=file_path,
+            start_line=data["start_line"],
+            end_line=data["end_line"],
+            original_code=data["original_code"],
+            fixed_code=data["fixed_code"],
+            explanation=data["explanation"],
+            confidence=data.get("confidence", 0.7)
+        )
+    
+    @staticmethod
+    def _original_code_found(data: Dict[str, Any], file_content: str, offsets: Optional[List[int]]) -> bool:
+        """
+        Check that original_code occurs in the file.
+        
+        With line offsets, only the lines the fix claims (plus two on either side) are
+        searched first; the whole file is searched only if that misses.
+        """
+        original_code = data["original_code"]
+        start_line, end_line = data["start_line"], data["end_line"]
+        if offsets and isinstance(start_line, int) and isinstance(end_line, int):
+            lo = offsets[min(max(0, start_line - 3), len(offsets) - 1)]
+            hi = offsets[end_line + 2] if 0 <= end_line + 2 < len(offsets) else len(file_content)
+            if file_content.find(original_code, lo, hi) != -1:
+                return True
+        return original_code in file_content
+    
+    async def generate_fixes_for_file(
+        self,
+        file_path: str,
+        file_content: str,
+        issues: List[Dict[str, Any]],
+        context_code: str = ""
+    ) -> Optional[List[GeneratedFix]]:
+        """
+        Generate fixes for several issues in one file with a single LLM call.
+        
+        The instructions and the code around the issues are sent once instead of
+        once per issue; overlapping context windows are merged.
+        
+        Args:
+            file_path: Path to the file
+            file_content: Content of the file
+            issues: List of issues from static analyzer
+            context_code: Additional context
+            
+        Returns:
+            List of generated fixes, or None if the batched call failed
+        """
+        try:
+            file_index = _FileIndex.build(file_content)
+            lines = file_index.lines
+            entries = []
+            for issue in issues:
+                issue_type = issue.get("type", issue.get("rule", "unknown"))
+                entries.append({
+                    "issue_id": issue.get("key", issue.get("id", "unknown")),
+                    "issue_message": issue.get("message", "Unknown issue"),
+                    "issue_type": issue_type,
+                    "affected_line": issue.get("line", 1),
+                    "fix_type": self._classify_issue(issue_type),
+                })
+            
+            # Same 5-line window as generate_fix, merged where issues are close together
+            windows = []
+            for line in sorted(entry["affected_line"] for entry in entries):
+                start_line = max(1, line - 5)
+                end_line = min(len(lines), line + 5)
+                if windows and start_line <= windows[-1][1] + 1:
+                    windows[-1][1] = max(windows[-1][1], end_line)
+                else:
+                    windows.append([start_line, end_line])
+            
+            prompt = self._build_file_fix_prompt(
+                file_path=file_path,
+                entries=entries,
+                snippets=[(start, end, '\n'.join(lines[start-1:end])) for start, end in windows],
+                context_code=context_code
+            )
+            
+            model = get_settings().config.model
+            cache_key = prompt_cache_key(model, FIX_SYSTEM_PROMPT, prompt)
+            response = _FIX_CACHE.get(cache_key)
+            
+            if response is None:
+                self.stats["cache_misses"] += 1
+                async with self._semaphore:
+                    response, _ = await self.ai_handler.chat_completion(
+                        model=model,
+                        system=FIX_SYSTEM_PROMPT,
+                        user=prompt
+                    )
+                cached = False
+            else:
+                self.stats["cache_hits"] += 1
+                cached = True
+            
+            data = fast_json_loads(self._strip_code_fence(response))
+            items = data.get("fixes", []) if isinstance(data, dict) else data
+            
+            fixes = []
+            for item in items:
+                try:
+                    entry = entries[int(item["issue_index"]) - 1]
+                except (KeyError, ValueError, TypeError, IndexError):
+                    self.logger.warning(f"Fix response refers to unknown issue: {item.get('issue_index')}")
+                    continue
+                fix = self._fix_from_data(
+                    data=item,
+                    issue_id=entry["issue_id"],
+                    issue_message=entry["issue_message"],
+                    file_path=file_path,
+                    file_content=file_content,
+                    fix_type=entry["fix_type"],
+                    file_index=file_index
+                )
+                if fix is not None:
+                    fixes.append(fix)
+            
+            if fixes and not cached:
+                _FIX_CACHE.set(cache_key, response)
+            
+            return fixes
+            
+        except Exception as e:
+            self.logger.error(f"Batched fix generation failed for {file_path}: {e}")
+            return None
+    
+    def _build_file_fix_prompt(
+        self,
+        file_path: str,
+        entries: List[Dict[str, Any]],
+        snippets: List[tuple],
+        context_code: str
+    ) -> str:
+        """Build the prompt for fixing several issues of one file at once."""
+        issue_list = '\n'.join(
+            f"{index}. [{entry['issue_type']}] line {entry['affected_line']}: {entry['issue_message']}"
+            for index, entry in enumerate(entries, start=1)
+        )
+        code = '\n\n'.join(
+            f"Lines {start}-{end}:\n```\n{snippet}\n```" for start, end, snippet in snippets
+        )
+        return f"""You are a code security expert. Generate a minimal, safe fix for each of these issues.
+
+FILE: {file_path}
+
+ISSUES:
+{issue_list}
+
+CODE (lines around the issues):
+{code}
+
+{f'ADDITIONAL CONTEXT:{chr(10)}{context_code}' if context_code else ''}
+
+REQUIREMENTS:
+1. Generate the EXACT code fix - no placeholders
+2. Only change what's necessary to fix each issue
+3. Preserve formatting, indentation, and style
+4. Ensure each fix is syntactically correct
+5. Fixes must not overlap; if two issues need the same lines changed, fix both in one entry
+
+OUTPUT FORMAT (JSON):
+{{
+    "fixes": [
+        {{
+            "issue_index": <number of the issue in the list above>,
+            "original_code": "... the exact code to replace (can be multi-line) ...",
+            "fixed_code": "... the exact fixed code ...",
+            "explanation": "Brief explanation of the fix",
+            "start_line": <first line number of code to replace>,
+            "end_line": <last line number of code to replace>,
+            "confidence": <0.0 to 1.0>
+        }}
+    ]
+}}
+
+Return ONLY valid JSON, no markdown code blocks."""
+    
     async def generate_fixes_for_issues(
         self,
         issues: List[Dict[str, Any]],
@@ -302,7 +724,48 @@ Return ONLY valid JSON, no markdown code blocks."""
         Returns:
             List of generated fixes
         """
-        fixes = []
+        issues = [
+            issue for issue in issues
+            if not issue.get("severity") or str(issue["severity"]).upper() in FIX_SEVERITIES
+        ]
+        if not issues:
+            return []
+        
+        # Lines and offsets are computed once and shared by every issue's prompt and validation
+        file_index = _FileIndex.build(file_content)
+        
+        # Issues with a canonical fix never reach the LLM
+        static_fixes = []
+        remaining = []
+        for issue in issues:
+            issue_type = issue.get("type", issue.get("rule", "unknown"))
+            fix = self._static_fix(
+                rule_id=issue.get("rule"),
+                issue_id=issue.get("key", issue.get("id", "unknown")),
+                issue_message=issue.get("message", "Unknown issue"),
+                file_path=file_path,
+                file_index=file_index,
+                affected_line=issue.get("line", 1),
+                fix_type=self._classify_issue(issue_type)
+            )
+            if fix is not None:
+                static_fixes.append(fix)
+            else:
+                remaining.append(issue)
+        issues = remaining
+        
+        if len(issues) > 1:
+            # One prompt for the whole file; fall back to per-issue prompts only if it fails
+            fixes = await self.generate_fixes_for_file(
+                file_path=file_path,
+                file_content=file_content,
+                issues=issues,
+                context_code=context_code
+            )
+            if fixes is not None:
+                return static_fixes + fixes
+        
+        tasks = []
         
         for issue in issues:
             issue_id = issue.get("key", issue.get("id", "unknown"))
@@ -313,7 +776,7 @@ Return ONLY valid JSON, no markdown code blocks."""
             # Determine fix type
             fix_type = self._classify_issue(issue_type)
             
-            fix = await self.generate_fix(
+            tasks.append(self.generate_fix(
                 issue_id=issue_id,
                 issue_message=issue_message,
                 issue_type=issue_type,
@@ -321,28 +784,22 @@ Return ONLY valid JSON, no markdown code blocks."""
                 file_content=file_content,
                 affected_line=affected_line,
                 context_code=context_code,
-                fix_type=fix_type
-            )
-            
-            if fix:
-                fixes.append(fix)
+                fix_type=fix_type,
+                file_index=file_index
+            ))
         
-        return fixes
+        # All issues are requested at once; the semaphore in generate_fix limits concurrent LLM calls
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return static_fixes + [fix for fix in results if isinstance(fix, GeneratedFix)]
     
     def _classify_issue(self, issue_type: str) -> FixType:
-        """Classify issue type into FixType category."""
+        """Classify issue type into FixType category (first match in _ISSUE_TYPE_PATTERNS wins)."""
         issue_lower = issue_type.lower()
         
-        if any(kw in issue_lower for kw in ["security", "injection", "xss", "csrf", "vulnerability"]):
-            return FixType.SECURITY
-        elif any(kw in issue_lower for kw in ["performance", "slow", "optimize"]):
-            return FixType.PERFORMANCE
-        elif any(kw in issue_lower for kw in ["style", "format", "naming", "convention"]):
-            return FixType.STYLE
-        elif any(kw in issue_lower for kw in ["refactor", "duplicate", "complexity"]):
-            return FixType.REFACTOR
-        else:
-            return FixType.BUG
+        for pattern, fix_type in _ISSUE_TYPE_PATTERNS:
+            if pattern.search(issue_lower):
+                return fix_type
+        return FixType.BUG
 
 
 # ============================================================================
@@ -441,10 +898,30 @@ def format_fix_for_ide(fix: GeneratedFix) -> Dict[str, Any]:
 # UnifiedFinding Support
 # ============================================================================
 
+# UnifiedFinding category -> FixType
+_CATEGORY_TO_FIXTYPE: Mapping[str, FixType] = MappingProxyType({
+    "security": FixType.SECURITY,
+    "bug": FixType.BUG,
+    "logic": FixType.BUG,
+    "performance": FixType.PERFORMANCE,
+    "style": FixType.STYLE,
+    "maintainability": FixType.REFACTOR,
+})
+
+
+def _fix_type_for(category: str) -> FixType:
+    """FixType for a UnifiedFinding category; unknown categories are bugs."""
+    return _CATEGORY_TO_FIXTYPE.get(category, FixType.BUG)
+
+_SONAR_RULE_HINT = "This is a static analysis finding - ensure the fix addresses the specific rule.\n"
+
+
 async def generate_fix_for_unified_finding(
     finding,  # UnifiedFinding from findings.py
     file_content: str,
-    context_code: str = ""
+    context_code: str = "",
+    generator: Optional[FixGenerator] = None,
+    file_index: Optional[_FileIndex] = None
 ) -> Optional[GeneratedFix]:
     """
     Generate a fix for a UnifiedFinding (from AI or Sonar).
@@ -455,28 +932,21 @@ async def generate_fix_for_unified_finding(
         finding: UnifiedFinding instance
         file_content: Content of the affected file
         context_code: Additional context (from code graph)
+        generator: FixGenerator to use; batches share one instead of creating a handler per finding
+        file_index: _FileIndex.build(file_content), shared by findings in the same file
         
     Returns:
         GeneratedFix if successful
     """
-    generator = FixGenerator()
+    if generator is None:
+        generator = FixGenerator()
     
-    # Map category to fix type
-    category_map = {
-        "security": FixType.SECURITY,
-        "bug": FixType.BUG,
-        "logic": FixType.BUG,
-        "performance": FixType.PERFORMANCE,
-        "style": FixType.STYLE,
-        "maintainability": FixType.REFACTOR,
-    }
-    fix_type = category_map.get(finding.category, FixType.BUG)
+    fix_type = _fix_type_for(finding.category)
     
     # Add Sonar rule context if available
     enhanced_context = context_code
     if finding.sonar_rule_id:
-        enhanced_context += f"\n\nSonar Rule: {finding.sonar_rule_id}\n"
-        enhanced_context += "This is a static analysis finding - ensure the fix addresses the specific rule.\n"
+        enhanced_context = f"{context_code}\n\nSonar Rule: {finding.sonar_rule_id}\n{_SONAR_RULE_HINT}"
     
     return await generator.generate_fix(
         issue_id=finding.id,
@@ -486,7 +956,9 @@ async def generate_fix_for_unified_finding(
         file_content=file_content,
         affected_line=finding.start_line,
         context_code=enhanced_context,
-        fix_type=fix_type
+        fix_type=fix_type,
+        file_index=file_index,
+        rule_id=finding.sonar_rule_id
     )
 
 
@@ -508,18 +980,29 @@ async def batch_generate_fixes_for_findings(
     Returns:
         List of (finding, GeneratedFix) tuples
     """
-    import asyncio
-    
-    results = []
-    
     # Group findings by file
-    by_file: Dict[str, List] = {}
+    by_file: Dict[str, List] = defaultdict(list)
     for finding in findings:
-        if finding.file not in by_file:
-            by_file[finding.file] = []
         by_file[finding.file].append(finding)
     
-    # Process each file's findings
+    # Each fix is independent LLM I/O; run them together, bounded like FixGenerator's own calls
+    semaphore = asyncio.Semaphore(int(get_settings().get("ai.concurrency", 8)))
+    
+    async def _one(finding, file_content: str, context: str, file_index: _FileIndex):
+        async with semaphore:
+            try:
+                return finding, await generate_fix_for_unified_finding(
+                    finding=finding,
+                    file_content=file_content,
+                    context_code=context,
+                    generator=generator,
+                    file_index=file_index
+                )
+            except Exception as e:
+                get_logger().warning(f"Failed to generate fix for {finding.id}: {e}")
+                return finding, None
+    
+    jobs = []
     for file_path, file_findings in by_file.items():
         file_content = file_contents.get(file_path, "")
         if not file_content:
@@ -532,20 +1015,20 @@ async def batch_generate_fixes_for_findings(
             if isinstance(graph_data, dict):
                 context = str(graph_data.get('signatures', ''))[:2000]
         
+        # One line index per file, shared by its findings
+        file_index = _FileIndex.build(file_content)
+        
         # Generate fixes for this file's findings (max 5 per file)
         for finding in file_findings[:5]:
-            try:
-                fix = await generate_fix_for_unified_finding(
-                    finding=finding,
-                    file_content=file_content,
-                    context_code=context
-                )
-                if fix:
-                    results.append((finding, fix))
-            except Exception as e:
-                get_logger().warning(f"Failed to generate fix for {finding.id}: {e}")
+            jobs.append((finding, file_content, context, file_index))
     
-    return results
+    if not jobs:
+        return []
+    
+    # One generator (and AI handler) for the whole batch
+    generator = FixGenerator()
+    results = await asyncio.gather(*(_one(*job) for job in jobs))
+    return [(finding, fix) for finding, fix in results if fix]
 
 
 def unified_finding_to_generated_fix(finding) -> Optional[GeneratedFix]:
@@ -559,21 +1042,13 @@ def unified_finding_to_generated_fix(finding) -> Optional[GeneratedFix]:
         finding: UnifiedFinding with fix attribute
         
     Returns:
-        GeneratedFix or None
+        GeneratedFix or None (also when the fix has no original or fixed code)
     """
-    if not finding.fix:
+    fix = finding.fix
+    if not fix or not (fix.original_code and fix.fixed_code):
         return None
     
-    # Map category to fix type
-    category_map = {
-        "security": FixType.SECURITY,
-        "bug": FixType.BUG,
-        "logic": FixType.BUG,
-        "performance": FixType.PERFORMANCE,
-        "style": FixType.STYLE,
-        "maintainability": FixType.REFACTOR,
-    }
-    fix_type = category_map.get(finding.category, FixType.BUG)
+    fix_type = _fix_type_for(finding.category)
     
     return GeneratedFix(
         issue_id=finding.id,
@@ -582,9 +1057,9 @@ def unified_finding_to_generated_fix(finding) -> Optional[GeneratedFix]:
         file_path=finding.file,
         start_line=finding.start_line,
         end_line=finding.end_line,
-        original_code=finding.fix.original_code,
-        fixed_code=finding.fix.fixed_code,
-        explanation=finding.fix.explanation,
+        original_code=fix.original_code,
+        fixed_code=fix.fixed_code,
+        explanation=fix.explanation,
         confidence=finding.confidence,
         is_validated=False
     )
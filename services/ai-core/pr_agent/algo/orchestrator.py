@@ -33,6 +33,7 @@ from pr_agent.algo.findings import (
 )
 from pr_agent.algo.code_graph import build_codegraph_v2
 from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
+from pr_agent.algo.response_cache import ResponseCache, prompt_cache_key
 from pr_agent.config_loader import get_settings
 
 
@@ -44,6 +45,16 @@ SONAR_SERVICE_URL = os.environ.get("SONAR_SERVICE_URL", "http://sonar-service:80
 SONAR_TIMEOUT_SECONDS = 120
 AI_REVIEW_TIMEOUT_SECONDS = 180
 
+# Directories left out of the workspace zip sent to Sonar
+SONAR_ZIP_SKIP_DIRS = frozenset({".git", "node_modules", "__pycache__", ".venv", "venv"})
+
+# Parsed LLM reviews and fixes keyed by (kind, orchestrator version, model, prompt). The prompts
+# embed the diff and the offending code, so unchanged code is not sent to the model again.
+_LLM_RESULT_CACHE = ResponseCache(
+    maxsize=int(get_settings().get("ai.orchestrator_cache_size", 2048)),
+    ttl=float(get_settings().get("ai.orchestrator_cache_ttl", 3600)),
+)
+
 
 # ============================================================================
 # Analysis Orchestrator
@@ -61,10 +72,15 @@ class AnalysisOrchestrator:
     5. Generate fixes for findings without them
     6. Return unified AnalysisResult
     """
+
+    # Bump when prompts, parsing or merging change, so cached results from older versions are not reused
+    VERSION = "1"
     
     def __init__(self):
         self.logger = get_logger()
         self.ai_handler = None  # Lazy init
+        # Branches ("ai", "sonar") that failed or timed out in the current analysis
+        self.degraded: List[str] = []
     
     async def analyze(
         self,
@@ -86,6 +102,7 @@ class AnalysisOrchestrator:
             AnalysisResult with unified findings and fixes
         """
         start_time = time.time()
+        self.degraded = []
         self.logger.info(f"[Orchestrator] Starting analysis for {len(changed_files)} files")
         
         # Step 1: Build code graph (sync - needed for AI context)
@@ -115,6 +132,9 @@ class AnalysisOrchestrator:
         
         # Step 6: Create summary
         summary = create_summary(with_fixes)
+        if self.degraded:
+            # Findings are missing for these branches; callers must not treat the result as complete
+            summary["degraded"] = sorted(set(self.degraded))
         
         execution_time = int((time.time() - start_time) * 1000)
         self.logger.info(f"[Orchestrator] Analysis complete in {execution_time}ms")
@@ -177,33 +197,35 @@ class AnalysisOrchestrator:
         Returns:
             Tuple of (ai_findings, sonar_findings)
         """
-        # Create tasks
-        ai_task = asyncio.create_task(
-            self._run_ai_review(diff_content, changed_files, code_graph)
-        )
-        sonar_task = asyncio.create_task(
-            self._run_sonar_scan(workspace_path)
+        # Both timeouts count from the same start; awaiting one after the other gave
+        # Sonar the AI review's runtime on top of its own budget.
+        ai_findings, sonar_findings = await asyncio.gather(
+            self._guarded(
+                self._run_ai_review(diff_content, changed_files, code_graph),
+                AI_REVIEW_TIMEOUT_SECONDS,
+                "AI review",
+                "ai",
+            ),
+            self._guarded(
+                self._run_sonar_scan(workspace_path),
+                SONAR_TIMEOUT_SECONDS,
+                "Sonar scan",
+                "sonar",
+            ),
         )
         
-        # Wait for both with individual error handling
-        ai_findings = []
-        sonar_findings = []
-        
-        try:
-            ai_findings = await asyncio.wait_for(ai_task, timeout=AI_REVIEW_TIMEOUT_SECONDS)
-        except asyncio.TimeoutError:
-            self.logger.error("[Orchestrator] AI review timed out")
-        except Exception as e:
-            self.logger.error(f"[Orchestrator] AI review failed: {e}")
-        
+        return ai_findings, sonar_findings
+    
+    async def _guarded(self, coro, timeout: float, label: str, branch: str) -> List[UnifiedFinding]:
+        """Await one analysis branch; timeouts and failures yield no findings and mark the branch degraded."""
         try:
-            sonar_findings = await asyncio.wait_for(sonar_task, timeout=SONAR_TIMEOUT_SECONDS)
+            return await asyncio.wait_for(coro, timeout=timeout)
         except asyncio.TimeoutError:
-            self.logger.error("[Orchestrator] Sonar scan timed out")
+            self.logger.error(f"[Orchestrator] {label} timed out")
         except Exception as e:
-            self.logger.error(f"[Orchestrator] Sonar scan failed: {e}")
-        
-        return ai_findings, sonar_findings
+            self.logger.error(f"[Orchestrator] {label} failed: {e}")
+        self.degraded.append(branch)
+        return []
     
     async def _run_ai_review(
         self,
@@ -227,27 +249,34 @@ class AnalysisOrchestrator:
             
             # Create prompt
             prompt = self._create_review_prompt(diff_content, context)
+            model = get_settings().config.model
+            cache_key = prompt_cache_key("review", self.VERSION, model, prompt)
+            cached = _LLM_RESULT_CACHE.get(cache_key)
+            if cached is not None:
+                # Fresh finding objects on every hit; later steps attach fixes to them
+                return ai_response_to_unified(cached)
             
             # Call LLM
             response, _ = await self.ai_handler.chat_completion(
-                model=get_settings().config.model,
+                model=model,
                 system="",
                 user=prompt,
                 temperature=0.2
             )
             
-            # Parse response
-            import json
-            response_text = response
-            
             # Try to extract JSON from response
-            ai_result = self._parse_ai_response(response_text)
+            ai_result = self._parse_ai_response(response)
             
             # Convert to unified format
-            return ai_response_to_unified(ai_result)
+            findings = ai_response_to_unified(ai_result)
+            # No findings is also what an unparseable response yields, so only non-empty reviews are cached
+            if findings:
+                _LLM_RESULT_CACHE.set(cache_key, ai_result)
+            return findings
             
         except Exception as e:
             self.logger.error(f"AI review error: {e}")
+            self.degraded.append("ai")
             return []
     
     def _build_ai_context(self, code_graph: Dict[str, Any]) -> str:
@@ -361,7 +390,7 @@ Respond with ONLY valid JSON, no markdown code blocks."""
                 file_count = 0
                 for root, dirs, files in os.walk(workspace_path):
                     # Skip common non-code directories
-                    dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', '__pycache__', '.venv', 'venv']]
+                    dirs[:] = [d for d in dirs if d not in SONAR_ZIP_SKIP_DIRS]
                     
                     for file in files:
                         file_path = os.path.join(root, file)
@@ -394,16 +423,20 @@ Respond with ONLY valid JSON, no markdown code blocks."""
                             else:
                                 response_text = await response.text()
                                 self.logger.error(f"Sonar returned status {response.status}: {response_text[:500]}")
+                                self.degraded.append("sonar")
                                 return []
                     except asyncio.TimeoutError:
                         self.logger.error(f"Sonar scan timed out after {SONAR_TIMEOUT_SECONDS}s")
+                        self.degraded.append("sonar")
                         return []
                     except aiohttp.ClientConnectorError as e:
                         self.logger.error(f"Cannot connect to Sonar service at {SONAR_SERVICE_URL}: {e}")
+                        self.degraded.append("sonar")
                         return []
             
         except Exception as e:
             self.logger.error(f"Sonar scan error: {e}", exc_info=True)
+            self.degraded.append("sonar")
             return []
         finally:
             # Cleanup temp zip
@@ -498,17 +531,21 @@ Respond with a JSON object containing:
 
 Respond with ONLY valid JSON."""
 
-            # Call LLM
-            response, _ = await self.ai_handler.chat_completion(
-                model=get_settings().config.model_weak or get_settings().config.model,
-                system="",
-                user=prompt,
-                temperature=0.1
-            )
+            model = get_settings().config.model_weak or get_settings().config.model
+            cache_key = prompt_cache_key("fix", self.VERSION, model, prompt)
+            fix_data = _LLM_RESULT_CACHE.get(cache_key)
             
-            # Parse response
-            response_text = response
-            fix_data = self._parse_ai_response(response_text)
+            if fix_data is None:
+                # Call LLM
+                response, _ = await self.ai_handler.chat_completion(
+                    model=model,
+                    system="",
+                    user=prompt,
+                    temperature=0.1
+                )
+                fix_data = self._parse_ai_response(response)
+                if fix_data and fix_data.get('fixed_code'):
+                    _LLM_RESULT_CACHE.set(cache_key, fix_data)
             
             if fix_data and fix_data.get('fixed_code'):
                 return GeneratedFix(
@@ -0,0 +1,92 @@
+"""
+Prompt Compression - Prose Pruning for Long Prompts
+====================================================
+
+Shrinks the prose sections of a prompt (static-analysis findings, git logs)
+before they are sent to the model. Code is never passed through here: code
+completion quality degrades under token pruning, so callers keep code verbatim.
+
+When `llmlingua` is installed, LLMLingua-2 token pruning is used. Otherwise a
+dependency-free pass drops repeated lines and collapses whitespace.
+
+Disabled by default; enable with `llmlingua.enabled`.
+
+Author: BlackboxTester Team
+"""
+
+import re
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+
+LLMLINGUA_MODEL = "microsoft/llmlingua-2-xlm-roberta-large-meetingbank"
+DEFAULT_MIN_PROMPT_CHARS = 8000
+DEFAULT_RATE = 0.5
+
+# Lazy import llmlingua: loading the model is expensive and the package is optional
+_compressor_initialized = False
+_compressor = None
+
+
+def _get_compressor():
+    """Lazy initialize the LLMLingua-2 compressor."""
+    global _compressor_initialized, _compressor
+
+    if _compressor_initialized:
+        return _compressor
+    _compressor_initialized = True
+
+    try:
+        from llmlingua import PromptCompressor
+
+        _compressor = PromptCompressor(model_name=LLMLINGUA_MODEL, use_llmlingua2=True)
+    except ImportError as e:
+        get_logger().info(f"[PromptCompression] llmlingua not available, using line dedup fallback: {e}")
+    except Exception as e:
+        get_logger().warning(f"[PromptCompression] Failed to load LLMLingua-2 model: {e}")
+    return _compressor
+
+
+def _dedupe_lines(text: str) -> str:
+    """Drop repeated lines and collapse runs of whitespace, keeping first-seen order."""
+    seen = set()
+    kept = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        if not line or line in seen:
+            continue
+        seen.add(line)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def compress_prose(text: str, prompt_chars: int) -> str:
+    """
+    Compress a prose section of a prompt if compression is enabled and the prompt is long.
+
+    Args:
+        text: Prose to compress (instructions, findings, commit messages - never code)
+        prompt_chars: Length of the full prompt this section belongs to
+
+    Returns:
+        Compressed text, or the original text when compression is disabled or not worthwhile
+    """
+    if not text or not get_settings().get("llmlingua.enabled", False):
+        return text
+    if prompt_chars <= int(get_settings().get("llmlingua.min_prompt_chars", DEFAULT_MIN_PROMPT_CHARS)):
+        return text
+
+    compressor = _get_compressor()
+    if compressor is None:
+        return _dedupe_lines(text)
+
+    try:
+        result = compressor.compress_prompt(
+            text,
+            rate=float(get_settings().get("llmlingua.rate", DEFAULT_RATE)),
+            force_tokens=["\n", "```", "#"],
+        )
+        return result.get("compressed_prompt", text)
+    except Exception as e:
+        get_logger().warning(f"[PromptCompression] Compression failed, sending original text: {e}")
+        return text
@@ -0,0 +1,64 @@
+"""
+Response Cache - Exact-Match Cache for AI Responses
+====================================================
+
+Keeps parsed AI results keyed by a hash of the exact prompt, so re-reviewing
+unchanged content (editor auto-review on save, CI re-runs) skips the LLM call.
+
+Only exact prompt matches are served. Near-duplicate (embedding) matching is
+deliberately not done: a cached fix carries the full fixed file, which is wrong
+for content that differs even slightly.
+
+Author: BlackboxTester Team
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def prompt_cache_key(*parts: str) -> str:
+    """Stable key for a prompt made of several parts (model, system, user...)."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = (part or "").encode("utf-8")
+        # Length prefix keeps ("ab", "c") and ("a", "bc") distinct
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    In-process LRU cache with per-entry expiry.
+
+    Args:
+        maxsize: Maximum number of entries; least recently used entries are evicted first
+        ttl: Seconds an entry stays valid
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
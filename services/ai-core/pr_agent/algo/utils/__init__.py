@@ -49,6 +49,9 @@ from pr_agent.algo.utils.json_yaml import (
     load_yaml,
     try_fix_yaml,
     convert_str_to_datetime,
+    fast_json_loads,
+    fast_json_dumps,
+    extract_json_object,
 )
 
 # Token Management
@@ -114,6 +117,9 @@ __all__ = [
     "load_yaml",
     "try_fix_yaml",
     "convert_str_to_datetime",
+    "fast_json_loads",
+    "fast_json_dumps",
+    "extract_json_object",
     # Tokens
     "get_max_tokens",
     "clip_tokens",
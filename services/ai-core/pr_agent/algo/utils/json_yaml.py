@@ -6,8 +6,10 @@ Functions for parsing, fixing, and converting JSON and YAML.
 """
 
 import copy
+import dataclasses
 import json
 import re
+from collections import deque
 from datetime import datetime
 from typing import List
 
@@ -15,6 +17,11 @@ import yaml
 
 from pr_agent.log import get_logger
 
+try:
+    import orjson
+except ImportError:  # Optional C accelerator; stdlib json is the fallback
+    orjson = None
+
 
 def try_fix_json(review: str, max_iter: int = 10, code_suggestions: bool = False) -> dict:
     """
@@ -83,6 +90,85 @@ def fix_json_escape_char(json_message: str = None) -> dict:
     return result
 
 
+def fast_json_loads(text, strict: bool = True):
+    """
+    Parse JSON text, using orjson when it is installed.
+
+    Args:
+        text: JSON document as str or bytes
+        strict: When False, allow control characters inside strings (stdlib semantics)
+
+    Returns:
+        Parsed JSON value
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # orjson is always strict; only a non-strict retry can still succeed
+            if strict:
+                raise
+    return json.loads(text, strict=strict)
+
+
+def _json_default(value):
+    if isinstance(value, (deque, set, frozenset)):
+        return list(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def fast_json_dumps(value) -> bytes:
+    """
+    Serialize a value to compact UTF-8 JSON, using orjson when it is installed.
+
+    Values JSON has no type for are converted: deques and sets to lists,
+    dataclasses to dicts, anything else to str.
+
+    Args:
+        value: Value to serialize
+
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def extract_json_object(text: str, strict: bool = True) -> dict:
+    """
+    Extract the JSON object from an AI response.
+
+    Handles bare JSON as well as objects wrapped in ```json fences or prose by
+    decoding from the first opening brace, so no regex pass over the response is needed.
+
+    Args:
+        text: Raw AI response
+        strict: When False, allow control characters inside strings
+
+    Returns:
+        Parsed JSON object
+
+    Raises:
+        json.JSONDecodeError: If no JSON object can be decoded
+    """
+    text = text.strip()
+    try:
+        data = fast_json_loads(text, strict=strict)
+        if isinstance(data, dict):
+            return data
+    except json.JSONDecodeError:
+        pass
+
+    start = text.find("{")
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+    data, _ = json.JSONDecoder(strict=strict).raw_decode(text, start)
+    return data
+
+
 def convert_str_to_datetime(date_str: str) -> datetime:
     """
     Convert a string representation of a date and time into a datetime object.
@@ -6,6 +6,8 @@ This module handles extracting relevant code context for AI review.
 Includes:
 - Code snippet extraction with AST-based scope detection
 - Import resolution for dependency context
+- Symbol digests (signatures + docstrings) for dependency files
+- Diff-hunk windows for reviewing large changed files
 
 Extracted from ide_router.py for better modularity.
 
@@ -14,15 +16,51 @@ Author: BlackboxTester Team
 
 import ast
 import os
-from typing import Tuple, Optional, List
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Tuple, Optional, List
 
+from pr_agent.algo.code_graph import Language, _get_parser, detect_language
 from pr_agent.log import get_logger
+from pr_agent.servers.workspace_utils import WORKSPACE_SKIP_DIRS
 
 
 # ============================================================================
 # Import Resolution
 # ============================================================================
 
+@lru_cache(maxsize=8)
+def _module_index(repo_path: str, root_mtime: float) -> Dict[str, str]:
+    """
+    Map dotted module names to file paths with one walk of the repo.
+
+    Resolution order matches the old per-import probing: `pkg/mod.py`, then
+    `pkg/mod/__init__.py`, then `src/pkg/mod.py`. `root_mtime` is only part of
+    the cache key, so adding or removing top-level entries rebuilds the index.
+    """
+    candidates: Dict[str, Tuple[int, str]] = {}
+
+    def add(module: str, rank: int, full_path: str):
+        if module and (module not in candidates or rank < candidates[module][0]):
+            candidates[module] = (rank, full_path)
+
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if d not in WORKSPACE_SKIP_DIRS]
+        for f in files:
+            if not f.endswith(".py"):
+                continue
+            full_path = os.path.join(root, f)
+            rel = os.path.relpath(full_path, repo_path).replace(os.sep, "/")
+            if f == "__init__.py":
+                add(os.path.dirname(rel).replace("/", "."), 1, full_path)
+            else:
+                add(rel[:-3].replace("/", "."), 0, full_path)
+                if rel.startswith("src/"):  # Common src folder
+                    add(rel[4:-3].replace("/", "."), 2, full_path)
+
+    return {module: path for module, (_, path) in candidates.items()}
+
+
 def resolve_import_path(repo_path: str, module_name: str) -> Optional[str]:
     """
     Tries to map an import (e.g., 'pr_agent.algo.utils') to a filepath.
@@ -35,92 +73,160 @@ def resolve_import_path(repo_path: str, module_name: str) -> Optional[str]:
     Returns:
         Absolute path to the module file, or None if not found
     """
-    possible_rel_paths = [
-        module_name.replace('.', '/') + '.py',
-        module_name.replace('.', '/') + '/__init__.py',
-        'src/' + module_name.replace('.', '/') + '.py',  # Common src folder
-    ]
-    
-    for rel in possible_rel_paths:
-        full_path = os.path.join(repo_path, rel)
-        if os.path.exists(full_path) and os.path.isfile(full_path):
-            return full_path
-    return None
+    try:
+        root_mtime = os.path.getmtime(repo_path)
+    except OSError:
+        return None
+    return _module_index(repo_path, root_mtime).get(module_name)
 
 
 # ============================================================================
 # Code Snippet Extraction
 # ============================================================================
 
+# Smallest enclosing node of these types becomes the snippet scope for JS/TS
+JS_SCOPE_NODE_TYPES = frozenset({
+    "function_declaration",
+    "generator_function_declaration",
+    "function_expression",
+    "arrow_function",
+    "method_definition",
+    "class_declaration",
+})
+
+
+def _python_scope_finder(file_content: str) -> Callable[[int], Optional[Tuple[int, int]]]:
+    """Parse once with the ast module; the returned lookup gives the function/class enclosing a line."""
+    tree = ast.parse(file_content)
+    scopes = [
+        node for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    ]
+
+    def find(target_line: int) -> Optional[Tuple[int, int]]:
+        best_node = None
+        for node in scopes:
+            if node.lineno <= target_line <= node.end_lineno:
+                # Prefer smaller scopes (inner functions) over larger ones (classes)
+                if not best_node or node.lineno > best_node.lineno:
+                    best_node = node
+        if best_node:
+            return best_node.lineno, best_node.end_lineno
+        return None
+
+    return find
+
+
+def _js_scope_finder(file_content: str) -> Optional[Callable[[int], Optional[Tuple[int, int]]]]:
+    """Parse once with tree-sitter; the returned lookup gives the innermost function/method/class enclosing a line."""
+    parser = _get_parser(Language.JAVASCRIPT)
+    if parser is None:
+        return None
+    root = parser.parse(file_content.encode("utf-8")).root_node
+
+    def find(target_line: int) -> Optional[Tuple[int, int]]:
+        row = target_line - 1
+        node = root
+        best = None
+        # Descend only into the child that contains the target row; the last scope seen is the innermost
+        while node is not None:
+            if node.type in JS_SCOPE_NODE_TYPES:
+                best = node
+            node = next((c for c in node.children if c.start_point[0] <= row <= c.end_point[0]), None)
+
+        if best is not None:
+            return best.start_point[0] + 1, best.end_point[0] + 1
+        return None
+
+    return find
+
+
+def _number_lines(lines: List[str], start: int, end: int, target_line: int) -> str:
+    numbered_lines = []
+    for i, line in enumerate(lines[start:end], start=start + 1):
+        prefix = ">>> " if i == target_line else "    "
+        numbered_lines.append(f"{prefix}{i:4d} | {line}")
+    return "\n".join(numbered_lines)
+
+
 def extract_code_snippet(
     file_content: str, 
     target_line: int, 
-    context_lines: int = 10
+    context_lines: int = 10,
+    filename: Optional[str] = None,
 ) -> Tuple[str, int, int]:
     """
     Extracts the relevant code slice around a target line.
     
     Strategy:
-    1. Tries to find the enclosing Function/Class using AST
-    2. Falls back to line-based slicing if AST fails
+    1. Tries to find the enclosing Function/Class (ast for Python, tree-sitter for JS/TS)
+    2. Falls back to line-based slicing if parsing fails or the language has no parser
     
     Args:
         file_content: Full file content as string
         target_line: Line number to focus on (1-indexed)
         context_lines: Number of context lines for fallback (default 10)
+        filename: Used to pick the parser; without it Python parsing is attempted
         
     Returns:
         Tuple of (snippet_with_line_numbers, start_line, end_line)
     """
+    return extract_code_snippets(file_content, [target_line], context_lines, filename)[0]
+
+
+def extract_code_snippets(
+    file_content: str,
+    target_lines: List[int],
+    context_lines: int = 10,
+    filename: Optional[str] = None,
+) -> List[Tuple[str, int, int]]:
+    """
+    extract_code_snippet for several lines of the same file.
+
+    The file is split and parsed once, however many lines are requested.
+
+    Returns:
+        One (snippet_with_line_numbers, start_line, end_line) per target line, in order
+    """
     lines = file_content.splitlines()
     total_lines = len(lines)
-    
-    # AST Strategy: Find enclosing scope
-    try:
-        tree = ast.parse(file_content)
-        best_node = None
-        
-        for node in ast.walk(tree):
-            # Check if node has line info and covers our target
-            if hasattr(node, 'lineno') and hasattr(node, 'end_lineno'):
-                if node.lineno <= target_line <= node.end_lineno:
-                    # Prefer smaller scopes (inner functions) over larger ones (classes)
-                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                        # If we already have a node, only replace if this one is 'inner'
-                        if best_node and (node.lineno > best_node.lineno):
-                            best_node = node
-                        elif not best_node:
-                            best_node = node
-                            
-        if best_node:
-            start_line = best_node.lineno
-            end_line = best_node.end_lineno
+
+    language = detect_language(filename) if filename else Language.PYTHON
+    finder_factory = {
+        Language.PYTHON: _python_scope_finder,
+        Language.JAVASCRIPT: _js_scope_finder,
+        Language.TYPESCRIPT: _js_scope_finder,  # Close enough for scope detection
+    }.get(language)
+
+    # Scope Strategy: Find enclosing function/class
+    find_scope = None
+    if finder_factory:
+        try:
+            find_scope = finder_factory(file_content)
+        except Exception:
+            pass  # Parse failed (syntax error), fall back
+
+    snippets = []
+    for target_line in target_lines:
+        scope = None
+        if find_scope:
+            try:
+                scope = find_scope(target_line)
+            except Exception:
+                pass
+        if scope:
+            start_line, end_line = scope
             # Add a bit of buffer around the function for decorators/comments
-            start = max(0, start_line - 2) 
+            start = max(0, start_line - 2)
             end = min(total_lines, end_line + 1)
-            
-            snippet_lines = lines[start:end]
-            numbered_lines = []
-            for i, line in enumerate(snippet_lines, start=start + 1):
-                prefix = ">>> " if i == target_line else "    "
-                numbered_lines.append(f"{prefix}{i:4d} | {line}")
-            
-            return "\n".join(numbered_lines), start + 1, end
-            
-    except Exception:
-        pass  # AST failed (syntax error or non-python), fall back
-        
-    # Fallback Strategy: Line-based Slicing
-    start = max(0, target_line - context_lines - 1)
-    end = min(total_lines, target_line + context_lines)
-    
-    snippet_lines = lines[start:end]
-    numbered_lines = []
-    for i, line in enumerate(snippet_lines, start=start + 1):
-        prefix = ">>> " if i == target_line else "    "
-        numbered_lines.append(f"{prefix}{i:4d} | {line}")
-    
-    return "\n".join(numbered_lines), start + 1, end
+            snippets.append((_number_lines(lines, start, end, target_line), start + 1, end))
+            continue
+
+        # Fallback Strategy: Line-based Slicing
+        start = max(0, target_line - context_lines - 1)
+        end = min(total_lines, target_line + context_lines)
+        snippets.append((_number_lines(lines, start, end, target_line), start + 1, end))
+    return snippets
 
 
 def extract_function_at_line(file_content: str, target_line: int) -> Optional[str]:
@@ -150,6 +256,148 @@ def extract_function_at_line(file_content: str, target_line: int) -> Optional[st
     return None
 
 
+# ============================================================================
+# Diff Windows
+# ============================================================================
+
+# New-file path of a diff section, or the new-side range of a hunk header
+_DIFF_HUNK_RE = re.compile(r"^(?:\+\+\+ (.+)|@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@)", re.MULTILINE)
+
+
+def parse_diff_hunks(git_diff: str) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Map each file of a unified git diff to the line ranges its hunks cover.
+
+    Args:
+        git_diff: Output of `git diff`
+
+    Returns:
+        {path: [(start_line, end_line), ...]} in the new file's numbering (1-indexed, inclusive)
+    """
+    hunks: Dict[str, List[Tuple[int, int]]] = {}
+    current = None
+    for match in _DIFF_HUNK_RE.finditer(git_diff):
+        path, start, length = match.groups()
+        if path is not None:
+            # Deleted files have `+++ /dev/null` and no new-file lines
+            path = path.rstrip()
+            current = hunks.setdefault(path[2:].replace("\\", "/"), []) if path.startswith("b/") else None
+        elif current is not None:
+            start = int(start)
+            length = 1 if length is None else int(length)
+            if length:
+                current.append((start, start + length - 1))
+    return hunks
+
+
+def window_around_hunks(file_content: str, hunks: List[Tuple[int, int]], margin: int = 25) -> str:
+    """
+    Render only the regions of a file around its diff hunks.
+
+    Lines keep their numbers (`  123 | code`) so findings still point at the
+    real file; skipped regions are replaced by a `--- skipped N lines ---` marker.
+
+    Args:
+        file_content: Full file content
+        hunks: (start_line, end_line) ranges, e.g. from parse_diff_hunks
+        margin: Lines of context kept on each side of a hunk
+
+    Returns:
+        Numbered excerpt of the file
+    """
+    lines = file_content.splitlines()
+    total_lines = len(lines)
+
+    windows: List[List[int]] = []
+    for start, end in sorted(hunks):
+        start, end = max(1, start - margin), min(total_lines, end + margin)
+        if start > end:
+            continue
+        if windows and start <= windows[-1][1] + 1:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+
+    parts = []
+    shown_until = 0
+    for start, end in windows:
+        if start > shown_until + 1:
+            parts.append(f"--- skipped {start - shown_until - 1} lines ---")
+        parts.extend(f"{i:5d} | {lines[i - 1]}" for i in range(start, end + 1))
+        shown_until = end
+    if shown_until < total_lines:
+        parts.append(f"--- skipped {total_lines - shown_until} lines ---")
+    return "\n".join(parts)
+
+
+def _signature(node) -> str:
+    """Render a function header such as `async def run(self, x: int) -> str: ...`."""
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}: ..."
+
+
+def _docstring_line(node, indent: str) -> List[str]:
+    """First docstring line of a node, if any."""
+    doc = ast.get_docstring(node)
+    if not doc:
+        return []
+    return [f'{indent}"""{doc.strip().splitlines()[0]}"""']
+
+
+def get_symbol_digest(file_content: str) -> Optional[str]:
+    """
+    Summarize a Python file as its top-level class and function headers.
+
+    Keeps signatures and the first docstring line of each symbol, dropping
+    bodies, imports and comments, so dependency context costs a fraction
+    of the raw file's tokens.
+
+    Args:
+        file_content: Full file content
+
+    Returns:
+        Digest text, or None if the file cannot be parsed
+    """
+    try:
+        tree = ast.parse(file_content)
+    except SyntaxError:
+        return None
+
+    out = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            out.append(_signature(node))
+            out.extend(_docstring_line(node, "    "))
+        elif isinstance(node, ast.ClassDef):
+            bases = ", ".join(ast.unparse(b) for b in node.bases)
+            out.append(f"class {node.name}({bases}):" if bases else f"class {node.name}:")
+            out.extend(_docstring_line(node, "    "))
+            for member in node.body:
+                if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    out.append(f"    {_signature(member)}")
+    return "\n".join(out)
+
+
+@lru_cache(maxsize=512)
+def _cached_symbol_digest(file_path: str, mtime: float) -> Optional[str]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return get_symbol_digest(f.read())
+
+
+def get_file_symbol_digest(file_path: str) -> Optional[str]:
+    """
+    Symbol digest of a file on disk, memoized by (path, mtime).
+
+    Args:
+        file_path: Absolute path to a Python file
+
+    Returns:
+        Digest text, or None if the file cannot be parsed
+    """
+    return _cached_symbol_digest(file_path, os.path.getmtime(file_path))
+
+
 def get_file_structure(file_content: str) -> List[dict]:
     """
     Get a summary of the file structure (classes, functions).
@@ -0,0 +1,71 @@
+"""
+CPU Pool - Process Executor for CPU-Bound Analysis
+===================================================
+
+AST parsing and code-graph building hold the GIL for their whole duration;
+running them on the event loop (or in a thread) stalls every other request.
+This module runs such work in a small process pool instead.
+
+Workers are started with the "spawn" method: forking a process that already
+runs an event loop and HTTP clients is unsafe. Submitted callables must be
+module-level functions whose arguments and results are picklable.
+
+Author: BlackboxTester Team
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_disabled = False
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Lazily create the shared process pool; None means fall back to threads."""
+    global _pool, _pool_disabled
+
+    if _pool is not None or _pool_disabled:
+        return _pool
+
+    workers = int(get_settings().get("codegraph.process_workers", min(4, os.cpu_count() or 1)))
+    if workers <= 0:
+        _pool_disabled = True
+        return None
+    try:
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    except (OSError, NotImplementedError, ValueError) as e:
+        get_logger().warning(f"[CPUPool] Process pool unavailable, using threads: {e}")
+        _pool_disabled = True
+    return _pool
+
+
+async def run_cpu_bound(func: Callable, *args) -> Any:
+    """
+    Run a CPU-bound function off the event loop, in the process pool when available.
+
+    Args:
+        func: Module-level (picklable) function
+        *args: Picklable positional arguments
+
+    Returns:
+        The function's return value
+    """
+    global _pool
+    pool = _get_pool()
+    if pool is None:
+        return await asyncio.to_thread(func, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool as e:
+        # A worker died (e.g. OOM-killed); start a fresh pool next time and finish this call in a thread
+        get_logger().warning(f"[CPUPool] Process pool broken, retrying in a thread: {e}")
+        _pool = None
+        return await asyncio.to_thread(func, *args)
+
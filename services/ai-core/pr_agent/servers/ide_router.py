@@ -1,5 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, Request, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+import io
 import tempfile
 import os
 import shutil
@@ -9,15 +11,26 @@ from pr_agent.tools.pr_sonar_scan import PRSonarScan
 from pr_agent.git_providers.local_git_provider import LocalGitProvider
 from pr_agent.config_loader import get_settings
 from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
+from pr_agent.algo.utils import extract_json_object, fast_json_dumps, fast_json_loads
+import ast
 import difflib
+import hashlib
+import itertools
 import json
 import asyncio
+import mmap
 import re
 import aiohttp
+import tenacity
 import time
+import uuid
+import zipfile
+from collections import OrderedDict
 
 # Code Graph v2 - Multi-language dependency analyzer
 from pr_agent.algo.code_graph import build_codegraph_v2, CodeGraphBuilder
+from pr_agent.algo.prompt_compression import compress_prose
+from pr_agent.algo.response_cache import ResponseCache, prompt_cache_key
 
 # ===========================================================================
 # Refactored Modules - Phase 1 Extraction
@@ -25,6 +38,10 @@ from pr_agent.algo.code_graph import build_codegraph_v2, CodeGraphBuilder
 from pr_agent.servers.job_manager import (
     JOBS,
     create_job,
+    new_job_logs,
+    log_job_message,
+    mark_job_dirty,
+    load_job_snapshot,
     update_job_log,
     update_job_progress,
     update_job_status,
@@ -36,14 +53,25 @@ from pr_agent.servers.job_manager import (
 )
 from pr_agent.servers.context_builder import (
     resolve_import_path,
-    extract_code_snippet,
+    extract_code_snippets,
     extract_function_at_line,
+    get_file_symbol_digest,
     get_file_structure,
     get_related_files,
+    parse_diff_hunks,
+    window_around_hunks,
 )
+from pr_agent.servers.cpu_pool import run_cpu_bound
 from pr_agent.servers.workspace_utils import (
     setup_workspace_sync,
+    extract_repo_zip_sync,
+    extract_zip_filtered,
     git_init_sync,
+    count_workspace_files,
+    iter_workspace_files,
+    get_changed_files_via_git,
+    SOURCE_CODE_EXTENSIONS,
+    WORKSPACE_SKIP_DIRS,
     create_temp_workspace,
     cleanup_workspace,
     find_files_by_extension,
@@ -70,6 +98,98 @@ from pr_agent.algo.findings import (
 
 SONAR_SERVICE_URL = os.environ.get("SONAR_SERVICE_URL", "http://sonar-service:8000")
 
+# Patterns and extension tuples used inside the per-file/per-issue loops, compiled once
+_FENCE_RE = re.compile(r"```(?:json)?(.*?)```", re.DOTALL)
+_DIFF_FILE_RE = re.compile(r"diff --git a/(.*?) b/")
+_DIFF_NEW_PATH_RE = re.compile(r"^diff --git.*? b/(.*?)(?= b/|$)", re.MULTILINE)
+_SKIP_EXTS = ('.md', '.txt', '.lock', '.png', '.jpg', '.jpeg', '.gif')
+_SECRET_FALLBACK_EXTS = frozenset({".js", ".jsx", ".ts", ".tsx"})
+_SECRET_FALLBACK_PATTERNS = (
+    # apiKey: "value" / api_key = "value"
+    (
+        re.compile(r'(?i)(\bapi[_-]?key\b\s*[:=]\s*)(["\'])([^"\']{8,})\2'),
+        r'\1process.env.FIREBASE_API_KEY'
+    ),
+    # token: "value" / secret: "value" / password: "value"
+    (
+        re.compile(r'(?i)(\b(token|secret|password)\b\s*[:=]\s*)(["\'])([^"\']{8,})\3'),
+        r'\1process.env.APP_SECRET'
+    ),
+)
+
+# [BlackboxTester] Static prompt prefixes. Keep these byte-identical across requests and put all
+# per-request data in the user message, so provider-side prompt caches can reuse the prefix.
+IDE_REVIEW_SYSTEM_PROMPT = """You are an expert Code Reviewer. Review the provided code.
+
+Please provide a JSON response with the following structure:
+{
+    "summary": "A markdown summary of the issues and fixes.",
+    "fixes": [
+        {
+            "filename": "THE_FILENAME_I_PROVIDED",
+            "new_content": "THE FULL FIXED CONTENT OF THE FILE"
+        }
+    ]
+}
+IMPORTANT: Return ONLY valid JSON. Ensure new_content is the COMPLETE file.
+"""
+
+# Separates streamed model tokens from the final JSON payload in streaming IDE reviews
+IDE_STREAM_META_SEPARATOR = b"\n---END_META---\n"
+
+# Parsed IDE reviews keyed by prompt hash (successful parses only)
+_IDE_REVIEW_CACHE = ResponseCache(
+    maxsize=int(get_settings().get("ide.review_cache_size", 10_000)),
+    ttl=float(get_settings().get("ide.review_cache_ttl", 3600)),
+)
+
+# Unified analysis results keyed by (orchestrator version, model, diff, workspace content)
+_UNIFIED_RESULT_CACHE = ResponseCache(
+    maxsize=int(get_settings().get("ide.unified_cache_size", 256)),
+    ttl=float(get_settings().get("ide.unified_cache_ttl", 3600)),
+)
+
+# Raw security-fix responses keyed by prompt hash; only responses that yielded a fixed_snippet are stored
+_FIX_RESPONSE_CACHE = ResponseCache(
+    maxsize=int(get_settings().get("ai.fix_cache_size", 512)),
+    ttl=float(get_settings().get("ai.fix_cache_ttl", 3600)),
+)
+
+PR_WALKTHROUGH_SYSTEM_PROMPT = """You are a Technical Writer for a Software Development team.
+Analyze the following Git Log and Diff.
+Generate a concise, structured 'PR Walkthrough' in Markdown.
+
+OUTPUT REQUIREMENTS:
+- Use H2 (##) for Main Intent.
+- Use H3 (###) for "Architectural Changes".
+- Use bullet points for specific file changes.
+- Tone: Professional, descriptive, encouraging.
+"""
+
+SECURITY_FIX_SYSTEM_PROMPT = """You are an expert Security Fixer.
+Fix ONLY the specific vulnerability described below. Do not refactor unrelated code.
+
+RULES:
+1. Replace hardcoded secrets with environment variable reads (e.g. process.env.X or os.environ.get("X")).
+2. Do NOT create .env files with REAL secret values. Use placeholders like "your_db_password_here".
+3. If fixing secret exposure, suggest adding .env to .gitignore via additional_edits.
+4. Each additional_edits entry must have a unique filename. Do NOT repeat filenames from previous fixes.
+
+OUTPUT FORMAT: Return a JSON object with the fixed snippet.
+IMPORTANT: The 'fixed_snippet' must contain ONLY clean, valid code.
+Do NOT include line numbers (e.g. "1 |") or prefixes.
+
+Structure:
+{
+    "fixed_snippet": "THE FIXED CODE...",
+    "issue_line": 123,
+    "issue_message": "...",
+    "additional_edits": [
+        { "filename": ".env.example", "content": "DB_PASSWORD=your_db_password_here" },
+        { "filename": ".gitignore", "content": ".env\\n.env.local" }
+    ]
+}"""
+
 async def scan_via_microservice(zip_path: str, job_id: str):
     """Call the Sonar Microservice to analyze the zip."""
     url = f"{SONAR_SERVICE_URL}/analyze"
@@ -87,6 +207,44 @@ async def scan_via_microservice(zip_path: str, job_id: str):
         get_logger().error(f"Microservice Call Failed: {e}")
         raise e
 
+# None until the first /analyze_file call tells us whether the Sonar service supports it
+_ANALYZE_FILE_SUPPORTED = None
+
+async def scan_file_via_microservice(filename: str, content: str, job_id: str):
+    """
+    Send a single file to the Sonar Microservice without zipping it.
+    Returns None when the service has no /analyze_file route, so callers can fall back to the zip flow.
+    """
+    global _ANALYZE_FILE_SUPPORTED
+    if _ANALYZE_FILE_SUPPORTED is False:
+        return None
+
+    url = f"{SONAR_SERVICE_URL}/analyze_file"
+    try:
+        async with aiohttp.ClientSession() as session:
+            data = aiohttp.FormData()
+            data.add_field('path', filename)
+            data.add_field('content', content)
+            data.add_field('job_id', job_id)
+            async with session.post(url, data=data) as resp:
+                if resp.status in (404, 405):
+                    _ANALYZE_FILE_SUPPORTED = False
+                    get_logger().info("Sonar Service has no /analyze_file route; using zip uploads")
+                    return None
+                if resp.status != 200:
+                    text = await resp.text()
+                    raise Exception(f"Sonar Service Error {resp.status}: {text}")
+                _ANALYZE_FILE_SUPPORTED = True
+                return await resp.json()
+    except Exception as e:
+        get_logger().error(f"Microservice Call Failed: {e}")
+        raise e
+
+def _zip_single_file_sync(file_path: str, arcname: str, zip_path: str):
+    """Store one file in a zip (no deflate: the service inflates it straight away)."""
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as zf:
+        zf.write(file_path, arcname)
+
 def _extract_sonar_issues(result: dict) -> list:
     """Normalize Sonar microservice responses across versions."""
     if not isinstance(result, dict):
@@ -97,20 +255,88 @@ def _extract_sonar_issues(result: dict) -> list:
             return value
     return []
 
+_HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@$")
+DIFF_CONTEXT_LINES = 3
+
+
 def generate_unified_diff(original: str, fixed: str, filename: str) -> str:
-    """Generates a unified diff string (Git format) for inline highlighting."""
+    """
+    Generates a unified diff string (Git format) for inline highlighting.
+    Only the window between the first and last changed line (plus context) goes through difflib.
+    """
     original_lines = original.splitlines(keepends=True)
     fixed_lines = fixed.splitlines(keepends=True)
+
+    # Fixes touch a few spans of a file; the unchanged head and tail need no matching
+    limit = min(len(original_lines), len(fixed_lines))
+    prefix = 0
+    while prefix < limit and original_lines[prefix] == fixed_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and original_lines[-1 - suffix] == fixed_lines[-1 - suffix]:
+        suffix += 1
+    if prefix == len(original_lines) == len(fixed_lines):
+        return ""
+
+    start = max(0, prefix - DIFF_CONTEXT_LINES)
+    keep_tail = max(0, suffix - DIFF_CONTEXT_LINES)
     diff = difflib.unified_diff(
-        original_lines, fixed_lines,
+        original_lines[start:len(original_lines) - keep_tail],
+        fixed_lines[start:len(fixed_lines) - keep_tail],
         fromfile=f"a/{filename}",
-        tofile=f"b/{filename}"
+        tofile=f"b/{filename}",
+        n=DIFF_CONTEXT_LINES,
     )
-    return ''.join(diff)
+    if not start:
+        return ''.join(diff)
+
+    def shift(line: str) -> str:
+        # Hunk line numbers are relative to the window; move them back to file positions
+        match = _HUNK_HEADER_RE.match(line.rstrip("\n"))
+        if not match:
+            return line
+        old_start, old_len, new_start, new_len = match.groups()
+        return f"@@ -{int(old_start) + start}{old_len or ''} +{int(new_start) + start}{new_len or ''} @@\n"
+
+    return ''.join(shift(line) if line.startswith("@@") else line for line in diff)
+
+# Above this many characters, difflib's pure-Python matcher is slower than shelling out to git
+LARGE_DIFF_CHARS = 200_000
+
+async def generate_unified_diff_async(original: str, fixed: str, filename: str) -> str:
+    """Like generate_unified_diff, but off the event loop and via `git diff --no-index` for large files."""
+    if max(len(original), len(fixed)) <= LARGE_DIFF_CHARS:
+        return await asyncio.to_thread(generate_unified_diff, original, fixed, filename)
+
+    with tempfile.TemporaryDirectory(prefix="blackbox_diff_") as diff_dir:
+        a_path = os.path.join(diff_dir, "a")
+        b_path = os.path.join(diff_dir, "b")
+        # Files this size take a while to write; keep that off the event loop too
+        await asyncio.to_thread(_write_text_sync, a_path, original)
+        await asyncio.to_thread(_write_text_sync, b_path, fixed)
+        proc = await asyncio.create_subprocess_exec(
+            "git", "diff", "--no-index", "--no-color", "--unified=3", "--", a_path, b_path,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        out, err = await proc.communicate()
+
+    # git diff exits 1 when the files differ
+    if proc.returncode not in (0, 1):
+        get_logger().warning(f"git diff failed for {filename}, using difflib: {err.decode(errors='replace')[:200]}")
+        return await asyncio.to_thread(generate_unified_diff, original, fixed, filename)
+
+    text = out.decode("utf-8", errors="replace")
+    hunk_start = text.find("\n@@")
+    if hunk_start == -1:
+        return ""
+    # Replace git's temp-file headers with the repo-relative ones the IDE expects
+    return f"--- a/{filename}\n+++ b/{filename}" + text[hunk_start:]
 
 router = APIRouter()
 
 class IDEReviewRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     file_path: str
     content: str
 
@@ -131,21 +357,214 @@ def _trace_headers(request: Request) -> dict:
 @router.get("/api/v1/ide/job_status/{job_id}")
 async def get_job_status(job_id: str):
     if job_id not in JOBS:
+        # The job may be running on another worker, or finished before a restart
+        snapshot = await load_job_snapshot(job_id)
+        if snapshot is not None:
+            return snapshot
         get_logger().warning(f"[ide-job-status:v1] job not found job_id={job_id}")
         return {"status": "not_found"}
     get_logger().debug(f"[ide-job-status:v1] job status request job_id={job_id} status={JOBS[job_id].get('status')}")
-    return JOBS[job_id]
+    return _job_status_response(job_id)
+
+def _parse_ide_review_response(response: str, filename: str) -> tuple:
+    """
+    Parse the IDE review JSON, falling back to an error summary when the model output is not JSON.
+    Returns (structured_data, parsed_ok).
+    """
+    try:
+        structured_data = extract_json_object(response)
+    except json.JSONDecodeError as e:
+        get_logger().error(f"AI JSON Parse Failed. Raw Response: {response}")
+        return {"summary": f"Failed to parse AI response: {str(e)}", "fixes": []}, False
+
+    # Log the shape only: new_content can hold whole files
+    get_logger().info(
+        "AI Response Parsed: keys={} fixes={}",
+        list(structured_data),
+        len(structured_data.get("fixes", [])),
+    )
+    # Ensure filename matches if AI forgot it
+    for fix in structured_data.get("fixes", []):
+        if not fix.get("filename") or fix["filename"] == "THE_FILENAME_I_PROVIDED":
+            fix["filename"] = filename
+    return structured_data, True
+
+
+def _read_text_sync(path: str, errors: str = "replace") -> str:
+    with open(path, "r", encoding="utf-8", errors=errors) as f:
+        return f.read()
+
+
+def _write_text_sync(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _splice_lines_sync(path: str, start_line: int, end_line: int, replacement: str) -> None:
+    """
+    Replace lines start_line..end_line (1-based, inclusive) of a file in place.
+
+    Only the head up to end_line is scanned for newlines and only the tail after it is
+    rewritten; a same-length replacement is a single pwrite. Bytes outside the range,
+    including their line endings, are left untouched.
+    """
+    with open(path, "r+b") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                def line_offset(n, pos=0, line=0):
+                    while line < n and pos < size:
+                        nl = mm.find(b"\n", pos)
+                        pos = size if nl < 0 else nl + 1
+                        line += 1
+                    return pos, line
+
+                start_off, _ = line_offset(start_line - 1)
+                end_off, _ = line_offset(end_line, start_off, start_line - 1)
+                old = mm[start_off:end_off]
+                tail = b"" if end_off == size else mm[end_off:]
+        else:
+            start_off = end_off = 0
+            old = tail = b""
+
+        # Keep the replaced range's trailing line break
+        if old.endswith(b"\n") and not replacement.endswith("\n"):
+            replacement += "\r\n" if old.endswith(b"\r\n") else "\n"
+        new = replacement.encode("utf-8")
+
+        if len(new) == len(old):
+            os.pwrite(f.fileno(), new, start_off)
+            return
+        f.seek(start_off)
+        f.write(new)
+        f.write(tail)
+        f.truncate()
+
+
+UPLOAD_COPY_CHUNK = 1 << 20  # 1 MiB
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _copy_upload_sync(src, dest_path: str) -> None:
+    """
+    Persist an upload to disk. Uploads already spooled to a real file are copied
+    in-kernel with os.sendfile; in-memory ones through one reused 1 MiB buffer.
+    """
+    with open(dest_path, "wb") as buffer:
+        # fileno() on a SpooledTemporaryFile still in memory would force it to disk first
+        if hasattr(os, "sendfile") and getattr(src, "_rolled", True):
+            start = src.tell()
+            try:
+                in_fd = src.fileno()
+                offset = start
+                remaining = os.fstat(in_fd).st_size - offset
+                while remaining > 0:
+                    sent = os.sendfile(buffer.fileno(), in_fd, offset, remaining)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    remaining -= sent
+                src.seek(offset)
+                return
+            except (OSError, AttributeError, io.UnsupportedOperation):
+                src.seek(start)
+                buffer.seek(0)
+                buffer.truncate()
+        readinto = getattr(src, "readinto", None)
+        if readinto is None:
+            shutil.copyfileobj(src, buffer, length=UPLOAD_COPY_CHUNK)
+            return
+        # readinto fills the same buffer each time instead of allocating a new chunk per read
+        view = memoryview(bytearray(UPLOAD_COPY_CHUNK))
+        while n := readinto(view):
+            buffer.write(view[:n])
+
+
+# Content types for which analyze_unified takes the zip as the raw request body
+RAW_ZIP_CONTENT_TYPES = ("application/zip", "application/octet-stream")
+
+
+async def _stream_request_to_file(request: Request, dest_path: str) -> int:
+    """
+    Write a raw request body to disk as it arrives, without a spooled UploadFile copy.
+    Chunks are gathered to UPLOAD_COPY_CHUNK and written off the event loop. Returns the byte count.
+    """
+    size = 0
+    pending = []
+    pending_size = 0
+    out = await asyncio.to_thread(open, dest_path, "wb")
+    try:
+        async for chunk in request.stream():
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= UPLOAD_COPY_CHUNK:
+                await asyncio.to_thread(out.write, b"".join(pending))
+                size += pending_size
+                pending, pending_size = [], 0
+        if pending:
+            await asyncio.to_thread(out.write, b"".join(pending))
+            size += pending_size
+    finally:
+        await asyncio.to_thread(out.close)
+    return size
+
+
+def _save_upload_sync(src, file_path: str, max_bytes: int) -> str:
+    """Copy an uploaded file to disk in 1 MiB chunks and return its decoded text."""
+    chunks = []
+    size = 0
+    with open(file_path, "wb") as f:
+        while chunk := src.read(1 << 20):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit")
+            f.write(chunk)
+            chunks.append(chunk)
+    return b"".join(chunks).decode("utf-8", errors="replace")
+
+
+async def _stream_ide_review(ai_handler, system_prompt: str, user_prompt: str, filename: str, sonar_findings: str,
+                             cache_key: str = None):
+    """Yield raw model tokens, then IDE_STREAM_META_SEPARATOR and the final review payload as JSON."""
+    chunks = []
+    parsed_ok = False
+    try:
+        async for delta in ai_handler.chat_completion_stream(
+            model=get_settings().config.model,
+            system=system_prompt,
+            user=user_prompt
+        ):
+            chunks.append(delta)
+            yield delta.encode()
+        structured_data, parsed_ok = _parse_ide_review_response("".join(chunks), filename)
+    except Exception as e:
+        get_logger().error(f"Single File AI Stream Failed: {e}", exc_info=True)
+        structured_data = {"summary": f"⚠️ **AI Review Failed**: {str(e)}\n\n(SonarQube findings below)", "fixes": []}
+
+    payload = {"review": structured_data.get("summary", ""), "fixes": structured_data.get("fixes", []), "sonar_raw": sonar_findings}
+    if parsed_ok and cache_key:
+        _IDE_REVIEW_CACHE.set(cache_key, payload)
+    yield IDE_STREAM_META_SEPARATOR + json.dumps(payload).encode()
+
 
 @router.post("/api/v1/ide/review")
 async def review_ide_file(
     file: UploadFile = File(None),
     content: str = Form(None),
     filename: str = Form("file.py"),
-    background_tasks: BackgroundTasks = None
+    background_tasks: BackgroundTasks = None,
+    stream: bool = False,
+    force_review: bool = False,
 ):
     """
     Endpoint for VS Code / JetBrains extensions to review specific files.
     This mimics the full PR review but on a single file context.
+    With ?stream=true the AI output is streamed, followed by IDE_STREAM_META_SEPARATOR and the JSON result.
+    Identical prompts are answered from cache unless ?force_review=true.
     """
     get_logger().info(f"IDE Request: Reviewing {filename}")
     
@@ -157,29 +576,28 @@ async def review_ide_file(
         # Save content
         code_content = ""
         if file:
-            content = await file.read()
-            code_content = content.decode("utf-8")
-            with open(file_path, "wb") as f:
-                f.write(content)
+            max_upload_bytes = int(get_settings().get("ide.max_upload_mb", 20)) * 1024 * 1024
+            code_content = await asyncio.to_thread(_save_upload_sync, file.file, file_path, max_upload_bytes)
         elif content:
             code_content = content
-            with open(file_path, "w") as f:
-                f.write(content)
+            await asyncio.to_thread(_write_text_sync, file_path, content)
         
         # Initialize Git layout for tools to work
         # PR-Agent expects a git repo
-        os.system(f"cd {temp_dir} && git init && git add . && git commit -m 'initial'")
+        await asyncio.to_thread(git_init_sync, temp_dir)
         
         # 1. SonarQube Scan (Microservice)
         sonar_findings = ""
         if get_settings().get("sonarqube.enabled", False):
             try:
                 get_logger().info("IDE: Running Sonar Scan (via Microservice)")
-                # Zip the temp dir
-                zip_path = os.path.join(temp_dir, "ide_scan.zip")
-                shutil.make_archive(zip_path.replace(".zip", ""), 'zip', temp_dir)
-                
-                result = await scan_via_microservice(zip_path, f"ide_{os.urandom(4).hex()}")
+                scan_id = f"ide_{os.urandom(4).hex()}"
+                result = await scan_file_via_microservice(filename, code_content, scan_id)
+                if result is None:
+                    # Older Sonar service: zip just the reviewed file
+                    zip_path = os.path.join(temp_dir, "ide_scan.zip")
+                    await asyncio.to_thread(_zip_single_file_sync, file_path, filename, zip_path)
+                    result = await scan_via_microservice(zip_path, scan_id)
                 issues = _extract_sonar_issues(result)
                 
                 if issues:
@@ -198,78 +616,130 @@ async def review_ide_file(
         
         ai_handler = LiteLLMAIHandler()
         
-        # Construct Prompt
-        system_prompt = "You are an expert Code Reviewer. Review the provided code."
+        # Construct Prompt: static instructions + schema in the system prompt, request data in the user prompt
+        system_prompt = IDE_REVIEW_SYSTEM_PROMPT
         user_prompt = f"Code to review ({filename}):\n\n```\n{code_content}\n```"
         
         if sonar_findings:
-            user_prompt += f"\n\n🔍 **Static Analysis Findings** (You MUST fix these):\n{sonar_findings}"
+            # Only the findings prose is compressed; the code block above stays verbatim
+            findings_prompt = await asyncio.to_thread(compress_prose, sonar_findings, len(user_prompt) + len(sonar_findings))
+            user_prompt += f"\n\n🔍 **Static Analysis Findings** (You MUST fix these):\n{findings_prompt}"
             user_prompt += "\n\nProvide specific code fixes for the static analysis issues and any logic bugs you find."
         else:
             user_prompt += "\n\nHunt for logic bugs, security issues, and provide fixes."
 
-        user_prompt += """
-Please provide a JSON response with the following structure:
-{
-    "summary": "A markdown summary of the issues and fixes.",
-    "fixes": [
-        {
-            "filename": "THE_FILENAME_I_PROVIDED",
-            "new_content": "THE FULL FIXED CONTENT OF THE FILE"
-        }
-    ]
-}
-IMPORTANT: Return ONLY valid JSON. Ensure new_content is the COMPLETE file.
-"""
+        # [BlackboxTester] Exact-prompt cache: same model + code + findings -> same review
+        cache_key = None
+        if get_settings().get("ide.review_cache_enabled", True) and not force_review:
+            cache_key = prompt_cache_key(get_settings().config.model, system_prompt, user_prompt)
+            cached = _IDE_REVIEW_CACHE.get(cache_key)
+            if cached is not None:
+                get_logger().info(f"IDE review cache hit for {filename}")
+                if stream:
+                    return StreamingResponse(
+                        iter([IDE_STREAM_META_SEPARATOR + json.dumps(cached).encode()]),
+                        media_type="text/event-stream",
+                    )
+                return dict(cached)
+
+        if stream:
+            # [BlackboxTester] Forward tokens as they are generated; the parsed review follows as a JSON tail
+            return StreamingResponse(
+                _stream_ide_review(ai_handler, system_prompt, user_prompt, filename, sonar_findings, cache_key),
+                media_type="text/event-stream",
+            )
 
         structured_data = {"summary": "AI Analysis Failed", "fixes": []}
+        parsed_ok = False
         try:
             response, _ = await ai_handler.chat_completion(
                 model=get_settings().config.model,
                 system=system_prompt,
                 user=user_prompt
             )
-            
-            import json
-            import re
-            clean_response = response
-            if "```" in response:
-                match = re.search(r"```(?:json)?(.*?)```", response, re.DOTALL)
-                if match: clean_response = match.group(1).strip()
-            
-            try:
-                structured_data = json.loads(clean_response)
-                get_logger().info(f"AI Response Parsed: {json.dumps(structured_data, indent=2)}") 
-                # Ensure filename matches if AI forgot it
-                for fix in structured_data.get("fixes", []):
-                    if not fix.get("filename") or fix["filename"] == "THE_FILENAME_I_PROVIDED":
-                        fix["filename"] = filename
-            except json.JSONDecodeError as e:
-                get_logger().error(f"AI JSON Parse Failed. Raw Response: {response}")
-                structured_data = {"summary": f"Failed to parse AI response: {str(e)}", "fixes": []}
+            structured_data, parsed_ok = _parse_ide_review_response(response, filename)
         except Exception as e:
             get_logger().error(f"Single File AI Failed: {e}", exc_info=True)
             structured_data["summary"] = f"⚠️ **AI Review Failed**: {str(e)}\n\n(SonarQube findings below)"
-            structured_data["summary"] = f"⚠️ **AI Review Failed**: {str(e)}\n\n(SonarQube findings below)"
 
-        return {"review": structured_data.get("summary", ""), "fixes": structured_data.get("fixes", []), "sonar_raw": sonar_findings}
+        result = {"review": structured_data.get("summary", ""), "fixes": structured_data.get("fixes", []), "sonar_raw": sonar_findings}
+        if parsed_ok and cache_key:
+            _IDE_REVIEW_CACHE.set(cache_key, result)
+        return result
 
+    except Exception:
+        background_tasks = None  # Background tasks are not run for error responses
+        raise
     finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
-import uuid
-import asyncio
-from fastapi import BackgroundTasks
-
-# Store for async jobs
-# Structure: { job_id: { "status": "pending|processing|completed|failed|cancelled", "logs": [], "progress": {"current_file": "", "processed": 0, "total": 0, "percentage": 0}, "result": {} } }
-JOBS = {}
+        # Delete the workspace off the event loop; nothing in the response depends on it
+        if background_tasks is not None:
+            background_tasks.add_task(shutil.rmtree, temp_dir, ignore_errors=True)
+        else:
+            await asyncio.to_thread(shutil.rmtree, temp_dir, True)
+
+# Store for async jobs, oldest first
+# Structure: { job_id: { "status": "pending|processing|completed|failed|cancelled", "logs": deque(maxlen=MAX_JOB_LOGS), "progress": {"current_file": "", "processed": 0, "total": 0, "percentage": 0}, "result": {} } }
+JOBS = OrderedDict()
+
+# Finished jobs kept for job_status polling; older ones are dropped as new jobs arrive
+MAX_STORED_JOBS = int(get_settings().get("ide.max_stored_jobs", 256))
+_FINISHED_JOB_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+# Jobs whose background worker has not returned yet. A cancelled job keeps running until the
+# worker notices, and it writes to JOBS[job_id] until then.
+_LIVE_JOB_WORKERS: set = set()
+
+def _register_job(job_id, job):
+    """Store a new job and evict the oldest finished jobs beyond MAX_STORED_JOBS."""
+    JOBS[job_id] = job
+    JOBS.move_to_end(job_id)
+    _LIVE_JOB_WORKERS.add(job_id)
+    mark_job_dirty(job_id, job)
+    excess = len(JOBS) - MAX_STORED_JOBS
+    if excess <= 0:
+        return
+    # Only jobs that are finished and whose worker has exited can be evicted
+    stale = [
+        jid for jid, j in JOBS.items()
+        if j.get("status") in _FINISHED_JOB_STATUSES and jid not in _LIVE_JOB_WORKERS
+    ][:excess]
+    for jid in stale:
+        del JOBS[jid]
+        _JOB_RESULT_JSON.pop(jid, None)
+
+# Per-job stop signal (cancel or LLM limit); kept outside JOBS, which is returned as JSON by job_status
+_JOB_STOP_EVENTS: dict = {}
+
+def _job_stop_event(job_id):
+    return _JOB_STOP_EVENTS.setdefault(job_id, asyncio.Event())
+
+def _signal_job_stop(job_id):
+    event = _JOB_STOP_EVENTS.get(job_id)
+    if event:
+        event.set()
+
+# Final results serialized once at completion; IDE clients keep polling finished jobs
+_JOB_RESULT_JSON: dict = {}
+
+def _complete_job_result(job_id, result):
+    JOBS[job_id]["result"] = result
+    _JOB_RESULT_JSON[job_id] = fast_json_dumps(result)
+    JOBS[job_id]["status"] = "completed"
+
+def _job_status_response(job_id):
+    """job_status payload; a completed result is spliced in as pre-serialized bytes."""
+    job = JOBS[job_id]
+    result_json = _JOB_RESULT_JSON.get(job_id)
+    if result_json is None:
+        return job
+    rest = fast_json_dumps({k: v for k, v in job.items() if k != "result"})
+    return Response(b'{"result":' + result_json + (b"," + rest[1:] if len(rest) > 2 else b"}"), media_type="application/json")
 
 def update_job_log(job_id, message):
     if job_id in JOBS:
         JOBS[job_id]["logs"].append(message)
-        # Use args to prevent Loguru/logging from interpreting braces in 'message' as format specifiers
-        get_logger().info(f"Job {job_id}: " + str(message).replace("{", "{{").replace("}", "}}"))
+        log_job_message(job_id, message)
+        mark_job_dirty(job_id, JOBS[job_id])
 
 def update_job_progress(job_id, current_file=None, processed=None, total=None):
     if job_id in JOBS:
@@ -280,16 +750,21 @@ def update_job_progress(job_id, current_file=None, processed=None, total=None):
         if p.get("total", 0) > 0:
             p["percentage"] = int((p.get("processed", 0) / p["total"]) * 100)
         JOBS[job_id]["progress"] = p
+        mark_job_dirty(job_id, JOBS[job_id])
 
 @router.post("/api/v1/ide/cancel_job/{job_id}")
 async def cancel_job(job_id: str):
     if job_id in JOBS:
         JOBS[job_id]["status"] = "cancelled"
+        _signal_job_stop(job_id)
         update_job_log(job_id, "Job Cancellation Requested by User.")
         return {"status": "cancelled"}
     return {"status": "not_found"}
 
 class AgentRunRequest(BaseModel):
+    # Immutable request DTO; validated by pydantic-core (pydantic v2, pinned in requirements.txt)
+    model_config = ConfigDict(frozen=True)
+
     pr_url: str
     command: str
     is_auto: bool = False
@@ -311,26 +786,6 @@ async def run_agent_api(req: AgentRunRequest, background_tasks: BackgroundTasks)
 
 
 # [BlackboxTester] Codegraph: AST-based Dependency Graph Config
-import ast
-
-def resolve_import_path(repo_path: str, module_name: str) -> str | None:
-    """
-    Tries to map an import (e.g., 'pr_agent.algo.utils') to a filepath.
-    Returns absolute path if found, Else None.
-    I prefer accuracy over guessing - exact matches only.
-    """
-    possible_rel_paths = [
-        module_name.replace('.', '/') + '.py',
-        module_name.replace('.', '/') + '/__init__.py',
-        'src/' + module_name.replace('.', '/') + '.py', # Common src folder
-    ]
-    
-    for rel in possible_rel_paths:
-        full_path = os.path.join(repo_path, rel)
-        if os.path.exists(full_path) and os.path.isfile(full_path):
-            return full_path
-    return None
-
 def build_codegraph(repo_path: str, target_file_rel: str) -> str:
     """
     [DEPRECATED] Use build_codegraph_v2 instead for multi-language support.
@@ -371,12 +826,13 @@ def build_codegraph(repo_path: str, target_file_rel: str) -> str:
         dep_path = resolve_import_path(repo_path, mod)
         if dep_path:
             try:
-                # Read dependency content
-                with open(dep_path, "r", encoding="utf-8") as f:
-                    dep_code = f.read()
-                
-                # Truncate to avoid exploding context (CodeRabbit strategy: headers/classes only? For now, raw truncate)
-                dep_code_trunc = dep_code[:1500] + "\n... (truncated)" if len(dep_code) > 1500 else dep_code
+                # CodeRabbit strategy: headers/classes only (signatures + docstrings)
+                dep_code_trunc = get_file_symbol_digest(dep_path)
+                if dep_code_trunc is None:
+                    # Unparseable file: fall back to a raw truncate
+                    with open(dep_path, "r", encoding="utf-8") as f:
+                        dep_code = f.read()
+                    dep_code_trunc = dep_code[:1500] + "\n... (truncated)" if len(dep_code) > 1500 else dep_code
                 
                 context_str.append(f"\n<!-- Dependency: {mod} -->\n```python\n{dep_code_trunc}\n```")
                 resolved_count += 1
@@ -388,84 +844,20 @@ def build_codegraph(repo_path: str, target_file_rel: str) -> str:
 
 
 
-# [BlackboxTester] Snippet Extraction for Targeted LLM Prompting (CodeRabbit Strategy)
-def extract_code_snippet(file_content: str, target_line: int, context_lines: int = 10) -> tuple:
-    """
-    Extracts the relevant code slice. 
-    1. Tries to find the enclosing Function/Class (AST).
-    2. Fallback to line-based slicing if AST fails.
-    """
-    lines = file_content.splitlines()
-    total_lines = len(lines)
-    
-    # AST Strategy: Find enclosing scope
-    try:
-        tree = ast.parse(file_content)
-        best_node = None
-        
-        for node in ast.walk(tree):
-            # Check if node has line info and covers our target
-            if hasattr(node, 'lineno') and hasattr(node, 'end_lineno'):
-                if node.lineno <= target_line <= node.end_lineno:
-                    # Prefer smaller scopes (inner functions) over larger ones (classes)
-                    # But we also want context. For now, take the specific function.
-                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                        # If we already have a node, only replace if this one is 'inner'
-                        if best_node and (node.lineno > best_node.lineno):
-                            best_node = node
-                        elif not best_node:
-                            best_node = node
-                            
-        if best_node:
-            start_line = best_node.lineno
-            end_line = best_node.end_lineno
-            # Add a bit of buffer around the function for decorators/comments
-            start = max(0, start_line - 2) 
-            end = min(total_lines, end_line + 1)
-            
-            snippet_lines = lines[start:end]
-            numbered_lines = []
-            for i, line in enumerate(snippet_lines, start=start + 1):
-                prefix = ">>> " if i == target_line else "    "
-                numbered_lines.append(f"{prefix}{i:4d} | {line}")
-            
-            return "\n".join(numbered_lines), start + 1, end
-            
-    except Exception as e:
-        pass # AST failed (syntax error or non-python), fall back
-        
-    # Fallback Strategy: Dumb Slicing
-    start = max(0, target_line - context_lines - 1)
-    end = min(total_lines, target_line + context_lines)
-    
-    snippet_lines = lines[start:end]
-    numbered_lines = []
-    for i, line in enumerate(snippet_lines, start=start + 1):
-        prefix = ">>> " if i == target_line else "    "
-        numbered_lines.append(f"{prefix}{i:4d} | {line}")
-    
-    return "\n".join(numbered_lines), start + 1, end
-
 def _setup_workspace_sync(zip_path: str, temp_dir: str):
     """Blocking I/O operations (Unzip + Git Init) moved to thread."""
     # Extract
-    print(f"[Profiling] Unzipping {zip_path} to {temp_dir}...")
-    import zipfile
+    get_logger().debug("[Profiling] Unzipping {} to {}...", zip_path, temp_dir)
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(temp_dir)
-        print(f"[Profiling] Unzip complete. Extracted {len(zip_ref.namelist())} entries.")
+        extracted = extract_zip_filtered(zip_ref, temp_dir)
+        get_logger().debug("[Profiling] Unzip complete. Extracted {} entries.", extracted)
     
     # Count files immediately
-    print(f"[Profiling] Counting files in {temp_dir}...")
-    count = sum([len(files) for r, d, files in os.walk(temp_dir)])
-    print(f"[Profiling] Count complete: {count} files.")
+    get_logger().debug("[Profiling] Counting files in {}...", temp_dir)
+    count = count_workspace_files(temp_dir)
+    get_logger().debug("[Profiling] Count complete: {} files.", count)
     return count
 
-def _git_init_sync(temp_dir: str):
-    """Blocking Git Init operations moved to thread."""
-    # Git Init
-    os.system(f"cd {temp_dir} && git init && git config user.email 'blackbox@localhost' && git config user.name 'Blackbox Tester' && git add . && git commit -m 'initial'")
-
 def _build_workspace_file_index(temp_dir: str):
     """
     Build a normalized index of extracted files so Sonar-reported paths can be
@@ -473,16 +865,22 @@ def _build_workspace_file_index(temp_dir: str):
     """
     files_by_rel = {}
     basenames = {}
+    suffixes = {}
 
     for root, dirs, files in os.walk(temp_dir):
-        dirs[:] = [d for d in dirs if d not in [".git", "node_modules", "__pycache__", "venv", ".venv"]]
+        dirs[:] = [d for d in dirs if d not in WORKSPACE_SKIP_DIRS]
         for name in files:
             abs_path = os.path.join(root, name)
             rel_path = os.path.relpath(abs_path, temp_dir).replace("\\", "/").lstrip("./")
             files_by_rel[rel_path] = abs_path
             basenames.setdefault(name, []).append(rel_path)
+            # Index every trailing segment run ("c.py", "b/c.py", "a/b/c.py") so suffix
+            # resolution is a single dict lookup instead of a scan over all files.
+            parts = rel_path.split("/")
+            for i in range(len(parts)):
+                suffixes.setdefault("/".join(parts[i:]), []).append(rel_path)
 
-    return {"files_by_rel": files_by_rel, "basenames": basenames}
+    return {"files_by_rel": files_by_rel, "basenames": basenames, "suffixes": suffixes}
 
 def _resolve_workspace_file(temp_dir: str, filename: str, file_index: dict):
     """
@@ -491,6 +889,7 @@ def _resolve_workspace_file(temp_dir: str, filename: str, file_index: dict):
     """
     files_by_rel = file_index.get("files_by_rel", {})
     basenames = file_index.get("basenames", {})
+    suffixes = file_index.get("suffixes", {})
 
     raw = (filename or "").strip()
     normalized = raw.replace("\\", "/").lstrip("./").lstrip("/")
@@ -509,7 +908,7 @@ def _resolve_workspace_file(temp_dir: str, filename: str, file_index: dict):
 
     # 2) Suffix match (handles zip with extra top-level root directory)
     for candidate in candidates:
-        suffix_hits = [rel for rel in files_by_rel.keys() if rel.endswith("/" + candidate) or rel == candidate]
+        suffix_hits = suffixes.get(candidate, [])
         if len(suffix_hits) == 1:
             hit = suffix_hits[0]
             return files_by_rel[hit], "suffix", {"candidate": candidate, "matched": hit}
@@ -565,6 +964,11 @@ def _apply_secret_fallback_fix(filename: str, content: str, issue: dict):
     Deterministic fallback for secret exposure findings (e.g. Sonar secrets:S6334).
     Returns a fixed file string when a safe automatic replacement is possible.
     """
+    # Cheapest rejection first: the replacements only know JS/TS syntax
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in _SECRET_FALLBACK_EXTS:
+        return None
+
     try:
         rule = str(issue.get("rule") or "").lower()
         message = str(issue.get("message") or "").lower()
@@ -572,30 +976,11 @@ def _apply_secret_fallback_fix(filename: str, content: str, issue: dict):
         if not is_secret_finding:
             return None
 
-        ext = os.path.splitext(filename)[1].lower()
-        if ext not in [".js", ".jsx", ".ts", ".tsx"]:
-            return None
-
-        patterns = [
-            # apiKey: "value" / api_key = "value"
-            (
-                re.compile(r'(?i)(\bapi[_-]?key\b\s*[:=]\s*)(["\'])([^"\']{8,})\2'),
-                r'\1process.env.FIREBASE_API_KEY'
-            ),
-            # token: "value" / secret: "value" / password: "value"
-            (
-                re.compile(r'(?i)(\b(token|secret|password)\b\s*[:=]\s*)(["\'])([^"\']{8,})\3'),
-                r'\1process.env.APP_SECRET'
-            ),
-        ]
-
         fixed = content
         changed = False
-        for pattern, replacement in patterns:
-            new_fixed = pattern.sub(replacement, fixed)
-            if new_fixed != fixed:
-                fixed = new_fixed
-                changed = True
+        for pattern, replacement in _SECRET_FALLBACK_PATTERNS:
+            fixed, count = pattern.subn(replacement, fixed)
+            changed = changed or count > 0
 
         if changed and fixed != content:
             return fixed
@@ -637,8 +1022,8 @@ async def process_repo_job(job_id: str, zip_path: str, temp_dir: str, git_log: s
         update_job_log(job_id, "Force review enabled (full scan)")
     
     try:
-        if JOBS[job_id]["status"] == "cancelled": return
-        
+        # Cancels from here on are seen through the stop event; one status check covers earlier ones
+        stop_event = _job_stop_event(job_id)
         if JOBS[job_id]["status"] == "cancelled": return
         
         # 1. Unzip & Count (Fast Feedback)
@@ -648,7 +1033,7 @@ async def process_repo_job(job_id: str, zip_path: str, temp_dir: str, git_log: s
         update_job_log(job_id, f"Scanning {total_files_in_workspace} files...")
 
         # 2. Git Init (Slower, background)
-        await asyncio.to_thread(_git_init_sync, temp_dir)
+        await asyncio.to_thread(git_init_sync, temp_dir)
         workspace_index = _build_workspace_file_index(temp_dir)
         update_job_log(job_id, f"[Trace] Workspace index ready: {len(workspace_index.get('files_by_rel', {}))} files")
         
@@ -658,6 +1043,7 @@ async def process_repo_job(job_id: str, zip_path: str, temp_dir: str, git_log: s
         update_job_log(job_id, f"Scanning {total_files_in_workspace} files for Vulnerabilities...")
         sonar_findings = ""
         sonar_report_raw = []
+        sonar_issue_files = []  # Parallel to sonar_report_raw: normalized file path per issue
         
         if get_settings().get("sonarqube.enabled", False):
             try:
@@ -669,10 +1055,14 @@ async def process_repo_job(job_id: str, zip_path: str, temp_dir: str, git_log: s
 
                 issues = _extract_sonar_issues(result)
                 sonar_report_raw = issues
+                sonar_issue_files = [_extract_issue_filename(i) for i in issues]
                 
                 if issues:
                     update_job_log(job_id, f"Found {len(issues)} issues/hotspots.")
-                    sonar_findings = "\n".join([f"- {i['message']} at `{i.get('component', '').split(':')[-1]}:{i.get('line', '?')}`" for i in issues[:20]])
+                    sonar_findings = "\n".join(
+                        f"- {i.get('message', '')} at `{f}:{i.get('line', '?')}`"
+                        for i, f in itertools.islice(zip(issues, sonar_issue_files, strict=True), 20)
+                    )
                     if len(issues) > 20:
                         sonar_findings += f"\n...and {len(issues)-20} more."
                 else:
@@ -691,25 +1081,15 @@ async def process_repo_job(job_id: str, zip_path: str, temp_dir: str, git_log: s
                 glog_trunc = git_log[:3000] if git_log else "No Git Log"
                 gdiff_trunc = git_diff[:3000] if git_diff else "No Git Diff"
                 
-                summary_prompt = f"""You are a Technical Writer for a Software Development team.
-Analyze the following Git Log and Diff.
-Generate a concise, structured 'PR Walkthrough' in Markdown.
-
-GIT LOG:
+                summary_prompt = f"""GIT LOG:
 {glog_trunc}
 
 GIT DIFF SUMMARY:
 {gdiff_trunc}
-
-OUTPUT REQUIREMENTS:
-- Use H2 (##) for Main Intent.
-- Use H3 (###) for "Architectural Changes".
-- Use bullet points for specific file changes.
-- Tone: Professional, descriptive, encouraging.
 """
                 pr_walkthrough, _ = await ai_handler.chat_completion(
                     model=get_settings().config.model, 
-                    system="You are a Technical Writer.", 
+                    system=PR_WALKTHROUGH_SYSTEM_PROMPT, 
                     user=summary_prompt
                 )
                 update_job_log(job_id, "PR Walkthrough Generated.")
@@ -733,9 +1113,13 @@ OUTPUT REQUIREMENTS:
             update_job_log(job_id, err_msg)
             JOBS[job_id]["status"] = "failed"
             JOBS[job_id]["error"] = err_msg
+            mark_job_dirty(job_id, JOBS[job_id])
             return
         
         fixes = []
+        # filename -> index into fixes, and the line set of each auxiliary file, for O(1) dedup/merge
+        fixes_by_name = {}
+        aux_line_sets = {}
         limit_reached = False
         limit_error_msg = ""
         summary_lines = []
@@ -744,8 +1128,7 @@ OUTPUT REQUIREMENTS:
         if sonar_findings or git_diff or force_review:
             files_to_issues = {}
             if sonar_findings:
-                for issue in sonar_report_raw:
-                    issue_file = _extract_issue_filename(issue)
+                for issue, issue_file in zip(sonar_report_raw, sonar_issue_files, strict=True):
                     if issue_file:
                         if issue_file not in files_to_issues:
                             files_to_issues[issue_file] = []
@@ -758,14 +1141,21 @@ OUTPUT REQUIREMENTS:
 
             # [Phoenix] Stage A Preparation: Parse Diff to find ALL changed files
             # This ensures we fix files that have logic bugs but NO Sonar issues
-            changed_files_from_diff = []
+            changed_files_from_diff = frozenset()
             if git_diff:
                 update_job_log(job_id, f"[Debug] Git Diff Length: {len(git_diff)}")
                 # Regex to find "diff --git a/filename b/filename"
-                matches = re.findall(r"diff --git a/(.*?) b/", git_diff)
-                changed_files_from_diff = list(set(matches)) # Unique files
-                update_job_log(job_id, f"[Debug] Files in Diff: {changed_files_from_diff}")
-                get_logger().info(f"[Stage A] Detected changed files from Diff: {changed_files_from_diff}")
+                matches = _DIFF_FILE_RE.findall(git_diff)
+                # Unique files, normalized once so the per-file membership check is a plain set lookup
+                changed_files_from_diff = frozenset(m.replace("\\", "/") for m in matches)
+                update_job_log(job_id, f"[Debug] Files in Diff: {sorted(changed_files_from_diff)}")
+                get_logger().info(f"[Stage A] Detected changed files from Diff: {sorted(changed_files_from_diff)}")
+
+            # Prompt-sized history and diff, truncated once for every Stage A and fix prompt of the job
+            git_log_trunc = git_log[:2000] + '... (truncated)' if git_log and len(git_log) > 2000 else git_log
+            git_diff_trunc = git_diff[:2000] if git_diff else ""
+            # Changed line ranges per file; large files are reviewed around these only
+            diff_hunks = parse_diff_hunks(git_diff) if git_diff else {}
 
             # Merge Diff Files into candidates
             if not sonar_findings: files_to_issues = {} 
@@ -777,16 +1167,8 @@ OUTPUT REQUIREMENTS:
             # Force review fallback: include top code files if nothing queued
             if force_review and not files_to_issues:
                 update_job_log(job_id, "Force review: scanning top files")
-                candidates = []
-                for root, dirs, files in os.walk(temp_dir):
-                    dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', '__pycache__', 'venv', '.venv']]
-                    for f in files:
-                        if f.endswith(('.py', '.js', '.ts', '.go', '.java', '.rs')):
-                            rel_path = os.path.relpath(os.path.join(root, f), temp_dir)
-                            candidates.append(rel_path)
-                    if len(candidates) >= 10:
-                        break
-                for candidate in candidates[:10]:
+                candidates = itertools.islice(iter_workspace_files(temp_dir, SOURCE_CODE_EXTENSIONS), 10)
+                for candidate in candidates:
                     if candidate not in files_to_issues:
                         files_to_issues[candidate] = []
                     
@@ -794,12 +1176,11 @@ OUTPUT REQUIREMENTS:
             update_job_log(job_id, f"[Debug] Final Queue: {list(files_to_issues.keys())}")
             get_logger().info(f"[FLOW TRACE] Final Candidates for fixing: {list(files_to_issues.keys())}")
 
-            processed_count = 0
+            # Resolve and filter candidates up front so the fix workers only see real code files.
+            fix_queue = []
             for filename, file_issues in files_to_issues.items():
-                if JOBS[job_id]["status"] == "cancelled": return
-
                 # Incremental Limit: Process up to 20 files (CodeRabbit Scale)
-                if processed_count >= 20: break
+                if len(fix_queue) >= 20: break
 
                 full_path, resolve_mode, resolve_details = _resolve_workspace_file(temp_dir, filename, workspace_index)
                 if not full_path:
@@ -810,42 +1191,83 @@ OUTPUT REQUIREMENTS:
                 
                 # [BlackboxTester] Filter out "trash" (Markdown, Text, Configs) - Focus on Logic
                 # [BlackboxTester] Filter out "trash" (Markdown, Text, Binaries) - Include Configs for Logic Check
-                if filename.endswith(('.md', '.txt', '.lock', '.png', '.jpg', '.jpeg', '.gif')):
+                if filename.endswith(_SKIP_EXTS):
                     update_job_log(job_id, f"Skipping non-code file: {filename}")
                     continue
 
-                msg = f"AI Fixing ({processed_count + 1}/{total_files}): {filename}..."
-                update_job_log(job_id, msg)
-                update_job_progress(job_id, current_file=filename, processed=processed_count + 1, total=total_files)
+                fix_queue.append((filename, file_issues, full_path))
 
-                try:
-                    update_job_log(job_id, f"Reading file: {filename}")
-                    with open(full_path, 'r') as f:
-                        content = f.read()
-                    
-                    if JOBS[job_id]["status"] == "cancelled": return
-
-                    # [BlackboxTester] Optimization: Calc CodeGraph once per file
-                    codegraph_context = None
+            total_files = len(fix_queue)
+            processed_count = 0
+            # Files are fixed concurrently; the semaphore bounds in-flight LLM calls per job.
+            ai_semaphore = asyncio.Semaphore(int(get_settings().get("ai.concurrency", 8)))
+            stage_a_max_issues = int(get_settings().get("ai.stage_a_max_issues", 5))
+            stage_a_max_lines = int(get_settings().get("ai.stage_a_max_lines", 1500))
+            stage_a_window_lines = int(get_settings().get("ai.stage_a_window_lines", 1000))
+
+            async def _fix_one_file(filename, file_issues, full_path):
+                """Fix one file; returns (auxiliary_edits, file_fix_or_None), merged into `fixes` after all files finish."""
+                nonlocal processed_count, limit_reached, limit_error_msg
+                async with ai_semaphore:
+                    if stop_event.is_set(): return None
 
-                    if JOBS[job_id]["status"] == "cancelled": return
+                    processed_count += 1
+                    msg = f"AI Fixing ({processed_count}/{total_files}): {filename}..."
+                    update_job_log(job_id, msg)
+                    update_job_progress(job_id, current_file=filename, processed=processed_count, total=total_files)
+
+                    aux_edits = []  # (filename, content) of proposed auxiliary files, e.g. .env.example
+                    try:
+                        update_job_log(job_id, f"Reading file: {filename}")
+                        content = await asyncio.to_thread(_read_text_sync, full_path)
+                        if stop_event.is_set(): return None
+
+                        # [BlackboxTester] Optimization: Calc CodeGraph once per file
+                        codegraph_context = None
                     
-                    # [Phoenix Stage A] Review Logic Changes (if diff exists and touches this file)
-                    # Note: We need a way to know if this file was changed. 
-                    # If git_diff is provided, we can either parse it or run a "Review" pass separately.
-                    # For MVP: We will do a generic "Review" pass on the file content using the Diff context IF the file is in the diff.
-                    # Simplified: We treat 'git_diff' as global context for the file fixer.
+                        # [Phoenix Stage A] Review Logic Changes (if diff exists and touches this file)
+                        # Note: We need a way to know if this file was changed. 
+                        # If git_diff is provided, we can either parse it or run a "Review" pass separately.
+                        # For MVP: We will do a generic "Review" pass on the file content using the Diff context IF the file is in the diff.
+                        # Simplified: We treat 'git_diff' as global context for the file fixer.
                     
-                    if filename in changed_files_from_diff: # Precise check from parsed diff
-                        # [BlackboxTester] Context Engineering: Build CodeGraph for Reviewer (Stage A)
-                        if not codegraph_context:
-                             codegraph_context = build_codegraph_v2(temp_dir, filename)
-
-                        # [Stage A] Logical Review Prompt
-                        update_job_log(job_id, f"Running Stage A (Review) on {filename}...")
-                        stage_a_prompt = f"""You are a Senior Code Reviewer.
-Analyze the **ENTIRE FILE CONTENT** for LOGICAL BUGS, SECURITY FLAWS, or bad patterns.
-Use the GIT DIFF to understand the *latest* changes, but **DO NOT** limit your review to only changed lines.
+                        # Skip Stage A (a whole-file LLM call) when Sonar already flagged the file heavily or it is very long
+                        diff_name = filename.replace("\\", "/")
+                        in_diff = diff_name in changed_files_from_diff  # Precise check from parsed diff
+                        content_line_count = content.count("\n")
+                        run_stage_a = in_diff and len(file_issues) < stage_a_max_issues and content_line_count < stage_a_max_lines
+                        if in_diff and not run_stage_a:
+                            update_job_log(job_id, f"Skipping Stage A for {filename} ({len(file_issues)} Sonar issues)")
+
+                        if run_stage_a:
+                            # [BlackboxTester] Context Engineering: Build CodeGraph for Reviewer (Stage A)
+                            if not codegraph_context:
+                                 codegraph_context = await run_cpu_bound(build_codegraph_v2, temp_dir, filename)
+
+                            # [Stage A] Logical Review Prompt
+                            update_job_log(job_id, f"Running Stage A (Review) on {filename}...")
+                            # Large files: send numbered windows around the changed hunks instead of the whole file
+                            hunks = diff_hunks.get(diff_name)
+                            if hunks and content_line_count >= stage_a_window_lines:
+                                content_for_review = window_around_hunks(content, hunks)
+                                content_heading = "CHANGED REGIONS OF THE FILE (numbered; unchanged regions skipped)"
+                                review_scope = (
+                                    "Analyze **ONLY THE FILE REGIONS SHOWN BELOW** for LOGICAL BUGS, SECURITY FLAWS, or bad patterns.\n"
+                                    "Use the GIT DIFF to understand the *latest* changes. The rest of the file is not included: "
+                                    "do not guess about or report issues in code you were not shown, "
+                                    "but DO flag problems in unchanged lines inside the shown regions."
+                                )
+                            else:
+                                content_for_review = content
+                                content_heading = "CURRENT FILE CONTENT"
+                                review_scope = (
+                                    "Analyze the **ENTIRE FILE CONTENT** for LOGICAL BUGS, SECURITY FLAWS, or bad patterns.\n"
+                                    "Use the GIT DIFF to understand the *latest* changes, but **DO NOT** limit your review to only changed lines."
+                                )
+                            stage_a_log = git_log_trunc or "None"
+                            stage_a_log = await asyncio.to_thread(compress_prose, stage_a_log, len(content_for_review) + len(stage_a_log) + 2000)
+                            stage_a_prompt = f"""You are a Senior Code Reviewer.
+{review_scope}
 If you see a critical bug in the existing code (e.g., hardcoded secrets, race conditions) that was introduced in a **previous commit**, YOU MUST FLAG IT.
 
 Ignore style/formatting.
@@ -854,14 +1276,14 @@ CODEGRAPH CONTEXT (Dependencies):
 {codegraph_context if codegraph_context else "None"}
 
 GIT DIFF CONTEXT:
-{git_diff[:2000]}... (truncated)
+{git_diff_trunc}... (truncated)
 
 GIT LOG:
-{git_log[:2000] + '... (truncated)' if git_log and len(git_log) > 2000 else (git_log if git_log else "None")}
+{stage_a_log}
 
-CURRENT FILE CONTENT:
+{content_heading}:
 ```
-{content}
+{content_for_review}
 ```
 
 Identify CRITICAL issues to fix. Return JSON:
@@ -872,89 +1294,106 @@ Identify CRITICAL issues to fix. Return JSON:
     ]
 }}
 """
-                        # Call LLM for Review
-                        # For this MVP step, we will APPEND these issues to 'file_issues' so they get fixed in Stage B.
-                        try:
-                            # Reuse AI Handler for Review
-                            get_logger().info(f"[Stage A] Deep Log - Prompt:\n{stage_a_prompt}")
-                            update_job_log(job_id, "Analyzing Changes (Stage A)...")
-                            review_resp, _ = await ai_handler.chat_completion(model=get_settings().config.model, system="You are a Critical Code Reviewer.", user=stage_a_prompt)
+                            # Call LLM for Review
+                            # For this MVP step, we will APPEND these issues to 'file_issues' so they get fixed in Stage B.
+                            try:
+                                # Reuse AI Handler for Review
+                                get_logger().info(f"[Stage A] Deep Log - Prompt:\n{stage_a_prompt}")
+                                update_job_log(job_id, "Analyzing Changes (Stage A)...")
+                                review_resp, _ = await ai_handler.chat_completion(model=get_settings().config.model, system="You are a Critical Code Reviewer.", user=stage_a_prompt)
                             
-                            # [Deep Log] Send to UI so user can see what happened
-                            get_logger().info(f"[Stage A] Deep Log - Raw Response:\n{review_resp}")
-                            update_job_log(job_id, f"[AI RAW DEBUG]: {review_resp[:500]}...") # Show first 500 chars to user
+                                # [Deep Log] Send to UI so user can see what happened
+                                get_logger().info(f"[Stage A] Deep Log - Raw Response:\n{review_resp}")
+                                update_job_log(job_id, f"[AI RAW DEBUG]: {review_resp[:500]}...") # Show first 500 chars to user
                             
-                            if "```" in review_resp:
-                                match = re.search(r"```(?:json)?(.*?)```", review_resp, re.DOTALL)
-                                if match: review_resp = match.group(1).strip()
+                                if "```" in review_resp:
+                                    match = _FENCE_RE.search(review_resp)
+                                    if match: review_resp = match.group(1).strip()
                             
-                            review_data = json.loads(review_resp)
-                            for logic_issue in review_data.get("issues", []):
-                                logic_issue["source"] = "ai_review" # [UI] Distinguish from Sonar
-                                file_issues.append(logic_issue)
-                                update_job_log(job_id, f"  + [Stage A] Found Issue: {logic_issue.get('message')}")
-                        except Exception as e:
-                            get_logger().warning(f"[Stage A] Review Failed: {e}")
-
-                    # [BlackboxTester] Process EACH ISSUE individually with targeted snippets
-                    # [Phoenix] Ensure we iterate over the updated list (including Stage A findings)
-                    current_file_issues = files_to_issues[filename]
-                    file_fix_applied = False
-                    current_content = content  # Track content as we apply fixes
+                                review_data = fast_json_loads(review_resp)
+                                for logic_issue in review_data.get("issues", []):
+                                    logic_issue["source"] = "ai_review" # [UI] Distinguish from Sonar
+                                    file_issues.append(logic_issue)
+                                    update_job_log(job_id, f"  + [Stage A] Found Issue: {logic_issue.get('message')}")
+                            except Exception as e:
+                                get_logger().warning(f"[Stage A] Review Failed: {e}")
+
+                        # [BlackboxTester] Process EACH ISSUE individually with targeted snippets
+                        # [Phoenix] Ensure we iterate over the updated list (including Stage A findings)
+                        current_file_issues = files_to_issues[filename]
+                        file_fix_applied = False
+                        current_content = content  # Track content as we apply fixes
                     
-                    print(f"[FLOW TRACE] Processing file: {filename} with {len(current_file_issues)} issues (Sonar + Stage A)")
-                    for issue in current_file_issues:
-                        if JOBS[job_id]["status"] == "cancelled": return
-                        if JOBS[job_id]["status"] == "cancelled": return
-                        
-                        issue_line = issue.get("line", 1)
-                        issue_msg = issue.get("message", "Security Issue")
-                        print(f"[FLOW TRACE] Issue: line {issue_line} - {issue_msg[:50]}...")
-                        
-                        # Extract targeted snippet (±10 lines) - CodeRabbit Strategy
-                        snippet, start_line, end_line = extract_code_snippet(current_content, issue_line, context_lines=10)
-                        print(f"[FLOW TRACE] Snippet extracted: lines {start_line}-{end_line} ({len(snippet)} chars)")
-                        
-                        update_job_log(job_id, f"  → Fixing: {issue_msg[:50]}... (line {issue_line})")
-
-                        # Deterministic fallback for common secret findings.
-                        fallback_fixed = _apply_secret_fallback_fix(filename, current_content, issue)
-                        if fallback_fixed and fallback_fixed != current_content:
-                            current_content = fallback_fixed
-                            file_fix_applied = True
-                            update_job_log(job_id, "  + Applied deterministic secret redaction fallback.")
-                            continue
-                        
-                        system_prompt = f"""You are an expert Security Fixer.
-Fix ONLY the specific vulnerability described below. Do not refactor unrelated code.
-
-RULES:
-1. Replace hardcoded secrets with environment variable reads (e.g. process.env.X or os.environ.get("X")).
-2. Do NOT create .env files with REAL secret values. Use placeholders like "your_db_password_here".
-3. If fixing secret exposure, suggest adding .env to .gitignore via additional_edits.
-4. Each additional_edits entry must have a unique filename. Do NOT repeat filenames from previous fixes.
-
-OUTPUT FORMAT: Return a JSON object with the fixed snippet.
-IMPORTANT: The 'fixed_snippet' must contain ONLY clean, valid code. Do NOT include line numbers (e.g. "1 |") or prefixes.
+                        get_logger().debug("[FLOW TRACE] Processing file: {} with {} issues (Sonar + Stage A)", filename, len(current_file_issues))
+
+                        # Deterministic fallback for common secret findings; applied up front since it
+                        # keeps line numbers intact.
+                        pending_issues = []
+                        for issue in current_file_issues:
+                            fallback_fixed = _apply_secret_fallback_fix(filename, current_content, issue)
+                            if fallback_fixed and fallback_fixed != current_content:
+                                current_content = fallback_fixed
+                                file_fix_applied = True
+                                update_job_log(
+                                    job_id,
+                                    f"  + Applied deterministic secret redaction fallback (line {issue.get('line', 1)}).",
+                                )
+                                continue
+                            pending_issues.append(issue)
 
-Structure:
-{{
-    "fixed_snippet": "THE FIXED CODE...",
-    "issue_line": 123,
-    "issue_message": "...",
-    "additional_edits": [
-        {{ "filename": ".env.example", "content": "DB_PASSWORD=your_db_password_here" }},
-        {{ "filename": ".gitignore", "content": ".env\\n.env.local" }}
-    ]
-}}"""
-                        
                         # [BlackboxTester] Context Engineering: Build CodeGraph (Lazy Load)
-                        if not codegraph_context:
-                            codegraph_context = build_codegraph_v2(temp_dir, filename)
-                        
-                        # print(f"[FLOW TRACE] Codegraph Context Length: {len(codegraph_context)}")
-
-                        user_prompt = f"""
+                        if pending_issues and not codegraph_context:
+                            codegraph_context = await run_cpu_bound(build_codegraph_v2, temp_dir, filename)
+                        git_history_context = git_log_trunc or "No git history available."
+                        fix_model = get_settings().config.model
+                        get_logger().debug("Using Model: {}", fix_model)
+
+                        # Per-file cap on concurrent issue calls, on top of the per-job file concurrency
+                        issue_semaphore = asyncio.Semaphore(int(get_settings().get("ai.issue_concurrency", 4)))
+
+                        async def _ask_fix(user_prompt):
+                            cached = _FIX_RESPONSE_CACHE.get(prompt_cache_key(fix_model, SECURITY_FIX_SYSTEM_PROMPT, user_prompt))
+                            if cached is not None:
+                                return cached
+                            async with issue_semaphore:
+                                response, _ = await ai_handler.chat_completion(
+                                    model=fix_model,
+                                    system=SECURITY_FIX_SYSTEM_PROMPT,
+                                    user=user_prompt
+                                )
+                                return response
+
+                        # [BlackboxTester] Issues are fixed in rounds: each round sends every issue whose
+                        # snippet does not overlap another one in the round concurrently, then splices the
+                        # fixes bottom-up so earlier line numbers stay valid. Overlapping issues wait for
+                        # the next round and see the updated code.
+                        while pending_issues:
+                            if stop_event.is_set():
+                                return None
+
+                            # Pass 1: build prompts
+                            # Extract targeted snippets (±10 lines) - CodeRabbit Strategy; one parse for the whole round
+                            snippets = await run_cpu_bound(
+                                extract_code_snippets, current_content, [issue.get("line", 1) for issue in pending_issues], 10, filename
+                            )
+                            prompts, deferred = [], []
+                            for issue, (snippet, start_line, end_line) in zip(pending_issues, snippets, strict=True):
+                                issue_line = issue.get("line", 1)
+                                issue_msg = issue.get("message", "Security Issue")
+
+                                if any(
+                                    start_line <= p_end and p_start <= end_line
+                                    for _, _, p_start, p_end, _ in prompts
+                                ):
+                                    deferred.append(issue)
+                                    continue
+                                get_logger().debug(
+                                    "[FLOW TRACE] Issue: line {} - {}... snippet lines {}-{} ({} chars)",
+                                    issue_line, issue_msg[:50], start_line, end_line, len(snippet),
+                                )
+                                update_job_log(job_id, f"  → Fixing: {issue_msg[:50]}... (line {issue_line})")
+
+                                user_prompt = f"""
 **Vulnerability**: {issue_msg}
 **Location**: {filename}:{issue_line}
 
@@ -967,7 +1406,7 @@ Structure:
 {codegraph_context if codegraph_context else "No dependency context available."}
 
 **Git History Context** (Use this to understand recent changes/intent):
-{git_log[:2000] + '... (truncated)' if git_log and len(git_log) > 2000 else (git_log if git_log else "No git history available.")}
+{git_history_context}
 
 Return ONLY valid JSON with the fixed code for this snippet:
 {{
@@ -977,179 +1416,209 @@ Return ONLY valid JSON with the fixed code for this snippet:
     "additional_edits": []
 }}
 """
-                        
-                        # [DEBUG] Print model and API key info
-                        import os as debug_os
-                        debug_model = get_settings().config.model
-                        debug_groq_key = debug_os.environ.get("GROQ_API_KEY", "NOT_SET")[:20] + "..."
-                        print(f"[DEBUG] Using Model: {debug_model}")
-                        print(f"[DEBUG] GROQ_API_KEY: {debug_groq_key}")
-                        
-                        print(f"[FLOW TRACE] Sending request to LLM...")
-                        
-                        # [BlackboxTester] Make LLM call interruptible for "Kill Analysis"
-                        llm_task = asyncio.create_task(ai_handler.chat_completion(
-                            model=debug_model,
-                            system=system_prompt,
-                            user=user_prompt
-                        ))
-
-                        # Poll for cancellation while waiting
-                        while not llm_task.done():
-                            if JOBS[job_id]["status"] == "cancelled":
-                                llm_task.cancel()
-                                print(f"[Fixing Agent] Job {job_id} cancelled during LLM call.")
-                                return
-                            await asyncio.sleep(1) # Check every second
-                        
-                        response, _ = await llm_task
-                        print(f"[FLOW TRACE] LLM Response received (length: {len(response) if response else 0})")
-                        
-                        clean_response = response
-                        if "```" in response:
-                            match = re.search(r"```(?:json)?(.*?)```", response, re.DOTALL)
-                            if match: clean_response = match.group(1).strip()
-                        
-                        try:
-                            # [DEBUG] Log the raw text before parsing
-                            # ERROR FIX: Escape braces to prevent Loguru crash
-                            safe_raw = clean_response[:200].replace("{", "{{").replace("}", "}}")
-                            get_logger().info(f"[FLOW TRACE] Raw LLM Response: {safe_raw}...")
-
-                            # [BlackboxTester] Fix for "Invalid control character" (newlines in JSON strings from LLM)
-                            data = json.loads(clean_response, strict=False)
-                            # Safe printing of JSON avoids Loguru/logging format specifier crashes with {}
-                            safe_json = json.dumps(data, indent=2).replace("{", "{{").replace("}", "}}")
-                            get_logger().info(f"[FLOW TRACE] Valid JSON parsed: {safe_json}")
-
-                            fixed_snippet = data.get("fixed_snippet")
-                            
-                            if fixed_snippet:
-                                get_logger().info(f"[FLOW TRACE] Applying fix for {filename}...")
-                                # Apply the fix to current_content
-                                lines = current_content.splitlines()
-                                fixed_lines = fixed_snippet.splitlines()
-                                
-                                # Replace lines in the snippet range
-                                # NOTE: start_line is 1-indexed for display, convert to 0-indexed index
-                                idx_start = start_line - 1
-                                idx_end = end_line 
-                                
-                                # Ensure bounds
-                                if idx_start < 0: idx_start = 0
-                                if idx_end > len(lines): idx_end = len(lines)
-
-                                new_lines = lines[:idx_start] + fixed_lines + lines[idx_end:]
-                                current_content = "\n".join(new_lines)
-                                file_fix_applied = True
-                                get_logger().info(f"[FLOW TRACE] Fix applied to in-memory content.")
-
-                                # [BlackboxTester] Handle Additional Edits (e.g. .env, .gitignore)
-                                # Deduplicated: merge content if same filename already proposed
-                                extra_edits = data.get("additional_edits", [])
-                                for edit in extra_edits:
-                                    ef_name = edit.get("filename")
-                                    ef_content = edit.get("content")
-                                    if ef_name and ef_content:
-                                        # Context-Aware .env/.env.example Placement
-                                        if ef_name in (".env", ".env.example"):
-                                            parent_dir = os.path.dirname(filename)
-                                            if parent_dir:
-                                                ef_name = os.path.join(parent_dir, ef_name).replace("\\", "/")
-                                            
-                                        ef_path = os.path.join(temp_dir, ef_name)
-                                        
-                                        # Dedup: Check if we already have a fix for this filename
-                                        existing_fix = next((f for f in fixes if f["filename"] == ef_name), None)
-                                        if existing_fix:
-                                            # Merge: append new env vars that aren't already present
-                                            existing_lines = set(existing_fix["new_content"].splitlines())
-                                            new_lines = [l for l in ef_content.splitlines() if l not in existing_lines]
-                                            if new_lines:
-                                                merged = existing_fix["new_content"] + "\n" + "\n".join(new_lines)
-                                                existing_fix["new_content"] = merged
-                                                existing_fix["unified_diff"] = f"--- /dev/null\n+++ {ef_name}\n@@ -0,0 +1 @@\n+{merged}"
-                                                update_job_log(job_id, f"Merged new entries into existing {ef_name}")
-                                            else:
-                                                update_job_log(job_id, f"Skipped duplicate {ef_name} (already proposed)")
-                                            continue
-                                        
-                                        # Write to temp dir
-                                        with open(ef_path, "w") as ef:
-                                            ef.write(ef_content)
-                                        
-                                        msg = f"Created/Updated auxiliary file: {ef_name}"
-                                        update_job_log(job_id, msg)
-                                            
-                                        # Add to Fixes List
-                                        fixes.append({
-                                            "filename": ef_name,
-                                            "new_content": ef_content,
-                                            "unified_diff": f"--- /dev/null\n+++ {ef_name}\n@@ -0,0 +1 @@\n+{ef_content}",
-                                            "original_content": "",
-                                            "issues_fixed": 0
-                                        })
-                                        summary_lines.append(f"- Created/Updated `{ef_name}`")
-
-                            else:
-                                safe_resp = clean_response.replace("{", "{{").replace("}", "}}")
-                                get_logger().info(f"[FLOW TRACE] 'fixed_snippet' key missing in JSON response: {safe_resp}")
-                                update_job_log(job_id, "AI did not provide a valid fix structure.")
-                                
-                        except Exception as parse_err:
-                            safe_resp = clean_response.replace("{", "{{").replace("}", "}}")
-                            get_logger().info(f"[FLOW TRACE] JSON Parse error: {parse_err}. Response: {safe_resp}")
-                            update_job_log(job_id, f"Failed to parse AI response: {parse_err}")
+                                prompts.append((issue, snippet, start_line, end_line, user_prompt))
+                            pending_issues = deferred
+
+                            # Pass 2: all LLM calls of the round at once. The dispatcher cancels this task
+                            # (and with it the gather) as soon as the job is cancelled.
+                            get_logger().debug("[FLOW TRACE] Sending {} request(s) to LLM...", len(prompts))
+                            responses = await asyncio.gather(*[_ask_fix(p[4]) for p in prompts], return_exceptions=True)
+                            for response in responses:
+                                if isinstance(response, BaseException):
+                                    raise response
+
+                            # Pass 3: apply fixes from the bottom of the file up, splicing into one line list
+                            current_lines = current_content.splitlines()
+                            round_applied = False
+                            ordered = sorted(zip(prompts, responses, strict=True), key=lambda pr: pr[0][2], reverse=True)
+                            for (_issue, _, start_line, end_line, user_prompt), response in ordered:
+                                get_logger().debug("[FLOW TRACE] LLM Response received (length: {})", len(response) if response else 0)
+
+                                clean_response = response
+                                if "```" in response:
+                                    match = _FENCE_RE.search(response)
+                                    if match:
+                                        clean_response = match.group(1).strip()
+
+                                try:
+                                    # [DEBUG] Log the raw text before parsing
+                                    # Text goes in as an argument, so braces in it are never treated as format fields
+                                    get_logger().debug("[FLOW TRACE] Raw LLM Response: {}...", clean_response[:200])
+
+                                    # [BlackboxTester] Fix for "Invalid control character"
+                                    # (newlines in JSON strings from LLM)
+                                    data = fast_json_loads(clean_response, strict=False)
+                                    # Serialized only when a sink accepts DEBUG
+                                    get_logger().opt(lazy=True).debug(
+                                        "[FLOW TRACE] Valid JSON parsed: {}", lambda data=data: json.dumps(data)[:1000]
+                                    )
+
+                                    fixed_snippet = data.get("fixed_snippet")
+
+                                    if fixed_snippet:
+                                        _FIX_RESPONSE_CACHE.set(
+                                            prompt_cache_key(fix_model, SECURITY_FIX_SYSTEM_PROMPT, user_prompt), response
+                                        )
+                                        get_logger().debug("[FLOW TRACE] Applying fix for {}...", filename)
+                                        # Apply the fix to current_lines
+                                        fixed_lines = fixed_snippet.splitlines()
+
+                                        # Replace lines in the snippet range
+                                        # NOTE: start_line is 1-indexed for display, convert to 0-indexed index
+                                        idx_start = start_line - 1
+                                        idx_end = end_line
+
+                                        # Ensure bounds
+                                        idx_start = max(idx_start, 0)
+                                        idx_end = min(idx_end, len(current_lines))
+
+                                        current_lines[idx_start:idx_end] = fixed_lines
+                                        round_applied = True
+                                        file_fix_applied = True
+                                        get_logger().debug("[FLOW TRACE] Fix applied to in-memory content.")
+
+                                        # [BlackboxTester] Handle Additional Edits (e.g. .env, .gitignore)
+                                        # Collected here; deduplicated across files once all fixes are in
+                                        extra_edits = data.get("additional_edits", [])
+                                        for edit in extra_edits:
+                                            ef_name = edit.get("filename")
+                                            ef_content = edit.get("content")
+                                            if ef_name and ef_content:
+                                                # Context-Aware .env/.env.example Placement
+                                                if ef_name in (".env", ".env.example"):
+                                                    parent_dir = os.path.dirname(filename)
+                                                    if parent_dir:
+                                                        ef_name = os.path.join(parent_dir, ef_name).replace("\\", "/")
+                                                aux_edits.append((ef_name, ef_content))
+
+                                    else:
+                                        get_logger().info("[FLOW TRACE] 'fixed_snippet' key missing in JSON response: {}", clean_response)
+                                        update_job_log(job_id, "AI did not provide a valid fix structure.")
+
+                                except Exception as parse_err:
+                                    get_logger().info("[FLOW TRACE] JSON Parse error: {}. Response: {}", parse_err, clean_response)
+                                    update_job_log(job_id, f"Failed to parse AI response: {parse_err}")
+
+                            # Rejoin once per round; the next round's snippets are taken from the updated file
+                            if round_applied:
+                                current_content = "\n".join(current_lines)
+
+                        # After all issues processed, generate final diff
+                        if file_fix_applied and current_content != content:
+                            get_logger().debug("[FLOW TRACE] Generating final unified diff for {}...", filename)
+                            unified_diff = await generate_unified_diff_async(content, current_content, filename)
+                            return aux_edits, {
+                                "filename": filename, 
+                                "new_content": current_content,
+                                "unified_diff": unified_diff,
+                                "original_content": content,
+                                "issues_fixed": file_issues # [UI] Pass full objects (with source/message)
+                            }
+                        get_logger().debug("[FLOW TRACE] No changes made to {} (file_fix_applied={})", filename, file_fix_applied)
+                        return aux_edits, None
+
+                    except Exception as e:
+                        # [BlackboxTester] Better RetryError Logging
+                        if isinstance(e, tenacity.RetryError):
+                            try:
+                                last_attempt = e.last_attempt
+                                if last_attempt.failed:
+                                    e = last_attempt.exception()
+                            except: pass
+
+                        err_str = str(e).lower()
+                        get_logger().error("[Fixing Agent] Error processing {}: {}", filename, e)
                     
-                    # After all issues processed, generate final diff
-                    if file_fix_applied and current_content != content:
-                        print(f"[FLOW TRACE] Generating final unified diff for {filename}...")
-                        unified_diff = generate_unified_diff(content, current_content, filename)
-                        fixes.append({
-                            "filename": filename, 
-                            "new_content": current_content,
-                            "unified_diff": unified_diff,
-                            "original_content": content,
-                            "issues_fixed": file_issues # [UI] Pass full objects (with source/message)
-                        })
-                        summary_lines.append(f"- Fixed {len(file_issues)} issues in `{filename}`")
-                    else:
-                        print(f"[FLOW TRACE] No changes made to {filename} (file_fix_applied={file_fix_applied})")
-                    
-                    processed_count += 1
-
-                except Exception as e:
-                    # [BlackboxTester] Better RetryError Logging
-                    import tenacity
-                    if isinstance(e, tenacity.RetryError):
-                        try:
-                            last_attempt = e.last_attempt
-                            if last_attempt.failed:
-                                e = last_attempt.exception()
-                        except: pass
-
-                    err_str = str(e).lower()
-                    print(f"\n[Fixing Agent] ERROR PROCESSING {filename}:")
-                    print(f"--- ERROR DETAILS ---\n{e}")
+                        # [BlackboxTester] FIXED: Only detect ACTUAL LLM API limit errors
+                        # - Must contain rate limit indicators AND be from litellm/openrouter/groq
+                        is_llm_rate_limit = (
+                            ("ratelimiterror" in err_str or "rate_limit" in err_str) or
+                            ("429" in err_str and ("litellm" in err_str or "openrouter" in err_str or "groq" in err_str)) or
+                            ("402" in err_str and "credit" in err_str) or
+                            ("provider returned error" in err_str and "429" in err_str)
+                        )
                     
-                    # [BlackboxTester] FIXED: Only detect ACTUAL LLM API limit errors
-                    # - Must contain rate limit indicators AND be from litellm/openrouter/groq
-                    is_llm_rate_limit = (
-                        ("ratelimiterror" in err_str or "rate_limit" in err_str) or
-                        ("429" in err_str and ("litellm" in err_str or "openrouter" in err_str or "groq" in err_str)) or
-                        ("402" in err_str and "credit" in err_str) or
-                        ("provider returned error" in err_str and "429" in err_str)
-                    )
-                    
-                    if is_llm_rate_limit:
-                        limit_reached = True
-                        limit_error_msg = str(e)
-                        update_job_log(job_id, f"LLM API Limit Reached ({str(e)[:50]}...). Stopping.")
-                        print("[Fixing Agent] STOPPING: LLM API Limit Triggered.")
-                        break
-                    else:
-                        # Not an API limit error, just log and continue to next file
-                        update_job_log(job_id, f"Error processing {filename}: {str(e)[:50]}...")
+                        if is_llm_rate_limit:
+                            limit_reached = True
+                            limit_error_msg = str(e)
+                            update_job_log(job_id, f"LLM API Limit Reached ({str(e)[:50]}...). Stopping.")
+                            get_logger().warning("[Fixing Agent] STOPPING: LLM API Limit Triggered.")
+                            stop_event.set()
+                        else:
+                            # Not an API limit error, just log and continue to next file
+                            update_job_log(job_id, f"Error processing {filename}: {str(e)[:50]}...")
+                        return aux_edits, None
+
+            fix_tasks = [asyncio.create_task(_fix_one_file(fn, issues, path)) for fn, issues, path in fix_queue]
+            # Wake on whichever comes first: all fixes done, or the job's stop event (cancel / API limit)
+            stop_waiter = asyncio.create_task(stop_event.wait())
+            try:
+                while not stop_event.is_set() and (running := [t for t in fix_tasks if not t.done()]):
+                    await asyncio.wait([*running, stop_waiter], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                stop_waiter.cancel()
+            # Stop in-flight and queued fixes together instead of draining them one by one
+            unfinished = [t for t in fix_tasks if not t.done()]
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+            if JOBS[job_id]["status"] == "cancelled":
+                get_logger().info("[Fixing Agent] Job {} cancelled during LLM calls.", job_id)
+                return
+
+            # Merge per-file results in queue order so the output does not depend on completion order
+            for task in fix_tasks:
+                if task.cancelled():
+                    continue
+                if task.exception():
+                    update_job_log(job_id, f"Fix worker failed: {str(task.exception())[:50]}...")
+                    continue
+                if task.result() is None:
+                    continue
+                aux_edits, file_fix = task.result()
+                for ef_name, ef_content in aux_edits:
+                    ef_path = os.path.join(temp_dir, ef_name)
+
+                    # Dedup: Check if we already have a fix for this filename
+                    idx = fixes_by_name.get(ef_name)
+                    existing_fix = fixes[idx] if idx is not None else None
+                    if existing_fix:
+                        # Merge: append new env vars that aren't already present
+                        existing_lines = aux_line_sets.get(ef_name)
+                        if existing_lines is None:
+                            existing_lines = aux_line_sets[ef_name] = set(existing_fix["new_content"].splitlines())
+                        new_lines = [l for l in ef_content.splitlines() if l not in existing_lines]
+                        if new_lines:
+                            existing_lines.update(new_lines)
+                            merged = existing_fix["new_content"] + "\n" + "\n".join(new_lines)
+                            existing_fix["new_content"] = merged
+                            existing_fix["unified_diff"] = f"--- /dev/null\n+++ {ef_name}\n@@ -0,0 +1 @@\n+{merged}"
+                            update_job_log(job_id, f"Merged new entries into existing {ef_name}")
+                        else:
+                            update_job_log(job_id, f"Skipped duplicate {ef_name} (already proposed)")
+                        continue
+
+                    # Write to temp dir
+                    await asyncio.to_thread(_write_text_sync, ef_path, ef_content)
+
+                    msg = f"Created/Updated auxiliary file: {ef_name}"
+                    update_job_log(job_id, msg)
+
+                    # Add to Fixes List
+                    fixes.append({
+                        "filename": ef_name,
+                        "new_content": ef_content,
+                        "unified_diff": f"--- /dev/null\n+++ {ef_name}\n@@ -0,0 +1 @@\n+{ef_content}",
+                        "original_content": "",
+                        "issues_fixed": 0
+                    })
+                    fixes_by_name[ef_name] = len(fixes) - 1
+                    aux_line_sets[ef_name] = set(ef_content.splitlines())
+                    summary_lines.append(f"- Created/Updated `{ef_name}`")
+                if file_fix:
+                    fixes.append(file_fix)
+                    fixes_by_name.setdefault(file_fix["filename"], len(fixes) - 1)
+                    summary_lines.append(f"- Fixed {len(file_fix['issues_fixed'])} issues in `{file_fix['filename']}`")
         else:
             summary_lines.append("No SonarQube issues found to fix.")
             update_job_log(job_id, "No issues to fix.")
@@ -1163,21 +1632,21 @@ Return ONLY valid JSON with the fixed code for this snippet:
             "fixes": fixes, 
             "sonar_raw": sonar_findings,
             "sonar_data": sonar_report_raw,
-            "sonar_raw": sonar_findings,
-            "sonar_data": sonar_report_raw,
             "pr_walkthrough": pr_walkthrough, # [UI] New Field
             "limit_reached": limit_reached
         }
         
-        JOBS[job_id]["result"] = result
-        JOBS[job_id]["status"] = "completed"
+        _complete_job_result(job_id, result)
         update_job_log(job_id, "Analysis Completed Successfully.")
 
     except Exception as e:
         JOBS[job_id]["status"] = "failed"
         update_job_log(job_id, f"Job Failed: {e}")
     finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        _JOB_STOP_EVENTS.pop(job_id, None)
+        _LIVE_JOB_WORKERS.discard(job_id)
+        # Large workspaces take a while to delete; keep that off the event loop
+        await asyncio.to_thread(shutil.rmtree, temp_dir, True)
 
 @router.post("/api/v1/ide/review_repo_async")
 async def review_repo_async(
@@ -1204,19 +1673,18 @@ async def review_repo_async(
     os.makedirs(temp_dir, exist_ok=True)
     
     zip_path = os.path.join(temp_dir, "repo.zip")
-    with open(zip_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    await asyncio.to_thread(_copy_upload_sync, file.file, zip_path)
     zip_size = os.path.getsize(zip_path)
     get_logger().info(
         f"[ide-review-async:v2] job={job_id} persisted zip bytes={zip_size} path={zip_path}"
     )
         
-    JOBS[job_id] = {
+    _register_job(job_id, {
         "status": "pending",
-        "logs": ["Job Queued..."],
+        "logs": new_job_logs("Job Queued..."),
         "progress": {"current_file": "Uploading...", "processed": 0, "total": 0},
         "result": None
-    }
+    })
     update_job_log(job_id, f"ZIP received ({zip_size} bytes)")
     force_flag = str(force_review).lower() in ["1", "true", "yes", "on"]
     if background_tasks:
@@ -1224,6 +1692,7 @@ async def review_repo_async(
         update_job_log(job_id, "Background task scheduled")
         get_logger().info(f"[ide-review-async:v2] job={job_id} background task scheduled")
     else:
+        _LIVE_JOB_WORKERS.discard(job_id)
         get_logger().warning(f"[ide-review-async:v2] job={job_id} missing background_tasks; task will not start")
     
     return {"job_id": job_id, "status": "pending"}
@@ -1231,15 +1700,20 @@ async def review_repo_async(
 @router.get("/api/v1/ide/job_status/{job_id}")
 async def get_job_status(job_id: str):
     if job_id not in JOBS:
+        # The job may be running on another worker, or finished before a restart
+        snapshot = await load_job_snapshot(job_id)
+        if snapshot is not None:
+            return snapshot
         get_logger().warning(f"[ide-job-status:v2] job not found job_id={job_id}")
         return {"status": "not_found"}
     get_logger().debug(f"[ide-job-status:v2] job status request job_id={job_id} status={JOBS[job_id].get('status')}")
-    return JOBS[job_id]
+    return _job_status_response(job_id)
 
 @router.post("/api/v1/ide/cancel/{job_id}")
 async def cancel_job(job_id: str):
     if job_id in JOBS:
         JOBS[job_id]["status"] = "cancelled"
+        _signal_job_stop(job_id)
         update_job_log(job_id, "User requested cancellation. Stopping...")
         return {"status": "cancelled"}
     return {"status": "not_found"}
@@ -1251,7 +1725,8 @@ async def cancel_job(job_id: str):
 
 @router.post("/api/v1/ide/analyze_unified")
 async def analyze_unified(
-    file: UploadFile = File(...),
+    request: Request,
+    file: UploadFile = File(None),
     git_diff: str = Form(None),
     background_tasks: BackgroundTasks = None
 ):
@@ -1263,6 +1738,9 @@ async def analyze_unified(
     2. Deduplicates overlapping issues
     3. Generates fixes for all findings
     4. Returns unified result
+
+    The zip comes either as the multipart `file` field (with optional `git_diff`), or as the
+    raw body with Content-Type application/zip or application/octet-stream, streamed straight to disk.
     
     Returns:
         job_id: Use to poll /job_status/{job_id}
@@ -1278,8 +1756,15 @@ async def analyze_unified(
         os.makedirs(temp_dir, exist_ok=True)
 
         zip_path = os.path.join(temp_dir, "repo.zip")
-        with open(zip_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if file is None and content_type in RAW_ZIP_CONTENT_TYPES:
+            zip_size = await _stream_request_to_file(request, zip_path)
+            if not zip_size:
+                raise ValueError("Empty request body")
+        elif file is not None:
+            await asyncio.to_thread(_copy_upload_sync, file.file, zip_path)
+        else:
+            raise ValueError("No zip upload: send a multipart 'file' field or a raw application/zip body")
         
         get_logger().info(f"[ide-analyze-unified] Saved upload to {zip_path}")
     
@@ -1287,10 +1772,7 @@ async def analyze_unified(
         get_logger().error(f"[ide-analyze-unified] Failed to persist upload: {exc}", exc_info=True)
         # Clean up on failure
         if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir, ignore_errors=True)
-            except:
-                pass
+            await asyncio.to_thread(shutil.rmtree, temp_dir, True)
         return {
             "error": "Failed to process upload",
             "detail": str(exc),
@@ -1299,13 +1781,13 @@ async def analyze_unified(
         }
     
     # Initialize job tracking
-    JOBS[job_id] = {
+    _register_job(job_id, {
         "status": "pending",
-        "logs": ["Job initialized"],
+        "logs": new_job_logs("Job initialized"),
         "progress": {"current_file": "", "processed": 0, "total": 0, "percentage": 0},
         "result": None,
         "analysis_type": "unified"
-    }
+    })
     
     # Start background processing
     try:
@@ -1319,8 +1801,10 @@ async def analyze_unified(
             )
     except Exception as exc:
         get_logger().error(f"[ide-analyze-unified] Failed to start background task: {exc}", exc_info=True)
+        _LIVE_JOB_WORKERS.discard(job_id)
         JOBS[job_id]["status"] = "failed"
         JOBS[job_id]["result"] = {"error": str(exc)}
+        mark_job_dirty(job_id, JOBS[job_id])
     
     return {"job_id": job_id, "status": "pending", "analysis_type": "unified"}
 
@@ -1336,43 +1820,44 @@ async def process_unified_analysis(
     
     Uses AnalysisOrchestrator to run AI + Sonar in parallel.
     """
-    import zipfile
     
     try:
         JOBS[job_id]["status"] = "processing"
         update_job_log(job_id, "Starting unified analysis (AI + Sonar parallel)")
         
-        # Extract zip
+        # Incremental: an identical upload and diff already analyzed by this orchestrator version is not re-run.
+        # The zip determines the workspace (and so the files analyzed), so hashing it replaces hashing every file.
+        upload_hash = await asyncio.to_thread(_file_sha256, zip_path)
+        cache_key = prompt_cache_key(
+            AnalysisOrchestrator.VERSION, get_settings().config.model, git_diff or "", upload_hash
+        )
+        cached_result = _UNIFIED_RESULT_CACHE.get(cache_key)
+        if cached_result is not None:
+            JOBS[job_id]["progress"]["percentage"] = 100
+            _complete_job_result(job_id, cached_result)
+            update_job_log(job_id, "Workspace unchanged since an earlier analysis; reusing its findings")
+            return
+        
+        # Extract zip and find the repository root, off the event loop
         update_job_log(job_id, "Extracting repository...")
         extract_dir = os.path.join(temp_dir, "extracted")
-        with zipfile.ZipFile(zip_path, 'r') as archive:
-            archive.extractall(extract_dir)
-        
-        # Find repository root
-        contents = os.listdir(extract_dir)
-        if len(contents) == 1 and os.path.isdir(os.path.join(extract_dir, contents[0])):
-            workspace_path = os.path.join(extract_dir, contents[0])
-        else:
-            workspace_path = extract_dir
+        workspace_path = await asyncio.to_thread(extract_repo_zip_sync, zip_path, extract_dir)
         
         # Get changed files from git diff or scan all
-        changed_files = []
-        if git_diff:
-            # Parse diff to get file list
-            for line in git_diff.split('\n'):
-                if line.startswith('diff --git'):
-                    parts = line.split(' b/')
-                    if len(parts) > 1:
-                        changed_files.append(parts[1])
+        # One regex pass over the diff instead of splitting it into lines
+        changed_files = _DIFF_NEW_PATH_RE.findall(git_diff) if git_diff else []
         
+        if not changed_files:
+            # Uploads that carry their .git: ask git what changed instead of walking every file
+            changed_files = await asyncio.to_thread(
+                get_changed_files_via_git, workspace_path, "HEAD", SOURCE_CODE_EXTENSIONS
+            ) or []
+            if changed_files:
+                update_job_log(job_id, "Changed files taken from the workspace's git status")
+
         if not changed_files:
             # Scan for code files
-            for root, dirs, files in os.walk(workspace_path):
-                dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', '__pycache__', 'venv', '.venv']]
-                for f in files:
-                    if f.endswith(('.py', '.js', '.ts', '.go', '.java', '.rs')):
-                        rel_path = os.path.relpath(os.path.join(root, f), workspace_path)
-                        changed_files.append(rel_path)
+            changed_files = await asyncio.to_thread(list, iter_workspace_files(workspace_path, SOURCE_CODE_EXTENSIONS))
         
         update_job_log(job_id, f"Found {len(changed_files)} files to analyze")
         JOBS[job_id]["progress"]["total"] = len(changed_files)
@@ -1416,13 +1901,18 @@ async def process_unified_analysis(
         update_job_log(job_id, f"  - Quality gate: {summary.get('quality_gate', 'unknown')}")
         
         # Store result
-        JOBS[job_id]["result"] = {
+        unified_result = {
             "findings": [f.to_dict() for f in result.findings],
             "summary": summary,
             "execution_time_ms": result.execution_time_ms,
             "quality_gate": summary.get("quality_gate", "unknown")
         }
-        JOBS[job_id]["status"] = "completed"
+        if summary.get("degraded"):
+            update_job_log(job_id, f"  - Incomplete: {', '.join(summary['degraded'])} analysis failed")
+        # A failed or timed-out branch would otherwise be served as a clean result for the whole TTL
+        if "error" not in summary and not summary.get("degraded"):
+            _UNIFIED_RESULT_CACHE.set(cache_key, unified_result)
+        _complete_job_result(job_id, unified_result)
         update_job_log(job_id, "Unified analysis completed successfully")
         
     except Exception as e:
@@ -1431,7 +1921,8 @@ async def process_unified_analysis(
         JOBS[job_id]["result"] = {"error": str(e)}
         update_job_log(job_id, f"Analysis failed: {e}")
     finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        _LIVE_JOB_WORKERS.discard(job_id)
+        await asyncio.to_thread(shutil.rmtree, temp_dir, True)
 
 
 @router.post("/api/v1/ide/apply_fix")
@@ -1451,24 +1942,11 @@ async def apply_fix(
         if not os.path.exists(file_path):
             return {"success": False, "error": "File not found"}
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Apply fix
-        lines = content.splitlines(keepends=True)
-        start_idx = start_line - 1
-        end_idx = end_line
-        
-        # Ensure fixed code ends with newline
-        if lines[start_idx:end_idx] and lines[end_idx-1].endswith('\n'):
-            if not fixed_code.endswith('\n'):
-                fixed_code += '\n'
-        
-        new_lines = lines[:start_idx] + [fixed_code] + lines[end_idx:]
-        new_content = ''.join(new_lines)
+        if start_line < 1 or end_line < start_line - 1:
+            return {"success": False, "error": "Invalid line range"}
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        # Splice the fix into the file without reading or rewriting the part before it
+        await asyncio.to_thread(_splice_lines_sync, file_path, start_line, end_line, fixed_code)
         
         return {"success": True, "message": "Fix applied successfully"}
         
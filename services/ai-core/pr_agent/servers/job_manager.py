@@ -8,10 +8,22 @@ Extracted from ide_router.py for better modularity.
 Author: BlackboxTester Team
 """
 
-from typing import Dict, Any, Optional, List
+import asyncio
+import heapq
+import json
+import os
+import time
+from collections import deque
 from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
 from pr_agent.log import get_logger
 
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
 
 # ============================================================================
 # Job Storage
@@ -21,7 +33,7 @@ from pr_agent.log import get_logger
 # { 
 #     job_id: { 
 #         "status": "pending|processing|completed|failed|cancelled", 
-#         "logs": [], 
+#         "logs": deque(maxlen=MAX_JOB_LOGS), 
 #         "progress": {
 #             "current_file": "", 
 #             "processed": 0, 
@@ -35,6 +47,187 @@ from pr_agent.log import get_logger
 # }
 JOBS: Dict[str, Dict[str, Any]] = {}
 
+# (created epoch, job_id) min-heap so cleanup only touches jobs that are actually old
+_job_created_heap: List[Tuple[float, str]] = []
+_job_created_ts: Dict[str, float] = {}
+
+# Oldest log lines are dropped past this, bounding per-job memory
+MAX_JOB_LOGS = int(os.environ.get("JOB_LOG_MAX", "2000"))
+
+# Job log lines are forwarded to the server logger in batches
+LOG_FLUSH_SIZE = 50
+LOG_FLUSH_INTERVAL = 0.5
+_log_buffer: List[Tuple[str, str]] = []
+_flush_task: Optional[asyncio.Task] = None
+
+
+def new_job_logs(*messages: str) -> deque:
+    """Create a bounded log list for a job."""
+    return deque(messages, maxlen=MAX_JOB_LOGS)
+
+
+# ============================================================================
+# Shared Job Snapshots (Redis)
+# ============================================================================
+
+# JOBS stays the live store of the worker running a job. With REDIS_URL set, job state is
+# mirrored to Redis so job_status can be answered by any worker and after a restart.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+JOB_SNAPSHOT_TTL = 24 * 3600
+_dirty_jobs: Dict[str, Optional[Dict[str, Any]]] = {}
+_pending_redis_logs: Dict[str, List[str]] = {}
+_snapshot_task: Optional[asyncio.Task] = None
+_redis_client: Optional[Tuple[asyncio.AbstractEventLoop, Any]] = None
+
+
+def job_snapshots_enabled() -> bool:
+    return bool(REDIS_URL) and aioredis is not None
+
+
+def _get_redis():
+    global _redis_client
+    loop = asyncio.get_running_loop()
+    if _redis_client is None or _redis_client[0] is not loop:
+        _redis_client = (loop, aioredis.from_url(REDIS_URL, decode_responses=True))
+    return _redis_client[1]
+
+
+def mark_job_dirty(job_id: str, job: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Schedule a Redis snapshot of a job.
+
+    Writes are coalesced: all jobs changed within LOG_FLUSH_INTERVAL go out in one pipeline.
+    Outside an event loop, or without Redis, this does nothing.
+
+    Args:
+        job_id: The job identifier
+        job: Job dict, for jobs kept outside JOBS (defaults to JOBS[job_id] at flush time)
+    """
+    global _snapshot_task
+    if not job_snapshots_enabled():
+        return
+    if job is not None or job_id not in _dirty_jobs:
+        _dirty_jobs[job_id] = job
+    if _snapshot_task is None:
+        try:
+            _snapshot_task = asyncio.get_running_loop().create_task(_periodic_snapshot())
+        except RuntimeError:
+            _dirty_jobs.clear()
+            _pending_redis_logs.clear()
+
+
+async def _periodic_snapshot() -> None:
+    global _snapshot_task
+    try:
+        while _dirty_jobs:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            await flush_job_snapshots()
+    finally:
+        _snapshot_task = None
+
+
+async def flush_job_snapshots() -> None:
+    """Write every dirty job's state, and its new log lines, to Redis."""
+    if not _dirty_jobs:
+        return
+    dirty = dict(_dirty_jobs)
+    _dirty_jobs.clear()
+    new_logs = dict(_pending_redis_logs)
+    _pending_redis_logs.clear()
+    try:
+        pipe = _get_redis().pipeline(transaction=False)
+        for job_id, job in dirty.items():
+            key = f"job:{job_id}"
+            job = job if job is not None else JOBS.get(job_id)
+            if job is not None:
+                pipe.hset(key, mapping={
+                    "status": job.get("status", ""),
+                    "progress": json.dumps(job.get("progress") or {}),
+                    "result": json.dumps(job.get("result"), default=str),
+                })
+                pipe.expire(key, JOB_SNAPSHOT_TTL)
+            lines = new_logs.get(job_id)
+            if lines:
+                # Appends only; the list is trimmed to the same bound as the in-process deque
+                pipe.rpush(f"{key}:logs", *lines)
+                pipe.ltrim(f"{key}:logs", -MAX_JOB_LOGS, -1)
+                pipe.expire(f"{key}:logs", JOB_SNAPSHOT_TTL)
+        await pipe.execute()
+    except Exception as e:
+        get_logger().warning(f"Failed to write job snapshots to Redis: {e}")
+
+
+async def load_job_snapshot(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a job written by any worker.
+
+    Returns:
+        Job dict in the same shape as JOBS entries, or None if unknown or Redis is unavailable
+    """
+    if not job_snapshots_enabled():
+        return None
+    try:
+        client = _get_redis()
+        fields = await client.hgetall(f"job:{job_id}")
+        if not fields:
+            return None
+        logs = await client.lrange(f"job:{job_id}:logs", 0, -1)
+    except Exception as e:
+        get_logger().warning(f"Failed to read job {job_id} from Redis: {e}")
+        return None
+    return {
+        "status": fields.get("status", ""),
+        "logs": logs,
+        "progress": json.loads(fields.get("progress") or "{}"),
+        "result": json.loads(fields.get("result") or "null"),
+    }
+
+
+# ============================================================================
+# Log Batching
+# ============================================================================
+
+def flush_job_logs() -> None:
+    """Write all buffered job log lines to the server logger as one record."""
+    if not _log_buffer:
+        return
+    lines = "\n".join(f"Job {job_id}: {message}" for job_id, message in _log_buffer)
+    _log_buffer.clear()
+    # Pass text as an argument so braces in messages are never treated as format fields
+    get_logger().info("{}", lines)
+
+
+async def _periodic_flush() -> None:
+    global _flush_task
+    try:
+        while _log_buffer:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            flush_job_logs()
+    finally:
+        _flush_task = None
+
+
+def log_job_message(job_id: str, message: str) -> None:
+    """
+    Queue a job log line for the server logger.
+
+    Lines are flushed every LOG_FLUSH_SIZE messages or LOG_FLUSH_INTERVAL seconds,
+    whichever comes first. Outside an event loop they are written immediately.
+    """
+    global _flush_task
+    _log_buffer.append((job_id, str(message)))
+    if job_snapshots_enabled():
+        _pending_redis_logs.setdefault(job_id, []).append(str(message))
+        mark_job_dirty(job_id)
+    if len(_log_buffer) >= LOG_FLUSH_SIZE:
+        flush_job_logs()
+        return
+    if _flush_task is None:
+        try:
+            _flush_task = asyncio.get_running_loop().create_task(_periodic_flush())
+        except RuntimeError:
+            flush_job_logs()
+
 
 # ============================================================================
 # Job Lifecycle Functions
@@ -53,7 +246,7 @@ def create_job(job_id: str) -> Dict[str, Any]:
     now = datetime.now(timezone.utc)
     job = {
         "status": "pending",
-        "logs": [],
+        "logs": new_job_logs(),
         "progress": {
             "current_file": "",
             "processed": 0,
@@ -65,6 +258,10 @@ def create_job(job_id: str) -> Dict[str, Any]:
         "updated_at": now.isoformat()
     }
     JOBS[job_id] = job
+    created_ts = now.timestamp()
+    _job_created_ts[job_id] = created_ts
+    heapq.heappush(_job_created_heap, (created_ts, job_id))
+    mark_job_dirty(job_id)
     get_logger().info(f"Created job {job_id}")
     return job
 
@@ -98,6 +295,7 @@ def update_job_status(job_id: str, status: str) -> bool:
     
     JOBS[job_id]["status"] = status
     JOBS[job_id]["updated_at"] = datetime.now(timezone.utc).isoformat()
+    mark_job_dirty(job_id)
     get_logger().info(f"Job {job_id} status: {status}")
     return True
 
@@ -118,10 +316,7 @@ def update_job_log(job_id: str, message: str) -> bool:
     
     JOBS[job_id]["logs"].append(message)
     JOBS[job_id]["updated_at"] = datetime.now(timezone.utc).isoformat()
-    
-    # Use args to prevent Loguru/logging from interpreting braces in 'message' as format specifiers
-    safe_msg = str(message).replace("{", "{{").replace("}", "}}")
-    get_logger().info(f"Job {job_id}: {safe_msg}")
+    log_job_message(job_id, message)
     return True
 
 
@@ -161,6 +356,7 @@ def update_job_progress(
     
     JOBS[job_id]["progress"] = p
     JOBS[job_id]["updated_at"] = datetime.now(timezone.utc).isoformat()
+    mark_job_dirty(job_id)
     return True
 
 
@@ -180,6 +376,7 @@ def update_job_result(job_id: str, result: Dict[str, Any]) -> bool:
     
     JOBS[job_id]["result"] = result
     JOBS[job_id]["updated_at"] = datetime.now(timezone.utc).isoformat()
+    mark_job_dirty(job_id)
     return True
 
 
@@ -261,34 +458,31 @@ def cleanup_old_jobs(max_age_hours: int = 24) -> int:
     """
     Remove jobs older than max_age_hours.
     
+    Pops the creation-time heap until its oldest entry is young enough, so the cost
+    depends on the number of expired jobs, not on the number of stored ones.
+    
     Args:
         max_age_hours: Maximum job age in hours
         
     Returns:
         Number of jobs removed
     """
-    from datetime import timedelta
-    
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
-    to_remove = []
-    
-    for job_id, job in JOBS.items():
-        created_str = job.get("created_at", "")
-        if created_str:
-            try:
-                created = datetime.fromisoformat(created_str.replace("Z", "+00:00"))
-                if created < cutoff:
-                    to_remove.append(job_id)
-            except (ValueError, TypeError):
-                pass
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
     
-    for job_id in to_remove:
-        del JOBS[job_id]
+    while _job_created_heap and _job_created_heap[0][0] < cutoff:
+        created_ts, job_id = heapq.heappop(_job_created_heap)
+        # Skip entries left behind by a job id that was created again later
+        if _job_created_ts.get(job_id) != created_ts:
+            continue
+        del _job_created_ts[job_id]
+        if JOBS.pop(job_id, None) is not None:
+            removed += 1
     
-    if to_remove:
-        get_logger().info(f"Cleaned up {len(to_remove)} old jobs")
+    if removed:
+        get_logger().info(f"Cleaned up {removed} old jobs")
     
-    return len(to_remove)
+    return removed
 
 
 def get_all_jobs() -> Dict[str, Dict[str, Any]]:
@@ -296,6 +490,6 @@ def get_all_jobs() -> Dict[str, Dict[str, Any]]:
     Get all jobs (for debugging/admin).
     
     Returns:
-        Copy of all jobs dict
+        Copy of all jobs dict, with logs as plain lists
     """
-    return dict(JOBS)
+    return {job_id: {**job, "logs": list(job.get("logs", ()))} for job_id, job in JOBS.items()}
@@ -7,26 +7,126 @@ Includes:
 - Zip extraction
 - Git initialization
 - File counting and validation
+- Content fingerprints for incremental analysis
 
 Extracted from ide_router.py for better modularity.
 
 Author: BlackboxTester Team
 """
 
+import asyncio
+import hashlib
 import os
 import shutil
+import subprocess
 import tempfile
 import zipfile
-from typing import Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional, Tuple
 
 from pr_agent.log import get_logger
 
+# Directories that never hold reviewable source
+WORKSPACE_SKIP_DIRS = frozenset({".git", "node_modules", "__pycache__", ".venv", "venv"})
+
+# Dependency and cache directories not worth writing to disk; .git is kept for git-based change discovery
+EXTRACT_SKIP_DIRS = WORKSPACE_SKIP_DIRS - {".git"}
+
+# Extensions picked up when a review has to choose files without Sonar/diff hints
+SOURCE_CODE_EXTENSIONS = frozenset({".py", ".js", ".ts", ".go", ".java", ".rs"})
+
 
 # ============================================================================
 # Workspace Setup
 # ============================================================================
 
+def count_workspace_files(root: str, skip_dirs=WORKSPACE_SKIP_DIRS) -> int:
+    """
+    Count files under a directory, skipping excluded directories entirely.
+
+    Uses os.scandir with an explicit stack: DirEntry carries the file type from
+    the directory listing, so no extra stat call is made per entry.
+
+    Args:
+        root: Directory to count
+        skip_dirs: Directory names that are not descended into
+
+    Returns:
+        Number of files
+    """
+    count = 0
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            it = os.scandir(path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        stack.append(entry.path)
+                else:
+                    count += 1
+    return count
+
+
+def iter_workspace_files(root: str, extensions=None, skip_dirs=WORKSPACE_SKIP_DIRS):
+    """
+    Lazily yield files under a directory, skipping excluded directories entirely.
+
+    Same os.scandir walk as count_workspace_files, so callers that only need the
+    first few matches (e.g. with itertools.islice) stop reading directories early.
+
+    Args:
+        root: Directory to walk
+        extensions: Optional set of lowercase extensions (e.g. {".py"}) to keep
+        skip_dirs: Directory names that are not descended into
+
+    Yields:
+        File paths relative to root
+    """
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            it = os.scandir(path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        stack.append(entry.path)
+                elif extensions is None or os.path.splitext(entry.name)[1].lower() in extensions:
+                    yield os.path.relpath(entry.path, root)
+
+
+def extract_zip_filtered(archive: zipfile.ZipFile, dest_dir: str, skip_dirs=EXTRACT_SKIP_DIRS) -> int:
+    """
+    Extract an archive, leaving out entries under skipped directories.
+
+    Vendored dependencies (node_modules, virtualenvs) are often most of an
+    uploaded repo and are never reviewed, so they are not written at all.
+
+    Args:
+        archive: Open zip archive
+        dest_dir: Target directory for extraction
+        skip_dirs: Directory names whose contents are not extracted
+
+    Returns:
+        Number of entries extracted
+    """
+    extracted = 0
+    for info in archive.infolist():
+        if skip_dirs.isdisjoint(info.filename.split("/")[:-1]):
+            archive.extract(info, dest_dir)
+            extracted += 1
+    return extracted
+
+
 def setup_workspace_sync(zip_path: str, temp_dir: str) -> int:
     """
     Blocking I/O operations - extract zip and prepare workspace.
@@ -44,20 +144,49 @@ def setup_workspace_sync(zip_path: str, temp_dir: str) -> int:
     logger.debug(f"Unzipping {zip_path} to {temp_dir}...")
     
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(temp_dir)
-        file_count = len(zip_ref.namelist())
+        file_count = extract_zip_filtered(zip_ref, temp_dir)
         logger.debug(f"Extracted {file_count} entries")
     
     # Remove the zip after extraction
     os.remove(zip_path)
     
     # Count actual files (not directories)
-    actual_count = sum([len(files) for r, d, files in os.walk(temp_dir)])
+    actual_count = count_workspace_files(temp_dir)
     logger.debug(f"Workspace contains {actual_count} files")
     
     return actual_count
 
 
+def extract_repo_zip_sync(zip_path: str, extract_dir: str) -> str:
+    """
+    Blocking I/O - extract an uploaded repository zip and locate its root.
+
+    Archives made from a single top-level folder are unwrapped, so the
+    returned path is the repository root either way.
+
+    Args:
+        zip_path: Path to the uploaded zip file
+        extract_dir: Target directory for extraction
+
+    Returns:
+        Path of the repository root inside extract_dir
+    """
+    with zipfile.ZipFile(zip_path, 'r') as archive:
+        extract_zip_filtered(archive, extract_dir)
+
+    contents = os.listdir(extract_dir)
+    if len(contents) == 1 and os.path.isdir(os.path.join(extract_dir, contents[0])):
+        return os.path.join(extract_dir, contents[0])
+    return extract_dir
+
+
+GIT_INIT_SCRIPT = (
+    "git init -q && git add -A && "
+    "git -c user.email=blackbox@localhost -c 'user.name=Blackbox Tester' -c commit.gpgsign=false "
+    "commit -q --no-verify -m initial"
+)
+
+
 def git_init_sync(temp_dir: str) -> bool:
     """
     Initialize git repository for the workspace.
@@ -71,27 +200,17 @@ def git_init_sync(temp_dir: str) -> bool:
     logger = get_logger()
     
     try:
-        # Use subprocess for better control
-        import subprocess
-        
-        commands = [
-            ["git", "init"],
-            ["git", "config", "user.email", "blackbox@localhost"],
-            ["git", "config", "user.name", "Blackbox Tester"],
-            ["git", "add", "."],
-            ["git", "commit", "-m", "initial"]
-        ]
-        
-        for cmd in commands:
-            result = subprocess.run(
-                cmd, 
-                cwd=temp_dir, 
-                capture_output=True, 
-                text=True
-            )
-            if result.returncode != 0:
-                logger.warning(f"Git command failed: {' '.join(cmd)}")
-                # Continue anyway - some warnings are expected
+        # One shell and three git processes; the identity is passed with -c instead of
+        # two extra `git config` runs. Nothing is interpolated: the workspace is only the cwd.
+        result = subprocess.run(
+            ["sh", "-c", GIT_INIT_SCRIPT],
+            cwd=temp_dir,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            # Continue anyway - e.g. an empty workspace has nothing to commit
+            logger.warning(f"Git init failed: {result.stderr.strip()[:200]}")
         
         return True
         
@@ -150,19 +269,109 @@ def find_files_by_extension(
     Returns:
         List of relative file paths
     """
-    exclude_dirs = exclude_dirs or ['node_modules', '.git', '__pycache__', 'venv', '.venv']
-    result = []
-    
-    for root, dirs, files in os.walk(directory):
-        # Skip excluded directories
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
-        
-        for f in files:
-            if any(f.endswith(ext) for ext in extensions):
-                rel_path = os.path.relpath(os.path.join(root, f), directory)
-                result.append(rel_path)
-    
-    return result
+    skip_dirs = frozenset(exclude_dirs) if exclude_dirs else WORKSPACE_SKIP_DIRS
+    # str.endswith with a tuple checks every suffix in C; no generator per file
+    suffixes = tuple(extensions)
+    return [
+        rel_path for rel_path in iter_workspace_files(directory, skip_dirs=skip_dirs)
+        if rel_path.endswith(suffixes)
+    ]
+
+
+# Threads used to hash a workspace; small workspaces are hashed inline
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _sha256_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except OSError:
+        return None
+
+
+def hash_workspace_files(root: str, skip_dirs=WORKSPACE_SKIP_DIRS) -> dict[str, str]:
+    """
+    SHA-256 of every file under a directory.
+
+    Args:
+        root: Directory to hash
+        skip_dirs: Directory names that are not descended into
+
+    Returns:
+        {relative path with forward slashes: hex digest}; unreadable files are left out
+    """
+    rel_paths = list(iter_workspace_files(root, skip_dirs=skip_dirs))
+    full_paths = [os.path.join(root, rel_path) for rel_path in rel_paths]
+    if HASH_WORKERS > 1 and len(full_paths) >= 4 * HASH_WORKERS:
+        # hashlib releases the GIL while digesting, so threads hash files in parallel
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            results = list(pool.map(_sha256_file, full_paths))
+    else:
+        results = map(_sha256_file, full_paths)
+    return {
+        rel_path.replace(os.sep, "/"): digest
+        for rel_path, digest in zip(rel_paths, results, strict=True)
+        if digest is not None
+    }
+
+
+def workspace_fingerprint(root: str, skip_dirs=WORKSPACE_SKIP_DIRS) -> str:
+    """
+    One digest for a whole workspace: equal only when every path and file content is equal.
+
+    Args:
+        root: Directory to fingerprint
+        skip_dirs: Directory names that are not descended into
+
+    Returns:
+        Hex digest
+    """
+    h = hashlib.sha256()
+    for rel_path, digest in sorted(hash_workspace_files(root, skip_dirs).items()):
+        h.update(rel_path.encode("utf-8", "surrogateescape"))
+        h.update(b"\0")
+        h.update(digest.encode("ascii"))
+    return h.hexdigest()
+
+
+def get_changed_files_via_git(workspace_path: str, base_ref: str = "HEAD", extensions=None) -> Optional[list[str]]:
+    """
+    Changed and untracked files of a git workspace, without walking the tree.
+
+    Args:
+        workspace_path: Workspace that may contain a .git directory
+        base_ref: Ref to diff the working tree against
+        extensions: Optional set of lowercase extensions (e.g. {".py"}) to keep
+
+    Returns:
+        Relative paths of existing changed files, or None when the workspace is not
+        a usable git repository (callers then fall back to a directory scan)
+    """
+    if not os.path.isdir(os.path.join(workspace_path, ".git")):
+        return None
+
+    paths = []
+    for cmd in (
+        ["git", "diff", "--name-only", base_ref],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    ):
+        try:
+            result = subprocess.run(cmd, cwd=workspace_path, capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.SubprocessError) as e:
+            get_logger().debug(f"git changed-file discovery failed: {e}")
+            return None
+        if result.returncode != 0:
+            get_logger().debug(f"git changed-file discovery failed: {result.stderr.strip()[:200]}")
+            return None
+        paths.extend(line for line in result.stdout.splitlines() if line)
+
+    # Deleted files show up in git diff but have nothing to analyze
+    return [
+        p for p in dict.fromkeys(paths)
+        if (extensions is None or os.path.splitext(p)[1].lower() in extensions)
+        and os.path.isfile(os.path.join(workspace_path, p))
+    ]
 
 
 def get_file_content(directory: str, file_path: str) -> Optional[str]:
@@ -208,6 +417,16 @@ def save_file_content(directory: str, file_path: str, content: str) -> bool:
         return False
 
 
+async def aget_file_content(directory: str, file_path: str) -> Optional[str]:
+    """get_file_content for async handlers: the read runs in a worker thread."""
+    return await asyncio.to_thread(get_file_content, directory, file_path)
+
+
+async def asave_file_content(directory: str, file_path: str, content: str) -> bool:
+    """save_file_content for async handlers: the write runs in a worker thread."""
+    return await asyncio.to_thread(save_file_content, directory, file_path, content)
+
+
 def get_workspace_stats(directory: str) -> dict:
     """
     Get statistics about a workspace.
@@ -1,7 +1,20 @@
+import asyncio
 import os
+import time
+from typing import Optional, Tuple
+
 import httpx
-from pr_agent.log import get_logger
+
 from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+
+# Compute Engine polling: start fast so small scans are seen quickly, back off to this cap for slow ones
+CE_POLL_INITIAL_DELAY = 0.1
+CE_POLL_MAX_DELAY = 2.0
+
+# A SonarClient is created per scan; they share one pooled HTTP client so connections to
+# SonarQube are reused across calls and scans. A client is tied to the event loop that created it.
+_SHARED_HTTP_CLIENT: Optional[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = None
 
 class SonarClient:
     def __init__(self):
@@ -9,33 +22,42 @@ class SonarClient:
         self.token = os.environ.get("SONARQUBE_TOKEN", get_settings().get("SONARQUBE.TOKEN", ""))
         self.auth = (self.token, "") if self.token else ("admin", "admin") # Fallback to default for MVP
 
+    def _get_client(self) -> httpx.AsyncClient:
+        global _SHARED_HTTP_CLIENT
+        loop = asyncio.get_running_loop()
+        if _SHARED_HTTP_CLIENT is None or _SHARED_HTTP_CLIENT[0] is not loop:
+            _SHARED_HTTP_CLIENT = (loop, httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=20)))
+        return _SHARED_HTTP_CLIENT[1]
+
     async def health_check(self):
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(f"{self.base_url}/api/system/health", auth=self.auth)
-                return resp.status_code == 200
-            except Exception as e:
-                get_logger().error(f"SonarQube health check failed: {e}")
-                return False
+        client = self._get_client()
+        try:
+            resp = await client.get(f"{self.base_url}/api/system/health", auth=self.auth)
+            return resp.status_code == 200
+        except Exception as e:
+            get_logger().error(f"SonarQube health check failed: {e}")
+            return False
 
     async def create_project(self, project_key: str, project_name: str):
         """Creates a project if it doesn't exist."""
-        async with httpx.AsyncClient() as client:
-            try:
-                # Check if exists first
-                resp = await client.get(f"{self.base_url}/api/components/show", params={"component": project_key}, auth=self.auth)
-                if resp.status_code == 200:
-                    return # Already exists
+        client = self._get_client()
+        try:
+            # Check if exists first
+            resp = await client.get(
+                f"{self.base_url}/api/components/show", params={"component": project_key}, auth=self.auth
+            )
+            if resp.status_code == 200:
+                return # Already exists
 
-                # Create
-                resp = await client.post(f"{self.base_url}/api/projects/create", 
-                    data={"name": project_name, "project": project_key}, 
-                    auth=self.auth
-                )
-                if resp.status_code >= 400:
-                    get_logger().error(f"Failed to create Sonar project: {resp.text}")
-            except Exception as e:
-                get_logger().error(f"Error creating Sonar project: {e}")
+            # Create
+            resp = await client.post(f"{self.base_url}/api/projects/create", 
+                data={"name": project_name, "project": project_key}, 
+                auth=self.auth
+            )
+            if resp.status_code >= 400:
+                get_logger().error(f"Failed to create Sonar project: {resp.text}")
+        except Exception as e:
+            get_logger().error(f"Error creating Sonar project: {e}")
 
     async def get_issues(self, project_key: str, pull_request_id: str = None):
         """Fetches issues for a project, optionally filtered by PR."""
@@ -51,18 +73,18 @@ class SonarClient:
         # For this MVP, we are scanning the PR code as the 'main' codebase for a unique project key tailored to the PR
         # e.g., projectKey = "org_repo_pr123"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(f"{self.base_url}/api/issues/search", params=params, auth=self.auth)
-                if resp.status_code == 200:
-                    return resp.json().get("issues", [])
-                else:
-                    get_logger().error(f"Failed to fetch issues: {resp.text}")
-                    return []
-                return []
-            except Exception as e:
-                get_logger().error(f"Error fetching issues: {e}")
+        client = self._get_client()
+        try:
+            resp = await client.get(f"{self.base_url}/api/issues/search", params=params, auth=self.auth)
+            if resp.status_code == 200:
+                return resp.json().get("issues", [])
+            else:
+                get_logger().error(f"Failed to fetch issues: {resp.text}")
                 return []
+            return []
+        except Exception as e:
+            get_logger().error(f"Error fetching issues: {e}")
+            return []
 
     async def get_hotspots(self, project_key: str):
         """Fetches security hotspots."""
@@ -71,45 +93,46 @@ class SonarClient:
             "status": "TO_REVIEW", # Open hotspots
             "ps": 100
         }
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(f"{self.base_url}/api/hotspots/search", params=params, auth=self.auth)
-                if resp.status_code == 200:
-                    return resp.json().get("hotspots", [])
-                return []
-            except:
-                return []
+        client = self._get_client()
+        try:
+            resp = await client.get(f"{self.base_url}/api/hotspots/search", params=params, auth=self.auth)
+            if resp.status_code == 200:
+                return resp.json().get("hotspots", [])
+            return []
+        except Exception:
+            return []
 
     async def wait_for_processing(self, project_key: str, timeout: int = 30):
         """Waits for the Compute Engine task to finish for the given project."""
-        import asyncio
-        import time
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
+        delay = CE_POLL_INITIAL_DELAY
         
-        async with httpx.AsyncClient() as client:
-            while (time.time() - start_time) < timeout:
-                try:
-                    # Get recent activities for this component
-                    resp = await client.get(f"{self.base_url}/api/ce/activity", 
-                                          params={"component": project_key, "status": "SUCCESS,FAILED,CANCELED"}, 
-                                          auth=self.auth)
-                    if resp.status_code == 200:
-                        tasks = resp.json().get("tasks", [])
-                        if tasks:
-                            # If we see a recent SUCCESS task, we are good.
-                            # In a rigorous impl, we'd check task ID matching the scan report.
-                            # For MVP/Simplicity, if there is ANY success task in the last minute (since we just created the project), it's ours.
-                            latest = tasks[0]
-                            if latest["status"] == "SUCCESS":
-                                return True
-                    
-                    # Also check if queue is empty? 
-                    # If we don't see SUCCESS yet, maybe it's IN_PROGRESS.
-                    # Wait and retry.
-                except Exception as e:
-                    get_logger().warning(f"Error polling Sonar CE: {e}")
+        client = self._get_client()
+        while time.monotonic() < deadline:
+            try:
+                # Get recent activities for this component
+                resp = await client.get(f"{self.base_url}/api/ce/activity", 
+                                      params={"component": project_key, "status": "SUCCESS,FAILED,CANCELED"}, 
+                                      auth=self.auth)
+                if resp.status_code == 200:
+                    tasks = resp.json().get("tasks", [])
+                    if tasks:
+                        # If we see a recent SUCCESS task, we are good.
+                        # In a rigorous impl, we'd check task ID matching the scan report.
+                        # For MVP/Simplicity, if there is ANY success task in the last minute
+                        # (since we just created the project), it's ours.
+                        latest = tasks[0]
+                        if latest["status"] == "SUCCESS":
+                            return True
                 
-                await asyncio.sleep(2) # Poll every 2s
+                # Also check if queue is empty? 
+                # If we don't see SUCCESS yet, maybe it's IN_PROGRESS.
+                # Wait and retry.
+            except Exception as e:
+                get_logger().warning(f"Error polling Sonar CE: {e}")
+            
+            await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 1.7, CE_POLL_MAX_DELAY)
         
         get_logger().warning(f"SonarQube processing timeout for {project_key}")
         return False
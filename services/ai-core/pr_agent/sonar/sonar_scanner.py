@@ -1,8 +1,40 @@
 import asyncio
 import os
 import shutil
+from collections import deque
 from pr_agent.log import get_logger
 
+# Lines of scanner stderr kept for the failure message
+STDERR_TAIL_LINES = 200
+
+# Directories never holding project sources or build output
+_SKIP_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__"}
+
+
+def _find_java_outputs(repo_path: str) -> tuple[list[str], bool]:
+    """
+    Returns (compiled class directories, whether any .java source exists) for repo_path.
+    A class directory is a Maven/Gradle style "classes" directory with at least one .class file under it.
+    """
+    class_dirs = []
+    has_java = False
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if d not in _SKIP_DIRS]
+        if not has_java and any(f.endswith(".java") for f in files):
+            has_java = True
+        if os.path.basename(root) == "classes" and _contains_class_file(root):
+            class_dirs.append(os.path.relpath(root, repo_path))
+            dirs[:] = []
+    return class_dirs, has_java
+
+
+def _contains_class_file(path: str) -> bool:
+    for _, _, files in os.walk(path):
+        if any(f.endswith(".class") for f in files):
+            return True
+    return False
+
+
 class SonarScanner:
     def __init__(self):
         self.scanner_path = shutil.which("sonar-scanner")
@@ -10,21 +42,40 @@ class SonarScanner:
             # Fallback for local testing if not in PATH
             self.scanner_path = "sonar-scanner"
 
-    async def scan(self, repo_path: str, project_key: str, project_name: str, host_url: str, token: str):
+    async def scan(self, repo_path: str, project_key: str, project_name: str, host_url: str, token: str,
+                   changed_files: list[str] | None = None):
         """
         Runs the sonar-scanner CLI on the given repo_path.
+        If changed_files is given, only those files are analyzed.
         """
         cmd = [
             self.scanner_path,
             f"-Dsonar.projectKey={project_key}",
             f"-Dsonar.projectName={project_name}",
             f"-Dsonar.sources=.",
+            f"-Dsonar.projectBaseDir={repo_path}",
             f"-Dsonar.host.url={host_url}",
             f"-Dsonar.login=admin",
             f"-Dsonar.password=admin",
             "-Dsonar.scm.disabled=true", # Disable SCM for simpler scanning of cloned dir
             "-Dsonar.cpd.exclusions=**/*", # Disable duplication detection for speed
+            "-Dsonar.coverage.exclusions=**/*", # No coverage reports are uploaded
+            "-Dsonar.skipPackageDesign=true",
         ]
+        class_dirs, has_java = _find_java_outputs(repo_path)
+        if class_dirs:
+            cmd.append(f"-Dsonar.java.binaries={','.join(class_dirs)}")
+        else:
+            # The Java analyzer refuses to run without binaries; an empty path lets it run on sources only
+            cmd.append(f"-Dsonar.java.binaries={os.devnull}")
+            if has_java and (not changed_files or any(f.endswith(".java") for f in changed_files)):
+                get_logger().warning(
+                    f"No compiled classes found in {repo_path}; Java analysis is degraded "
+                    "(bytecode-based rules are skipped)"
+                )
+        if changed_files:
+            # Scan time grows with analyzed LoC, so restrict it to the PR diff
+            cmd.append(f"-Dsonar.inclusions={','.join(changed_files)}")
         
         get_logger().info(f"Starting SonarScan for {project_key} in {repo_path}")
         
@@ -33,13 +84,20 @@ class SonarScanner:
                 *cmd,
                 cwd=repo_path,
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stderr=asyncio.subprocess.PIPE,
+                limit=1 << 20
             )
             
-            stdout, stderr = await process.communicate()
+            # Stream output line by line instead of buffering the whole scan in memory
+            stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+            await asyncio.gather(
+                self._pump(process.stdout, None),
+                self._pump(process.stderr, stderr_tail),
+                process.wait()
+            )
             
             if process.returncode != 0:
-                get_logger().error(f"SonarScanner failed: {stderr.decode()}")
+                get_logger().error("SonarScanner failed: {}", "\n".join(stderr_tail))
                 return False
                 
             get_logger().info(f"SonarScan completed successfully for {project_key}")
@@ -48,3 +106,12 @@ class SonarScanner:
         except Exception as e:
             get_logger().error(f"Error running SonarScanner: {e}")
             return False
+
+    @staticmethod
+    async def _pump(stream, tail):
+        """Forward scanner output to the debug log, keeping the last lines in tail if given."""
+        while line := await stream.readline():
+            text = line.decode(errors="replace").rstrip()
+            get_logger().debug("[sonar-scanner] {}", text)
+            if tail is not None:
+                tail.append(text)
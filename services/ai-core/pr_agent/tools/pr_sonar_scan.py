@@ -1,14 +1,71 @@
 import os
-import tempfile
+import shutil
 import asyncio
+import hashlib
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: checkouts are then only guarded within one process
+    fcntl = None
+
 from pr_agent.algo.ai_handlers.base_ai_handler import BaseAiHandler
 from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
+from pr_agent.algo.types import EDIT_TYPE
 from pr_agent.config_loader import get_settings
 from pr_agent.git_providers import get_git_provider
 from pr_agent.log import get_logger
 from pr_agent.sonar.sonar_client import SonarClient
 from pr_agent.sonar.sonar_scanner import SonarScanner
 
+# Checkouts are kept between scans so git objects and .scannerwork are reused
+SONAR_CACHE_DIR = os.path.expanduser(
+    get_settings().get("sonarqube.cache_dir", "~/.cache/testpilot/sonar")
+)
+SONAR_CACHE_MAX_BYTES = int(get_settings().get("sonarqube.cache_max_bytes", 5 * 1024 ** 3))
+
+# Only source files are checked out, and blobs are fetched for those alone
+SONAR_SPARSE_CLONE = bool(get_settings().get("sonarqube.sparse_clone", True))
+SONAR_SPARSE_PATTERNS = tuple(get_settings().get("sonarqube.sparse_patterns", [
+    "*.py", "*.js", "*.jsx", "*.ts", "*.tsx", "*.java", "*.go", "*.rs", "*.c", "*.cpp", "*.h",
+]))
+
+# A clone or fetch from a stalled remote is killed after this many seconds
+SONAR_GIT_TIMEOUT = float(get_settings().get("sonarqube.git_timeout", 300))
+
+# One scan at a time per checkout directory. The asyncio locks cover this process; the
+# flock on "<checkout>.lock" (_CheckoutFileLock) covers other workers sharing SONAR_CACHE_DIR.
+_CHECKOUT_LOCKS: dict = {}
+
+
+class _CheckoutFileLock:
+    """Exclusive flock on a checkout's lock file, so worker processes don't share a checkout."""
+
+    def __init__(self, repo_path: str):
+        self.path = repo_path + ".lock"
+        self._file: Optional[IO] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; with blocking=False, return False if another process holds it."""
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            # Closing the file drops the flock
+            self._file.close()
+            self._file = None
+
+
 class PRSonarScan:
     def __init__(self, pr_url: str, args: list = None, ai_handler: BaseAiHandler = None):
         self.pr_url = pr_url
@@ -26,60 +83,136 @@ class PRSonarScan:
         project_key = f"{repo_name}_pr{pr_number}"
         project_name = f"{repo_name} PR #{pr_number}"
         
-        # 2. Create Project in SonarQube
-        await self.sonar_client.create_project(project_key, project_name)
+        # 2. Create Project in SonarQube and 3. Update the cached checkout, concurrently
+        repo_path = os.path.join(
+            SONAR_CACHE_DIR, hashlib.sha1(self.git_provider.repo_obj.full_name.encode()).hexdigest()
+        )
+        clone_url = self.git_provider.get_git_repo_url()
         
-        # 3. Clone Repository
-        with tempfile.TemporaryDirectory() as temp_dir:
-            repo_path = os.path.join(temp_dir, "repo")
-            clone_url = self.git_provider.get_git_repo_url()
-            
-            # For GitHub, we might need to inject token into URL for private repos
-            # clone_url = clone_url.replace("https://", f"https://x-access-token:{token}@")
-            # For MVP assuming public or SSH/Env configured
-            
-            branch = self.git_provider.get_pr_branch()
-            
-            get_logger().info(f"Cloning {clone_url} branch {branch} to {repo_path}")
+        # For GitHub, we might need to inject token into URL for private repos
+        # clone_url = clone_url.replace("https://", f"https://x-access-token:{token}@")
+        # For MVP assuming public or SSH/Env configured
+        
+        branch = self.git_provider.get_pr_branch()
+        
+        lock = _CHECKOUT_LOCKS.setdefault(repo_path, asyncio.Lock())
+        async with lock:
+            file_lock = _CheckoutFileLock(repo_path)
+            try:
+                await asyncio.to_thread(file_lock.acquire)
+                get_logger().info(f"Checking out {clone_url} branch {branch} to {repo_path}")
             
-            # Simple git clone
-            proc = await asyncio.create_subprocess_exec(
-                "git", "clone", "--depth", "1", "--branch", branch, clone_url, repo_path,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await proc.communicate()
+                # These talk to different servers, so none has to wait for the others
+                _, (returncode, stderr), changed_files = await asyncio.gather(
+                    self.sonar_client.create_project(project_key, project_name),
+                    self._checkout(clone_url, branch, repo_path),
+                    asyncio.to_thread(self._get_changed_files)
+                )
             
-            if proc.returncode != 0:
-                get_logger().error(f"Git clone failed: {stderr.decode()}")
-                return
+                if returncode != 0:
+                    get_logger().error(f"Git checkout failed: {stderr.decode()}")
+                    return
                 
-            # 4. Run SonarScanner
-            success = await self.sonar_scanner.scan(
-                repo_path=repo_path,
-                project_key=project_key,
-                project_name=project_name,
-                host_url=self.sonar_client.base_url,
-                token=self.sonar_client.token
-            )
-            
-            if not success:
-                get_logger().error("SonarScanner failed, aborting.")
-                return
-
-            # 5. Fetch Findings
-            issues = await self.sonar_client.get_issues(project_key)
+                # 4. Run SonarScanner
+                success = await self.sonar_scanner.scan(
+                    repo_path=repo_path,
+                    project_key=project_key,
+                    project_name=project_name,
+                    host_url=self.sonar_client.base_url,
+                    token=self.sonar_client.token,
+                    changed_files=changed_files
+                )
             
-            # 6. Format and Publish
-            message = None
-            if issues:
-                message = self._format_findings(issues)
-                if not self.args or "--no_publish" not in self.args:
-                    self.git_provider.publish_comment(message)
-            else:
-                get_logger().info("No SonarQube issues found.")
+                # Mark the checkout as recently used, then trim the cache
+                os.utime(repo_path)
+                await asyncio.to_thread(_evict_checkouts, SONAR_CACHE_DIR, SONAR_CACHE_MAX_BYTES, repo_path)
+            finally:
+                file_lock.release()
             
-            return message
+        if not success:
+            get_logger().error("SonarScanner failed, aborting.")
+            return
+
+        # 5. Fetch Findings
+        issues = await self.sonar_client.get_issues(project_key)
+        
+        # 6. Format and Publish
+        message = None
+        if issues:
+            message = self._format_findings(issues)
+            if not self.args or "--no_publish" not in self.args:
+                self.git_provider.publish_comment(message)
+        else:
+            get_logger().info("No SonarQube issues found.")
+        
+        return message
+
+    def _get_changed_files(self):
+        """Paths touched by the PR, or None if the diff can't be fetched (scan everything)."""
+        try:
+            files = self.git_provider.get_diff_files()
+        except Exception as e:
+            get_logger().warning(f"Could not get PR diff files, scanning the whole repo: {e}")
+            return None
+        return [f.filename for f in files if f.edit_type != EDIT_TYPE.DELETED] or None
+
+    async def _checkout(self, clone_url: str, branch: str, repo_path: str):
+        """Fetch the PR branch into an existing checkout, or clone it; returns (returncode, stderr)."""
+        if not os.path.isdir(os.path.join(repo_path, ".git")):
+            shutil.rmtree(repo_path, ignore_errors=True)
+            return await self._clone(clone_url, branch, repo_path)
+        fetch_filter = ("--filter=blob:none",) if SONAR_SPARSE_CLONE else ()
+        for args in (
+            ("remote", "set-url", "origin", clone_url),
+            ("fetch", "--depth", "1", *fetch_filter, "origin", branch),
+            self._sparse_args(),
+            ("reset", "--hard", "FETCH_HEAD"),
+            # Keep .scannerwork so the scanner can reuse its file hashes
+            ("clean", "-fdx", "-e", ".scannerwork"),
+        ):
+            returncode, stderr = await self._git(*args, cwd=repo_path)
+            if returncode != 0:
+                # A broken checkout is not worth repairing; start over from a fresh clone
+                get_logger().warning(f"git {args[0]} failed in cached checkout, recloning: {stderr.decode()}")
+                shutil.rmtree(repo_path, ignore_errors=True)
+                return await self._clone(clone_url, branch, repo_path)
+        return 0, b""
+
+    async def _clone(self, clone_url: str, branch: str, repo_path: str):
+        """Shallow-clone the PR branch; returns (returncode, stderr)."""
+        os.makedirs(os.path.dirname(repo_path), exist_ok=True)
+        if not SONAR_SPARSE_CLONE:
+            return await self._git("clone", "--depth", "1", "--branch", branch, clone_url, repo_path)
+        returncode, stderr = await self._git(
+            "clone", "--depth", "1", "--filter=blob:none", "--sparse", "--branch", branch, clone_url, repo_path
+        )
+        if returncode != 0:
+            return returncode, stderr
+        return await self._git(*self._sparse_args(), cwd=repo_path)
+
+    @staticmethod
+    def _sparse_args() -> tuple:
+        if SONAR_SPARSE_CLONE:
+            return ("sparse-checkout", "set", "--no-cone", *SONAR_SPARSE_PATTERNS)
+        # The cached checkout may have been made while sparse clones were enabled
+        return ("sparse-checkout", "disable")
+
+    @staticmethod
+    async def _git(*args, cwd: str = None):
+        """Run a git command with SONAR_GIT_TIMEOUT; returns (returncode, stderr)."""
+        proc = await asyncio.create_subprocess_exec(
+            "git", *args,
+            cwd=cwd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=SONAR_GIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return -1, f"git {args[0]} timed out after {SONAR_GIT_TIMEOUT:g}s".encode()
+        return proc.returncode, stderr
 
     def _format_findings(self, issues: list) -> str:
         if not issues:
@@ -104,3 +237,42 @@ class PRSonarScan:
             markdown += f"\n*...and {len(issues) - 10} more issues.*"
             
         return markdown
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _evict_checkouts(cache_dir: str, max_bytes: int, keep: str):
+    """Remove least recently used checkouts until the cache fits in max_bytes."""
+    try:
+        entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)]
+    except FileNotFoundError:
+        return
+    checkouts = [(os.path.getmtime(path), path, _dir_size(path)) for path in entries if os.path.isdir(path)]
+    total = sum(size for _, _, size in checkouts)
+    for _, path, size in sorted(checkouts):
+        if total <= max_bytes:
+            break
+        # Never remove a checkout that a scan in this or another worker is still using
+        if path == keep:
+            continue
+        in_process_lock = _CHECKOUT_LOCKS.get(path)
+        if in_process_lock is not None and in_process_lock.locked():
+            continue
+        file_lock = _CheckoutFileLock(path)
+        if not file_lock.acquire(blocking=False):
+            continue
+        try:
+            get_logger().info(f"Evicting cached Sonar checkout {path}")
+            shutil.rmtree(path, ignore_errors=True)
+        finally:
+            file_lock.release()
+        total -= size
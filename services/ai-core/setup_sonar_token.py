@@ -1,46 +1,56 @@
-import requests
+import asyncio
 import os
+import re
+import shutil
+import tempfile
+
+import httpx
 
 print("Generating SonarQube Token...")
 SONAR_URL = "http://sonarqube:9000"
 AUTH = ("admin", "admin")
 
-try:
-    # 1. Revoke existing if any (cleanup)
-    requests.post(f"{SONAR_URL}/api/user_tokens/revoke", 
-        data={"name": "blackbox_token"}, auth=AUTH)
+async def main():
+    try:
+        # Both calls go over one kept-alive connection
+        async with httpx.AsyncClient(auth=AUTH) as client:
+            # 1. Revoke existing if any (cleanup)
+            await client.post(f"{SONAR_URL}/api/user_tokens/revoke", 
+                data={"name": "blackbox_token"})
 
-    # 2. Generate new
-    resp = requests.post(f"{SONAR_URL}/api/user_tokens/generate", 
-        data={"name": "blackbox_token"}, auth=AUTH)
+            # 2. Generate new
+            resp = await client.post(f"{SONAR_URL}/api/user_tokens/generate", 
+                data={"name": "blackbox_token"})
 
-    if resp.status_code == 200:
-        token = resp.json()["token"]
-        print(f"SUCCESS: Generated token: {token}")
-        
-        # 3. Update .env
-        env_path = ".env"
-        with open(env_path, "r") as f:
-            lines = f.readlines()
+        if resp.status_code == 200:
+            token = resp.json()["token"]
+            print(f"SUCCESS: Generated token: {token}")
         
-        new_lines = []
-        token_set = False
-        for line in lines:
-            if line.startswith("SONARQUBE_TOKEN="):
-                new_lines.append(f"SONARQUBE_TOKEN={token}\n")
-                token_set = True
-            else:
-                new_lines.append(line)
+            # 3. Update .env
+            env_path = ".env"
+            with open(env_path, "r") as f:
+                content = f.read()
         
-        if not token_set:
-            new_lines.append(f"SONARQUBE_TOKEN={token}\n")
+            content, replaced = re.subn(
+                r"(?m)^SONARQUBE_TOKEN=.*$", lambda _: f"SONARQUBE_TOKEN={token}", content
+            )
+            if not replaced:
+                if content and not content.endswith("\n"):
+                    content += "\n"
+                content += f"SONARQUBE_TOKEN={token}\n"
             
-        with open(env_path, "w") as f:
-            f.writelines(new_lines)
+            # Write a sibling temp file and rename it over .env, so an interrupted run never leaves it truncated
+            with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(env_path) or ".", delete=False) as tf:
+                tf.write(content)
+            shutil.copymode(env_path, tf.name)
+            os.replace(tf.name, env_path)
             
-        print("Updated .env with SONARQUBE_TOKEN")
-    else:
-        print(f"FAILED: {resp.text}")
+            print("Updated .env with SONARQUBE_TOKEN")
+        else:
+            print(f"FAILED: {resp.text}")
+
+    except Exception as e:
+        print(f"Error: {e}")
+
 
-except Exception as e:
-    print(f"Error: {e}")
+asyncio.run(main())
@@ -1,6 +1,6 @@
 import requests
 import zipfile
-import io
+import tempfile
 import os
 import json
 
@@ -14,16 +14,16 @@ os.makedirs("test_scan", exist_ok=True)
 with open("test_scan/vulnerable.py", "w") as f:
     f.write(content)
 
-# 2. Zip it
-zip_buffer = io.BytesIO()
-with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+# 2. Zip it (into a temp file, so the archive isn't held in memory next to the request body)
+zip_file_obj = tempfile.TemporaryFile()
+with zipfile.ZipFile(zip_file_obj, "w", zipfile.ZIP_DEFLATED) as zip_file:
     zip_file.write("test_scan/vulnerable.py", "vulnerable.py")
-zip_buffer.seek(0)
+zip_file_obj.seek(0)
 
 # 3. Send to API
 print("Sending request to http://localhost:3000/api/v1/ide/review_repo...")
 try:
-    files = {"file": ("repo.zip", zip_buffer, "application/zip")}
+    files = {"file": ("repo.zip", zip_file_obj, "application/zip")}
     response = requests.post("http://localhost:3000/api/v1/ide/review_repo", files=files)
     
     print(f"Status: {response.status_code}")
@@ -49,3 +49,5 @@ try:
 
 except Exception as e:
     print(f"Error: {e}")
+finally:
+    zip_file_obj.close()
@@ -26,9 +26,10 @@ async def test_pr_sonar_scan_init():
         assert scanner.sonar_client is not None
         print("✅ PRSonarScan initialized correctly")
 
+async def _all():
+    # Independent checks: run them together on one event loop
+    await asyncio.gather(test_sonar_client(), test_pr_sonar_scan_init())
+
 if __name__ == "__main__":
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(test_sonar_client())
-    loop.run_until_complete(test_pr_sonar_scan_init())
+    asyncio.run(_all())
     print("\n🎉 All Sonar integration tests passed!")
@@ -0,0 +1,58 @@
+import os
+
+from pr_agent.algo import code_graph
+from pr_agent.algo.code_graph import CodeGraphBuilder
+
+
+class TestCodeGraphNodeCache:
+    def test_parsed_files_shared_across_builders(self, tmp_path):
+        """A second builder reuses the parse of an unchanged file"""
+        shared = tmp_path / "shared.py"
+        shared.write_text("def helper(x):\n    return x\n")
+
+        first = CodeGraphBuilder(str(tmp_path))._parse_file(str(shared))
+        second = CodeGraphBuilder(str(tmp_path))._parse_file(str(shared))
+
+        assert second.symbols is first.symbols
+        assert second.imports is first.imports
+
+    def test_dependencies_resolved_per_builder(self, tmp_path):
+        """A cached parse still sees dependency files added since, and the builder's own repo root"""
+        main = tmp_path / "main.py"
+        main.write_text("import helpers\n")
+        first = CodeGraphBuilder(str(tmp_path))._parse_file(str(main))
+        assert first.dependencies == []
+
+        (tmp_path / "helpers.py").write_text("def helper():\n    pass\n")
+        second = CodeGraphBuilder(str(tmp_path))._parse_file(str(main))
+        assert second.dependencies == [os.path.join(str(tmp_path), "helpers.py")]
+
+        other_repo = tmp_path / "other"
+        other_repo.mkdir()
+        assert CodeGraphBuilder(str(other_repo))._parse_file(str(main)).dependencies == []
+
+    def test_modified_file_is_reparsed(self, tmp_path):
+        """A changed file is parsed again instead of served from the cache"""
+        shared = tmp_path / "shared.py"
+        shared.write_text("def helper(x):\n    return x\n")
+        first = CodeGraphBuilder(str(tmp_path))._parse_file(str(shared))
+
+        shared.write_text("def helper(x):\n    return x\n\n\ndef other(y):\n    return y\n")
+        os.utime(shared, ns=(0, os.stat(shared).st_mtime_ns + 1_000_000))
+        second = CodeGraphBuilder(str(tmp_path))._parse_file(str(shared))
+
+        assert second is not first
+        assert {s.name for s in second.symbols} == {"helper", "other"}
+
+    def test_cache_is_bounded(self, tmp_path, monkeypatch):
+        """Least recently used entries are evicted past the size limit"""
+        monkeypatch.setattr(code_graph, "NODE_CACHE_MAX", 2)
+        builder = CodeGraphBuilder(str(tmp_path))
+        for name in ("a", "b", "c"):
+            path = tmp_path / f"{name}.py"
+            path.write_text(f"def {name}():\n    pass\n")
+            builder._parse_file(str(path))
+
+        cached_paths = {key[0] for key in code_graph._NODE_CACHE}
+        assert str(tmp_path / "a.py") not in cached_paths
+        assert str(tmp_path / "c.py") in cached_paths
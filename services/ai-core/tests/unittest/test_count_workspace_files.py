@@ -0,0 +1,101 @@
+import itertools
+import os
+import zipfile
+
+from pr_agent.servers.workspace_utils import (
+    SOURCE_CODE_EXTENSIONS,
+    count_workspace_files,
+    extract_zip_filtered,
+    find_files_by_extension,
+    hash_workspace_files,
+    iter_workspace_files,
+    workspace_fingerprint,
+)
+
+
+class TestCountWorkspaceFiles:
+    def test_counts_nested_files_and_skips_excluded_dirs(self, tmp_path):
+        """Count files recursively without descending into .git/node_modules"""
+        (tmp_path / "src" / "pkg").mkdir(parents=True)
+        (tmp_path / "src" / "a.py").write_text("")
+        (tmp_path / "src" / "pkg" / "b.py").write_text("")
+        (tmp_path / "README.md").write_text("")
+        (tmp_path / ".git" / "objects").mkdir(parents=True)
+        (tmp_path / ".git" / "HEAD").write_text("")
+        (tmp_path / "node_modules" / "x").mkdir(parents=True)
+        (tmp_path / "node_modules" / "x" / "index.js").write_text("")
+        assert count_workspace_files(str(tmp_path)) == 3
+
+    def test_custom_skip_dirs(self, tmp_path):
+        """Honor an explicit skip list"""
+        (tmp_path / "build").mkdir()
+        (tmp_path / "build" / "out.js").write_text("")
+        (tmp_path / "main.py").write_text("")
+        assert count_workspace_files(str(tmp_path), skip_dirs={"build"}) == 1
+        assert count_workspace_files(str(tmp_path), skip_dirs=set()) == 2
+
+    def test_missing_root(self, tmp_path):
+        """Return zero for a directory that does not exist"""
+        assert count_workspace_files(str(tmp_path / "missing")) == 0
+
+
+class TestIterWorkspaceFiles:
+    def test_filters_by_extension_and_skips_excluded_dirs(self, tmp_path):
+        """Yield relative paths of source files outside excluded directories"""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "a.py").write_text("")
+        (tmp_path / "src" / "App.TS").write_text("")
+        (tmp_path / "README.md").write_text("")
+        (tmp_path / "node_modules").mkdir()
+        (tmp_path / "node_modules" / "index.js").write_text("")
+        found = sorted(p.replace("\\", "/") for p in iter_workspace_files(str(tmp_path), SOURCE_CODE_EXTENSIONS))
+        assert found == ["src/App.TS", "src/a.py"]
+
+    def test_find_files_by_extension_keeps_suffix_matching(self, tmp_path):
+        """Match full suffixes such as .test.js and honour custom exclusions"""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "a.test.js").write_text("")
+        (tmp_path / "src" / "b.py").write_text("")
+        (tmp_path / "gen").mkdir()
+        (tmp_path / "gen" / "c.test.js").write_text("")
+        assert find_files_by_extension(str(tmp_path), [".test.js"], ["gen"]) == [os.path.join("src", "a.test.js")]
+
+    def test_stops_early_with_islice(self, tmp_path):
+        """Take only the first matches without walking the whole tree"""
+        for i in range(5):
+            (tmp_path / f"m{i}.py").write_text("")
+        assert len(list(itertools.islice(iter_workspace_files(str(tmp_path), SOURCE_CODE_EXTENSIONS), 2))) == 2
+
+
+class TestWorkspaceFingerprint:
+    def test_hashes_files_outside_excluded_dirs(self, tmp_path):
+        """Hash each file by relative path, skipping .git"""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "a.py").write_text("x = 1\n")
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "HEAD").write_text("ref")
+        assert list(hash_workspace_files(str(tmp_path))) == ["src/a.py"]
+
+    def test_changes_with_content_only(self, tmp_path):
+        """Same content gives the same fingerprint; an edit changes it"""
+        (tmp_path / "a.py").write_text("x = 1\n")
+        before = workspace_fingerprint(str(tmp_path))
+        assert workspace_fingerprint(str(tmp_path)) == before
+        (tmp_path / "a.py").write_text("x = 2\n")
+        assert workspace_fingerprint(str(tmp_path)) != before
+
+
+class TestExtractZipFiltered:
+    def test_skips_dependency_dirs_but_keeps_git(self, tmp_path):
+        """Leave node_modules out of the workspace; keep sources and .git"""
+        zip_path = tmp_path / "repo.zip"
+        with zipfile.ZipFile(zip_path, "w") as archive:
+            archive.writestr("repo/src/a.py", "x = 1\n")
+            archive.writestr("repo/node_modules/lib/index.js", "")
+            archive.writestr("repo/.git/HEAD", "ref")
+        dest = tmp_path / "out"
+        with zipfile.ZipFile(zip_path) as archive:
+            assert extract_zip_filtered(archive, str(dest)) == 2
+        assert (dest / "repo" / "src" / "a.py").exists()
+        assert (dest / "repo" / ".git" / "HEAD").exists()
+        assert not (dest / "repo" / "node_modules").exists()
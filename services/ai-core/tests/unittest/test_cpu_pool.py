@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from pr_agent.servers import cpu_pool
+from pr_agent.servers.context_builder import extract_code_snippet
+
+SOURCE = "def f():\n    x = 1\n    return x\n"
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(cpu_pool, "_pool", None)
+    monkeypatch.setattr(cpu_pool, "_pool_disabled", False)
+    yield
+    if cpu_pool._pool is not None:
+        cpu_pool._pool.shutdown(wait=True)
+
+
+class TestRunCpuBound:
+    def test_process_pool(self, fresh_pool):
+        """Run a module-level function in a worker process"""
+        result = asyncio.run(cpu_pool.run_cpu_bound(extract_code_snippet, SOURCE, 2, 10))
+        assert result == extract_code_snippet(SOURCE, 2, 10)
+        assert cpu_pool._pool is not None
+
+    def test_thread_fallback(self, fresh_pool, monkeypatch):
+        """Fall back to a thread when the pool is disabled"""
+        monkeypatch.setattr(cpu_pool, "_pool_disabled", True)
+        result = asyncio.run(cpu_pool.run_cpu_bound(extract_code_snippet, SOURCE, 2, 10))
+        assert result == extract_code_snippet(SOURCE, 2, 10)
+        assert cpu_pool._pool is None
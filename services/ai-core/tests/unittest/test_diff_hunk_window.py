@@ -0,0 +1,53 @@
+from pr_agent.servers.context_builder import parse_diff_hunks, window_around_hunks
+
+GIT_DIFF = """diff --git a/src/app.py b/src/app.py
+index 1111111..2222222 100644
+--- a/src/app.py
++++ b/src/app.py
+@@ -10,3 +10,4 @@ def run():
+ a
++b
+ c
+@@ -40 +41 @@
+-x
++y
+diff --git a/old.py b/old.py
+deleted file mode 100644
+--- a/old.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-gone
+-gone
+"""
+
+
+class TestParseDiffHunks:
+    def test_new_file_ranges(self):
+        """Hunks map to new-file line ranges; deleted files are ignored"""
+        assert parse_diff_hunks(GIT_DIFF) == {"src/app.py": [(10, 13), (41, 41)]}
+
+    def test_empty_diff(self):
+        assert parse_diff_hunks("") == {}
+
+
+class TestWindowAroundHunks:
+    CONTENT = "\n".join(f"line {i}" for i in range(1, 101))
+
+    def test_windows_keep_line_numbers(self):
+        """Only lines near the hunks are shown, numbered as in the file"""
+        text = window_around_hunks(self.CONTENT, [(50, 50)], margin=2)
+        assert text.splitlines() == [
+            "--- skipped 47 lines ---",
+            "   48 | line 48",
+            "   49 | line 49",
+            "   50 | line 50",
+            "   51 | line 51",
+            "   52 | line 52",
+            "--- skipped 48 lines ---",
+        ]
+
+    def test_overlapping_windows_merge(self):
+        """Nearby hunks share one window"""
+        text = window_around_hunks(self.CONTENT, [(10, 10), (13, 13)], margin=2)
+        assert text.count("skipped") == 2
+        assert "   8 | line 8" in text and "   15 | line 15" in text
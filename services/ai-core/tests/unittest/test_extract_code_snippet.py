@@ -0,0 +1,59 @@
+from pr_agent.servers.context_builder import extract_code_snippet, extract_code_snippets
+
+PY_SOURCE = """import os
+
+
+def outer():
+    x = 1
+    return x
+"""
+
+JS_SOURCE = """const a = 1;
+
+class Store {
+  save(item) {
+    const key = "secret";
+    return key + item;
+  }
+}
+
+function helper() {
+  return 2;
+}
+"""
+
+
+class TestExtractCodeSnippet:
+    def test_python_scope(self):
+        """Snippet spans the enclosing Python function"""
+        snippet, start, end = extract_code_snippet(PY_SOURCE, 5, 10, "a.py")
+        assert (start, end) == (3, 6)
+        assert ">>>    5 |     x = 1" in snippet
+
+    def test_js_method_scope(self):
+        """Snippet spans the innermost enclosing JS method, not the class"""
+        snippet, start, end = extract_code_snippet(JS_SOURCE, 5, 10, "store.js")
+        assert (start, end) == (3, 8)
+        assert '>>>    5 |     const key = "secret";' in snippet
+
+    def test_ts_uses_js_parser(self):
+        """TypeScript files get scope detection too"""
+        _, start, end = extract_code_snippet(JS_SOURCE, 11, 10, "store.ts")
+        assert (start, end) == (9, 12)
+
+    def test_unknown_language_line_slice(self):
+        """Files without a parser fall back to a context window"""
+        content = "\n".join(f"line {i}" for i in range(1, 31))
+        _, start, end = extract_code_snippet(content, 15, 3, "notes.txt")
+        assert (start, end) == (12, 18)
+
+    def test_python_syntax_error_falls_back(self):
+        """Unparseable Python falls back to a context window"""
+        content = "def broken(:\n" + "\n".join(f"x{i} = {i}" for i in range(20))
+        _, start, end = extract_code_snippet(content, 10, 2, "broken.py")
+        assert (start, end) == (8, 12)
+
+    def test_batch_matches_single(self):
+        """Batch extraction returns the same snippets as one call per line"""
+        batch = extract_code_snippets(JS_SOURCE, [1, 5, 11], 2, "store.js")
+        assert batch == [extract_code_snippet(JS_SOURCE, line, 2, "store.js") for line in (1, 5, 11)]
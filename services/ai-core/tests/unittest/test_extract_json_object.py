@@ -0,0 +1,59 @@
+import dataclasses
+import json
+from collections import deque
+
+import pytest
+
+from pr_agent.algo.utils import extract_json_object, fast_json_dumps, fast_json_loads, json_yaml
+
+
+class TestExtractJsonObject:
+    def test_bare_json(self):
+        """Parse a response that is only a JSON object"""
+        assert extract_json_object('{"summary": "ok", "fixes": []}') == {"summary": "ok", "fixes": []}
+
+    def test_fenced_json(self):
+        """Strip a ```json fence without a regex pass"""
+        text = '```json\n{"summary": "ok", "fixes": [{"filename": "a.py"}]}\n```'
+        assert extract_json_object(text) == {"summary": "ok", "fixes": [{"filename": "a.py"}]}
+
+    def test_json_wrapped_in_prose(self):
+        """Decode the first object when the model adds prose around it"""
+        text = 'Here is the fix:\n{"fixed_snippet": "x = 1"}\nLet me know if you need more.'
+        assert extract_json_object(text) == {"fixed_snippet": "x = 1"}
+
+    def test_control_characters_non_strict(self):
+        """Allow raw newlines inside strings when strict=False"""
+        text = '{"fixed_snippet": "a\nb"}'
+        with pytest.raises(json.JSONDecodeError):
+            extract_json_object(text)
+        assert extract_json_object(text, strict=False) == {"fixed_snippet": "a\nb"}
+
+    def test_no_object(self):
+        """Raise JSONDecodeError when the response has no JSON object"""
+        with pytest.raises(json.JSONDecodeError):
+            extract_json_object("no json here")
+
+
+class TestFastJsonLoads:
+    def test_bytes_and_str(self):
+        """Accept both str and bytes input"""
+        assert fast_json_loads('{"a": [1, 2]}') == {"a": [1, 2]}
+        assert fast_json_loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+class TestFastJsonDumps:
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_converts_non_json_types(self, monkeypatch, use_orjson):
+        """Serialize deques and dataclasses the same way with or without orjson"""
+        if not use_orjson:
+            monkeypatch.setattr(json_yaml, "orjson", None)
+        elif json_yaml.orjson is None:
+            pytest.skip("orjson not installed")
+
+        @dataclasses.dataclass
+        class Finding:
+            line: int
+
+        data = {"logs": deque(["a", "{b}"]), "finding": Finding(3), "text": "é"}
+        assert json.loads(fast_json_dumps(data)) == {"logs": ["a", "{b}"], "finding": {"line": 3}, "text": "é"}
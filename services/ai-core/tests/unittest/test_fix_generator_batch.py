@@ -0,0 +1,151 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from pr_agent.algo import fix_generator
+from pr_agent.algo.fix_generator import FixGenerator, FixType
+from pr_agent.algo.response_cache import ResponseCache
+
+FILE_CONTENT = "\n".join(f"line{i}" for i in range(1, 41))
+
+
+class _FakeAIHandler:
+    def __init__(self, response):
+        self.response = response
+        self.prompts = []
+
+    async def chat_completion(self, model, system, user):
+        self.prompts.append(user)
+        return self.response, "stop"
+
+
+def _fix(index, line):
+    return {
+        "issue_index": index,
+        "original_code": f"line{line}",
+        "fixed_code": f"fixed{line}",
+        "explanation": "fix",
+        "start_line": line,
+        "end_line": line,
+    }
+
+
+class TestGenerateFixesForFile:
+    def setup_method(self):
+        fix_generator._FIX_CACHE = ResponseCache()
+
+    def test_one_call_for_all_issues_of_a_file(self):
+        """Send a single prompt and map the returned fixes back to their issues"""
+        response = "```json\n" + json.dumps({"fixes": [_fix(1, 3), _fix(7, 1), _fix(2, 30)]}) + "\n```"
+        handler = _FakeAIHandler(response)
+        issues = [
+            {"key": "a", "message": "sql", "line": 3, "type": "sql-injection"},
+            {"key": "b", "message": "bug", "line": 30},
+        ]
+
+        fixes = asyncio.run(FixGenerator(handler).generate_fixes_for_issues(issues, "f.py", FILE_CONTENT))
+
+        assert len(handler.prompts) == 1
+        assert [(fix.issue_id, fix.fixed_code) for fix in fixes] == [("a", "fixed3"), ("b", "fixed30")]
+        assert fixes[0].fix_type == FixType.SECURITY
+
+    def test_falls_back_to_per_issue_prompts(self):
+        """Prompt per issue when the batched response can't be parsed"""
+        handler = _FakeAIHandler("not json")
+        issues = [{"key": "a", "line": 3}, {"key": "b", "line": 30}]
+
+        fixes = asyncio.run(FixGenerator(handler).generate_fixes_for_issues(issues, "f.py", FILE_CONTENT))
+
+        assert fixes == []
+        assert len(handler.prompts) == 3
+
+
+class TestOriginalCodeFound:
+    def test_matches_plain_substring_check(self):
+        """Agree with `in` whether or not the claimed line range is right"""
+        offsets = fix_generator.line_offsets(FILE_CONTENT)
+        for original, start, end in [("line3", 3, 3), ("line3\nline4", 30, 31), ("line7", 0, 99), ("nope", 1, 2)]:
+            data = {"original_code": original, "start_line": start, "end_line": end}
+            assert FixGenerator._original_code_found(data, FILE_CONTENT, offsets) == (original in FILE_CONTENT)
+
+
+class TestApplyFixes:
+    def test_apply_several_fixes_bottom_up(self):
+        """Apply fixes in any order against one offset table"""
+        content = "a\nb\nc\nd\n"
+        fixes = [
+            fix_generator.GeneratedFix("1", "m", FixType.BUG, "f.py", 1, 1, "a", "A1\nA2", "x", 1.0),
+            fix_generator.GeneratedFix("2", "m", FixType.BUG, "f.py", 3, 4, "c\nd", "CD", "x", 1.0),
+        ]
+        assert fix_generator.apply_fixes_to_content(content, fixes) == "A1\nA2\nb\nCD\n"
+
+    def test_single_fix_keeps_trailing_newline(self):
+        """Add the newline the replaced lines ended with"""
+        fix = fix_generator.GeneratedFix("1", "m", FixType.BUG, "f.py", 2, 2, "b", "B", "x", 1.0)
+        assert fix.apply_to_content("a\nb\nc") == "a\nB\nc"
+
+
+class TestStaticFixes:
+    def test_known_rule_skips_the_llm(self):
+        """Fix a weak hash from the rule table without prompting"""
+        handler = _FakeAIHandler("not json")
+        content = "import hashlib\ndigest = hashlib.md5(data).hexdigest()\n"
+        issues = [{"key": "a", "rule": "python:S4790", "type": "VULNERABILITY", "line": 2}]
+
+        fixes = asyncio.run(FixGenerator(handler).generate_fixes_for_issues(issues, "f.py", content))
+
+        assert handler.prompts == []
+        assert fixes[0].fixed_code == "digest = hashlib.sha256(data).hexdigest()"
+        # Changing the algorithm changes stored digests, so it is offered as a suggestion only
+        assert not fixes[0].is_validated
+        assert fixes[0].confidence < 0.95
+
+    def test_weak_hash_declines_non_security_use(self):
+        """Leave usedforsecurity=False checksums and multi-line calls alone"""
+        assert fix_generator._fix_weak_hash("h = hashlib.md5(data, usedforsecurity=False)", 1, []) is None
+        assert fix_generator._fix_weak_hash("h = hashlib.md5(", 1, []) is None
+
+    def test_template_can_decline(self):
+        """Leave the issue to the LLM when the template doesn't apply"""
+        assert fix_generator._fix_hardcoded_secret('password = "admin"', 1, ['password = "admin"']) is None
+        assert fix_generator._fix_loose_equality('if (a == "x == y") {', 1, []) is None
+        assert fix_generator._fix_loose_equality("if (a == b && c !== d) {", 1, [])[1] == "if (a === b && c !== d) {"
+
+    def test_loose_equality_declines_nullish_comparisons(self):
+        """Keep `== null`, which also matches undefined, for the LLM"""
+        assert fix_generator._fix_loose_equality("if (x == null || a == b) {", 1, []) is None
+        assert fix_generator._fix_loose_equality("if (x != undefined) {", 1, []) is None
+
+    def test_loose_equality_declines_regex_literals_and_comments(self):
+        """Don't rewrite operators a regex literal or comment may hold"""
+        assert fix_generator._fix_loose_equality("const re = /a==b/; if (a == b) {", 1, []) is None
+        assert fix_generator._fix_loose_equality("if (a == b) { // was a == c", 1, []) is None
+
+    def test_loose_equality_rewrites_a_single_operator_only(self):
+        """Decline lines with several loose operators, since only one was flagged"""
+        assert fix_generator._fix_loose_equality("if (a == b || c != d) {", 1, []) is None
+        assert fix_generator._fix_loose_equality("if (a != b) {", 1, [])[1] == "if (a !== b) {"
+
+
+class TestSeverityFilter:
+    def test_minor_issues_are_not_sent(self):
+        """Skip issues below the fix severities without calling the LLM"""
+        handler = _FakeAIHandler("not json")
+        issues = [{"key": "a", "line": 3, "severity": "MINOR"}, {"key": "b", "line": 30, "severity": "INFO"}]
+
+        assert asyncio.run(FixGenerator(handler).generate_fixes_for_issues(issues, "f.py", FILE_CONTENT)) == []
+        assert handler.prompts == []
+
+
+class TestUnifiedFindingConversion:
+    def test_placeholder_fix_is_skipped(self):
+        """Return None for a fix without original or fixed code"""
+        finding = SimpleNamespace(
+            id="a", title="t", category="style", file="f.py", start_line=1, end_line=1, confidence=0.5,
+            fix=SimpleNamespace(original_code="x = 1", fixed_code="", explanation=""),
+        )
+        assert fix_generator.unified_finding_to_generated_fix(finding) is None
+
+        finding.fix.fixed_code = "x = 2"
+        fix = fix_generator.unified_finding_to_generated_fix(finding)
+        assert (fix.fix_type, fix.fixed_code) == (FixType.STYLE, "x = 2")
@@ -0,0 +1,116 @@
+import asyncio
+
+from pr_agent.servers import job_manager
+from pr_agent.servers.job_manager import JOBS, create_job, new_job_logs, update_job_log
+
+
+class TestJobLogs:
+    def test_logs_are_bounded(self):
+        """Drop the oldest lines once MAX_JOB_LOGS is reached"""
+        logs = new_job_logs("first")
+        for i in range(job_manager.MAX_JOB_LOGS + 10):
+            logs.append(str(i))
+        assert len(logs) == job_manager.MAX_JOB_LOGS
+        assert logs[0] == "10"
+
+    def test_update_job_log_outside_loop_flushes_immediately(self):
+        """Write straight through when no event loop is running"""
+        create_job("log-sync")
+        try:
+            assert update_job_log("log-sync", "value={not a field}")
+            assert list(JOBS["log-sync"]["logs"]) == ["value={not a field}"]
+            assert job_manager._log_buffer == []
+        finally:
+            JOBS.pop("log-sync", None)
+
+    def test_update_job_log_batches_inside_loop(self):
+        """Buffer lines in a running loop and flush them periodically"""
+        async def run():
+            create_job("log-async")
+            update_job_log("log-async", "one")
+            update_job_log("log-async", "two")
+            assert len(job_manager._log_buffer) == 2
+            await asyncio.sleep(job_manager.LOG_FLUSH_INTERVAL * 2)
+            assert job_manager._log_buffer == []
+
+        try:
+            asyncio.run(run())
+        finally:
+            JOBS.pop("log-async", None)
+
+
+class _FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.ops.append((name, args, kwargs))
+
+    async def execute(self):
+        for name, args, kwargs in self.ops:
+            key = args[0]
+            if name == "hset":
+                self.store.setdefault(key, {}).update(kwargs["mapping"])
+            elif name == "rpush":
+                self.store.setdefault(key, []).extend(args[1:])
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self.store)
+
+    async def hgetall(self, key):
+        return dict(self.store.get(key, {}))
+
+    async def lrange(self, key, start, end):
+        return list(self.store.get(key, []))
+
+
+class TestJobSnapshots:
+    def test_snapshot_round_trip(self, monkeypatch):
+        """Mirror job state and log lines to Redis and read them back"""
+        fake = _FakeRedis()
+        monkeypatch.setattr(job_manager, "REDIS_URL", "redis://test")
+        monkeypatch.setattr(job_manager, "aioredis", object())
+        monkeypatch.setattr(job_manager, "_get_redis", lambda: fake)
+
+        async def run():
+            create_job("snap")
+            update_job_log("snap", "started")
+            job_manager.update_job_status("snap", "completed")
+            await job_manager.flush_job_snapshots()
+            return await job_manager.load_job_snapshot("snap")
+
+        try:
+            snapshot = asyncio.run(run())
+        finally:
+            JOBS.pop("snap", None)
+        assert snapshot["status"] == "completed"
+        assert snapshot["logs"] == ["started"]
+        assert snapshot["progress"]["total"] == 0
+
+    def test_disabled_without_redis_url(self, monkeypatch):
+        """Return nothing when no Redis is configured"""
+        monkeypatch.setattr(job_manager, "REDIS_URL", "")
+        assert asyncio.run(job_manager.load_job_snapshot("missing")) is None
+
+
+class TestCleanupOldJobs:
+    def test_removes_only_expired_jobs(self, monkeypatch):
+        """Pop jobs past the age limit and leave newer ones alone"""
+        monkeypatch.setattr(job_manager, "_job_created_heap", [])
+        monkeypatch.setattr(job_manager, "_job_created_ts", {})
+        try:
+            create_job("old")
+            create_job("new")
+            job_manager._job_created_heap[:] = [(0.0, "old"), (job_manager._job_created_ts["new"], "new")]
+            job_manager._job_created_ts["old"] = 0.0
+            assert job_manager.cleanup_old_jobs(max_age_hours=1) == 1
+            assert "old" not in JOBS and "new" in JOBS
+        finally:
+            JOBS.pop("old", None)
+            JOBS.pop("new", None)
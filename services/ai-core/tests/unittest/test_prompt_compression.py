@@ -0,0 +1,34 @@
+import pytest
+
+from pr_agent.algo import prompt_compression
+from pr_agent.algo.prompt_compression import compress_prose
+from pr_agent.config_loader import get_settings
+
+
+@pytest.fixture
+def compression_enabled(monkeypatch):
+    # Force the dependency-free fallback so results do not depend on llmlingua being installed
+    monkeypatch.setattr(prompt_compression, "_compressor_initialized", True)
+    monkeypatch.setattr(prompt_compression, "_compressor", None)
+    get_settings().set("llmlingua.enabled", True)
+    get_settings().set("llmlingua.min_prompt_chars", 100)
+    yield
+    get_settings().set("llmlingua.enabled", False)
+    get_settings().set("llmlingua.min_prompt_chars", prompt_compression.DEFAULT_MIN_PROMPT_CHARS)
+
+
+class TestCompressProse:
+    def test_disabled_returns_input(self):
+        """Leave text untouched when compression is disabled"""
+        text = "- a\n- a\n"
+        assert compress_prose(text, prompt_chars=10_000) == text
+
+    def test_short_prompt_returns_input(self, compression_enabled):
+        """Skip compression below the prompt length threshold"""
+        text = "- a\n- a\n"
+        assert compress_prose(text, prompt_chars=50) == text
+
+    def test_fallback_dedupes_lines(self, compression_enabled):
+        """Drop repeated findings and collapse whitespace in the fallback path"""
+        text = "- Hardcoded   secret (Line 3)\n\n- Hardcoded secret (Line 3)\n- SQL injection (Line 9)\n"
+        assert compress_prose(text, prompt_chars=1000) == "- Hardcoded secret (Line 3)\n- SQL injection (Line 9)"
@@ -0,0 +1,39 @@
+from pr_agent.servers.context_builder import resolve_import_path
+
+
+def _touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("")
+    return str(path)
+
+
+class TestResolveImportPath:
+    def test_module_file(self, tmp_path):
+        """Resolve a dotted module to its .py file"""
+        expected = _touch(tmp_path / "pkg" / "mod.py")
+        assert resolve_import_path(str(tmp_path), "pkg.mod") == expected
+
+    def test_package_init(self, tmp_path):
+        """Resolve a package to its __init__.py"""
+        expected = _touch(tmp_path / "pkg" / "__init__.py")
+        assert resolve_import_path(str(tmp_path), "pkg") == expected
+
+    def test_src_layout(self, tmp_path):
+        """Resolve modules under a src/ folder"""
+        expected = _touch(tmp_path / "src" / "pkg" / "mod.py")
+        assert resolve_import_path(str(tmp_path), "pkg.mod") == expected
+
+    def test_precedence(self, tmp_path):
+        """Prefer mod.py over mod/__init__.py over src/mod.py"""
+        _touch(tmp_path / "src" / "mod.py")
+        init_path = _touch(tmp_path / "mod" / "__init__.py")
+        assert resolve_import_path(str(tmp_path), "mod") == init_path
+        file_path = _touch(tmp_path / "mod.py")
+        assert resolve_import_path(str(tmp_path), "mod") == file_path
+
+    def test_unknown_module_and_skipped_dirs(self, tmp_path):
+        """Return None for unknown modules and never index vendored dirs"""
+        _touch(tmp_path / "node_modules" / "lib.py")
+        _touch(tmp_path / "app.py")
+        assert resolve_import_path(str(tmp_path), "lib") is None
+        assert resolve_import_path(str(tmp_path), "missing.mod") is None
@@ -0,0 +1,40 @@
+from pr_agent.algo import response_cache
+from pr_agent.algo.response_cache import ResponseCache, prompt_cache_key
+
+
+class TestPromptCacheKey:
+    def test_stable_and_part_sensitive(self):
+        """Same parts give the same key; shifting text between parts does not collide"""
+        assert prompt_cache_key("model", "sys", "user") == prompt_cache_key("model", "sys", "user")
+        assert prompt_cache_key("ab", "c") != prompt_cache_key("a", "bc")
+        assert prompt_cache_key("m", None) == prompt_cache_key("m", "")
+
+
+class TestResponseCache:
+    def test_get_set(self):
+        cache = ResponseCache(maxsize=4, ttl=60)
+        assert cache.get("k") is None
+        cache.set("k", {"review": "ok"})
+        assert cache.get("k") == {"review": "ok"}
+
+    def test_lru_eviction(self):
+        """Evict the least recently used entry once maxsize is exceeded"""
+        cache = ResponseCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_expiry(self, monkeypatch):
+        """Drop entries older than ttl"""
+        now = [1000.0]
+        monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+        cache = ResponseCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        now[0] += 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
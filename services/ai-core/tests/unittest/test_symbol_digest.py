@@ -0,0 +1,42 @@
+from pr_agent.servers.context_builder import get_file_symbol_digest, get_symbol_digest
+
+SAMPLE = '''"""Module docstring."""
+import os
+
+
+def helper(a, b: int = 1) -> str:
+    """Join things.
+
+    Longer description.
+    """
+    return str(a) + os.sep * b
+
+
+class Service(Base):
+    """Does work."""
+
+    async def run(self, job_id):
+        return job_id
+'''
+
+
+class TestSymbolDigest:
+    def test_signatures_and_docstrings_only(self):
+        """Keep headers and first docstring lines, drop bodies and imports"""
+        assert get_symbol_digest(SAMPLE) == "\n".join([
+            "def helper(a, b: int=1) -> str: ...",
+            '    """Join things."""',
+            "class Service(Base):",
+            '    """Does work."""',
+            "    async def run(self, job_id): ...",
+        ])
+
+    def test_syntax_error_returns_none(self):
+        """Signal unparseable files so callers can fall back to truncation"""
+        assert get_symbol_digest("def broken(:\n") is None
+
+    def test_file_digest(self, tmp_path):
+        """Read and digest a file from disk"""
+        path = tmp_path / "mod.py"
+        path.write_text(SAMPLE)
+        assert get_file_symbol_digest(str(path)) == get_symbol_digest(SAMPLE)
@@ -13,11 +13,25 @@ Usage:
 
 import argparse
 import base64
+import http.client
 import json
 import os
+import shutil
 import sys
+import tempfile
+import time
 import urllib.parse
-import urllib.request
+
+try:
+    import orjson  # optional; parses the response bytes without decoding them first
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# SonarQube answers 502-504 while it is still starting; those are retried on the same connection
+RETRY_STATUSES = {502, 503, 504}
+RETRY_ATTEMPTS = 4
+RETRY_BACKOFF = 0.5
 
 
 def _prompt(value: str, prompt: str) -> str:
@@ -32,32 +46,52 @@ def _prompt(value: str, prompt: str) -> str:
 def _generate_token(base_url: str, username: str, password: str, token_name: str) -> str:
     endpoint = f"{base_url.rstrip('/')}/api/user_tokens/generate"
     params = urllib.parse.urlencode({"name": token_name})
-    url = f"{endpoint}?{params}"
 
     auth_raw = f"{username}:{password}".encode("utf-8")
     auth = base64.b64encode(auth_raw).decode("ascii")
 
-    request = urllib.request.Request(url, method="POST")
-    request.add_header("Authorization", f"Basic {auth}")
-    request.add_header("Accept", "application/json")
+    headers = {"Authorization": f"Basic {auth}", "Accept": "application/json"}
+
+    parsed = urllib.parse.urlsplit(endpoint)
+    connection_cls = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+    connection = connection_cls(parsed.netloc, timeout=20)
+    path = f"{parsed.path}?{params}"
 
     try:
-        with urllib.request.urlopen(request, timeout=20) as response:
-            body = response.read().decode("utf-8")
-            data = json.loads(body)
-            token = data.get("token")
-            if not token:
-                raise RuntimeError(f"Token missing in response: {body}")
-            return token
+        for attempt in range(RETRY_ATTEMPTS):
+            last_attempt = attempt == RETRY_ATTEMPTS - 1
+            try:
+                connection.request("POST", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (ConnectionError, http.client.HTTPException):
+                if last_attempt:
+                    raise
+                # The server dropped the connection; the next request opens a new one
+                connection.close()
+            else:
+                if response.status not in RETRY_STATUSES or last_attempt:
+                    if response.status >= 400:
+                        raise RuntimeError(f"HTTP Error {response.status}: {response.reason}")
+                    data = _json_loads(body)
+                    token = data.get("token")
+                    if not token:
+                        raise RuntimeError(f"Token missing in response: {body.decode('utf-8', errors='replace')}")
+                    return token
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
     except Exception as exc:
         raise RuntimeError(f"Token generation failed: {exc}")
+    finally:
+        connection.close()
 
 
 def _update_env_file(env_path: str, token: str) -> None:
+    original = None
     lines = []
     if os.path.exists(env_path):
         with open(env_path, "r", encoding="utf-8") as f:
-            lines = f.read().splitlines()
+            original = f.read()
+        lines = original.splitlines()
 
     updated = False
     out_lines = []
@@ -71,8 +105,19 @@ def _update_env_file(env_path: str, token: str) -> None:
     if not updated:
         out_lines.append(f"SONARQUBE_TOKEN={token}")
 
-    with open(env_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(out_lines) + "\n")
+    content = "\n".join(out_lines) + "\n"
+    if content == original:
+        # Token already stored; leave the file alone
+        return
+
+    # Write a sibling temp file and rename it over .env, so an interrupted run never leaves it truncated
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=os.path.dirname(env_path) or ".", delete=False
+    ) as f:
+        f.write(content)
+    if original is not None:
+        shutil.copymode(env_path, f.name)
+    os.replace(f.name, env_path)
 
 
 def main() -> int:
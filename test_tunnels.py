@@ -10,13 +10,16 @@ Usage:
     python test_tunnels.py              # Auto-fetch from tunnel.md
     python test_tunnels.py --manual     # Manual URL entry
     python test_tunnels.py --update     # Test and show Render env update commands
+    python test_tunnels.py --install-deps  # pip install aiohttp first if it is missing
 """
 
 import argparse
 import asyncio
+import io
 import json
 import os
 import re
+import subprocess
 import sys
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
@@ -26,7 +29,18 @@ try:
     AIOHTTP_AVAILABLE = True
 except ImportError:
     AIOHTTP_AVAILABLE = False
-    print("⚠️  aiohttp not found. Install with: pip install aiohttp")
+
+try:
+    import orjson  # optional, faster parser for the health-check bodies
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# key=value lines such as AI_CORE_URL=https://... in tunnel.md
+_TUNNEL_VAR_RE = re.compile(r'^[ \t]*([A-Z_]+)=["\'`]*([^\s"\'`]+)', re.MULTILINE)
+
+# Probes in flight at once; the rest wait before their 15s timeout starts
+MAX_CONCURRENT_PROBES = 8
 
 # Color codes for terminal output
 class Colors:
@@ -58,6 +72,28 @@ class TunnelTester:
     
     def __init__(self):
         self.results: Dict[str, Tuple[bool, str]] = {}
+        # Created on first use (needs a running loop) and reused so repeated probes keep their connections
+        self._session: Optional["aiohttp.ClientSession"] = None
+    
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=MAX_CONCURRENT_PROBES, limit_per_host=4, keepalive_timeout=30, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+    
+    async def aclose(self):
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
     
     def parse_tunnel_md(self, filepath: str = "tunnel.md") -> Dict[str, str]:
         """Parse tunnel URLs from tunnel.md file"""
@@ -65,24 +101,15 @@ class TunnelTester:
             print(f"{Colors.FAIL}✗ {filepath} not found{Colors.ENDC}")
             return {}
         
-        urls = {}
         with open(filepath, 'r') as f:
             content = f.read()
-            
-            # Parse key=value lines
-            for line in content.split('\n'):
-                line = line.strip()
-                if '=' in line and not line.startswith('#') and 'http' in line:
-                    # Match patterns like: AI_CORE_URL=https://...
-                    match = re.match(r'^([A-Z_]+)=(.+)$', line)
-                    if match:
-                        key, value = match.groups()
-                        # Clean up URL (remove trailing quotes, backticks, etc.)
-                        value = value.strip('"\'`').split()[0]
-                        if value.startswith('http'):
-                            urls[key] = value
         
-        return urls
+        # One scan over the file; the value is its first token without surrounding quotes/backticks
+        return {
+            match.group(1): match.group(2)
+            for match in _TUNNEL_VAR_RE.finditer(content)
+            if match.group(2).startswith('http')
+        }
     
     def create_endpoints(self, urls: Dict[str, str]) -> List[TunnelEndpoint]:
         """Create endpoint objects from URL dictionary"""
@@ -118,7 +145,7 @@ class TunnelTester:
         
         return endpoints
     
-    async def test_endpoint(self, endpoint: TunnelEndpoint, session: aiohttp.ClientSession) -> Tuple[bool, str]:
+    async def test_endpoint(self, endpoint: TunnelEndpoint, session: "aiohttp.ClientSession") -> Tuple[bool, str]:
         """Test a single endpoint"""
         full_url = endpoint.url.rstrip('/') + endpoint.health_path
         
@@ -135,23 +162,23 @@ class TunnelTester:
                     try:
                         text = await response.text()
                         
-                        # Try as JSON first
-                        try:
-                            data = json.loads(text)
-                            # Check if expected content is in JSON
-                            if isinstance(data, dict):
+                        needle = endpoint.expected_content.lower()
+                        haystack = text.lower()
+                        
+                        if not text.lstrip().startswith('{'):
+                            # Not a JSON object: the raw-text check below would apply anyway, so skip the parse
+                            found = needle in haystack
+                        else:
+                            try:
+                                data = _json_loads(text)
                                 # Check any value in the dict
-                                found = any(endpoint.expected_content.lower() in str(v).lower() 
-                                          for v in data.values())
-                                if not found:
-                                    return False, f"Content mismatch: {text[:100]}"
-                            else:
-                                if endpoint.expected_content.lower() not in text.lower():
-                                    return False, f"Content mismatch: {text[:100]}"
-                        except json.JSONDecodeError:
-                            # Not JSON, check raw text
-                            if endpoint.expected_content.lower() not in text.lower():
-                                return False, f"Content mismatch: {text[:100]}"
+                                found = any(needle in str(v).lower() for v in data.values())
+                            except json.JSONDecodeError:
+                                # Not JSON, check raw text
+                                found = needle in haystack
+                        
+                        if not found:
+                            return False, f"Content mismatch: {text[:100]}"
                     except Exception as e:
                         return False, f"Content check failed: {e}"
                 
@@ -170,17 +197,24 @@ class TunnelTester:
             print(f"{Colors.FAIL}Cannot run tests without aiohttp{Colors.ENDC}")
             return {}
         
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.test_endpoint(ep, session) for ep in endpoints]
-            results = await asyncio.gather(*tasks)
-            
-            return {ep.name: result for ep, result in zip(endpoints, results)}
+        session = self._get_session()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+        
+        async def guarded(ep: TunnelEndpoint) -> Tuple[bool, str]:
+            async with semaphore:
+                return await self.test_endpoint(ep, session)
+        
+        results = await asyncio.gather(*(guarded(ep) for ep in endpoints))
+        
+        return {ep.name: result for ep, result in zip(endpoints, results, strict=True)}
     
     def print_results(self, endpoints: List[TunnelEndpoint], results: Dict[str, Tuple[bool, str]]):
         """Print formatted test results"""
-        print(f"\n{Colors.BOLD}{Colors.HEADER}{'='*70}{Colors.ENDC}")
-        print(f"{Colors.BOLD}{Colors.HEADER}  Tunnel Connectivity Test Results{Colors.ENDC}")
-        print(f"{Colors.BOLD}{Colors.HEADER}{'='*70}{Colors.ENDC}\n")
+        # Build the report first and write it out in one go
+        buf = io.StringIO()
+        print(f"\n{Colors.BOLD}{Colors.HEADER}{'='*70}{Colors.ENDC}", file=buf)
+        print(f"{Colors.BOLD}{Colors.HEADER}  Tunnel Connectivity Test Results{Colors.ENDC}", file=buf)
+        print(f"{Colors.BOLD}{Colors.HEADER}{'='*70}{Colors.ENDC}\n", file=buf)
         
         all_passed = True
         for endpoint in endpoints:
@@ -190,38 +224,43 @@ class TunnelTester:
                 status_color = Colors.OKGREEN if passed else Colors.FAIL
                 status_symbol = "✓" if passed else "✗"
                 
-                print(f"{status_color}{status_symbol} {endpoint.name}{Colors.ENDC}")
-                print(f"  URL: {Colors.OKCYAN}{endpoint.url}{endpoint.health_path}{Colors.ENDC}")
-                print(f"  Status: {status_color}{message}{Colors.ENDC}\n")
+                print(f"{status_color}{status_symbol} {endpoint.name}{Colors.ENDC}", file=buf)
+                print(f"  URL: {Colors.OKCYAN}{endpoint.url}{endpoint.health_path}{Colors.ENDC}", file=buf)
+                print(f"  Status: {status_color}{message}{Colors.ENDC}\n", file=buf)
                 
                 if not passed:
                     all_passed = False
         
-        print(f"{Colors.BOLD}{Colors.HEADER}{'='*70}{Colors.ENDC}")
+        print(f"{Colors.BOLD}{Colors.HEADER}{'='*70}{Colors.ENDC}", file=buf)
         if all_passed:
-            print(f"{Colors.OKGREEN}{Colors.BOLD}✓ All tunnels are operational!{Colors.ENDC}\n")
+            print(f"{Colors.OKGREEN}{Colors.BOLD}✓ All tunnels are operational!{Colors.ENDC}\n", file=buf)
         else:
-            print(f"{Colors.FAIL}{Colors.BOLD}✗ Some tunnels failed. Check local services or restart tunnels.{Colors.ENDC}\n")
+            print(f"{Colors.FAIL}{Colors.BOLD}✗ Some tunnels failed. "
+                  f"Check local services or restart tunnels.{Colors.ENDC}\n", file=buf)
         
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
         return all_passed
     
     def generate_render_env_script(self, urls: Dict[str, str]):
         """Generate commands to update Render environment variables"""
-        print(f"\n{Colors.BOLD}{Colors.OKCYAN}Render Environment Variable Update Commands:{Colors.ENDC}\n")
-        print(f"{Colors.WARNING}# Copy these to Render Dashboard → Environment Variables{Colors.ENDC}\n")
+        buf = io.StringIO()
+        print(f"\n{Colors.BOLD}{Colors.OKCYAN}Render Environment Variable Update Commands:{Colors.ENDC}\n", file=buf)
+        print(f"{Colors.WARNING}# Copy these to Render Dashboard → Environment Variables{Colors.ENDC}\n", file=buf)
         
-        for key, value in urls.items():
-            # Skip webhook URL as it's derived
-            if 'WEBHOOK' not in key:
-                print(f"{key}={value}")
+        # Skip webhook URL as it's derived
+        emit_items = [(key, value) for key, value in urls.items() if 'WEBHOOK' not in key]
         
-        print(f"\n{Colors.WARNING}# Or use Render CLI:{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}# Install: npm install -g @render-dev/cli{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}# Login: render login{Colors.ENDC}\n")
+        buf.writelines(f"{key}={value}\n" for key, value in emit_items)
         
-        for key, value in urls.items():
-            if 'WEBHOOK' not in key:
-                print(f"render env set {key}='{value}' --service=<your-service-id>")
+        print(f"\n{Colors.WARNING}# Or use Render CLI:{Colors.ENDC}", file=buf)
+        print(f"{Colors.OKCYAN}# Install: npm install -g @render-dev/cli{Colors.ENDC}", file=buf)
+        print(f"{Colors.OKCYAN}# Login: render login{Colors.ENDC}\n", file=buf)
+        
+        buf.writelines(f"render env set {key}='{value}' --service=<your-service-id>\n" for key, value in emit_items)
+        
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
 
 
 def manual_input_mode() -> Dict[str, str]:
@@ -245,13 +284,17 @@ def manual_input_mode() -> Dict[str, str]:
     return urls
 
 
-async def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments (works without aiohttp, so --help always does)"""
     parser = argparse.ArgumentParser(description="Test Cloudflare tunnel connectivity")
     parser.add_argument('--manual', action='store_true', help='Manual URL entry mode')
     parser.add_argument('--update', action='store_true', help='Show Render env update commands')
     parser.add_argument('--file', default='tunnel.md', help='Path to tunnel.md file')
-    args = parser.parse_args()
-    
+    parser.add_argument('--install-deps', action='store_true', help='pip install aiohttp if it is missing')
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace):
     tester = TunnelTester()
     
     print(f"{Colors.BOLD}{Colors.HEADER}")
@@ -286,7 +329,10 @@ async def main():
     print(f"\n{Colors.OKCYAN}→ Testing {len(endpoints)} endpoint(s)...{Colors.ENDC}\n")
     
     # Run tests
-    results = await tester.test_all(endpoints)
+    try:
+        results = await tester.test_all(endpoints)
+    finally:
+        await tester.aclose()
     
     # Print results
     all_passed = tester.print_results(endpoints, results)
@@ -309,14 +355,26 @@ async def main():
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    
     if not AIOHTTP_AVAILABLE:
+        if not args.install_deps:
+            print(
+                f"{Colors.FAIL}aiohttp not found. Install with: pip install aiohttp "
+                f"(or rerun with --install-deps){Colors.ENDC}"
+            )
+            sys.exit(1)
         print(f"\n{Colors.WARNING}Installing aiohttp...{Colors.ENDC}")
-        os.system(f"{sys.executable} -m pip install aiohttp")
+        try:
+            subprocess.run([sys.executable, "-m", "pip", "install", "aiohttp"], check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"{Colors.FAIL}pip install failed with exit code {e.returncode}{Colors.ENDC}")
+            sys.exit(1)
         print(f"\n{Colors.OKGREEN}Please run the script again.{Colors.ENDC}\n")
         sys.exit(1)
     
     try:
-        exit_code = asyncio.run(main())
+        exit_code = asyncio.run(main(args))
         sys.exit(exit_code)
     except KeyboardInterrupt:
         print(f"\n\n{Colors.WARNING}Test interrupted by user{Colors.ENDC}")
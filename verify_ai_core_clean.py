@@ -3,8 +3,40 @@
 Verify that AI-Core has NO local ML dependencies (PyTorch, TensorFlow, etc.)
 """
 
+import re
 import subprocess
 import sys
+from functools import lru_cache
+
+try:
+    import docker  # Docker SDK: talks to the daemon directly instead of spawning the CLI
+except ImportError:
+    docker = None
+
+IMAGE_NAME = 'blackbox-ai-core'
+
+
+@lru_cache(maxsize=None)
+def _read_lower(path):
+    """Lower-cased file contents, read once per run."""
+    with open(path, 'r') as f:
+        return f.read().lower()
+
+
+def _find_terms(content, terms):
+    """Terms (a tuple) occurring anywhere in content (plain substring match), in the order given.
+
+    One regex pass; the lookahead lets matches overlap, so 'torch' is still found inside 'pytorch'.
+    """
+    pattern = _terms_pattern(terms)
+    found = {match.group(1) for match in pattern.finditer(content)}
+    return [term for term in terms if term in found]
+
+
+@lru_cache(maxsize=None)
+def _terms_pattern(terms):
+    return re.compile("(?=(" + "|".join(map(re.escape, terms)) + "))")
+
 
 def check_requirements():
     """Check requirements.txt for banned packages."""
@@ -12,7 +44,7 @@ def check_requirements():
     print("STEP 1: Checking requirements.txt")
     print("=" * 80)
     
-    banned_packages = [
+    banned_packages = (
         'torch',
         'pytorch',
         'tensorflow',
@@ -20,15 +52,9 @@ def check_requirements():
         'transformers',
         'lancedb',
         'scipy',  # Often pulled in by ML packages
-    ]
+    )
     
-    with open('services/ai-core/requirements.txt', 'r') as f:
-        content = f.read().lower()
-    
-    found_issues = []
-    for pkg in banned_packages:
-        if pkg in content:
-            found_issues.append(pkg)
+    found_issues = _find_terms(_read_lower('services/ai-core/requirements.txt'), banned_packages)
     
     if found_issues:
         print(f"❌ FAILED: Found banned packages: {', '.join(found_issues)}")
@@ -44,15 +70,9 @@ def check_dockerfile():
     print("=" * 80)
     
     try:
-        with open('services/ai-core/Dockerfile', 'r') as f:
-            content = f.read().lower()
-        
-        banned_terms = ['torch', 'nvidia', 'cuda', 'gpu', 'ml-models']
+        banned_terms = ('torch', 'nvidia', 'cuda', 'gpu', 'ml-models')
         
-        found_issues = []
-        for term in banned_terms:
-            if term in content:
-                found_issues.append(term)
+        found_issues = _find_terms(_read_lower('services/ai-core/Dockerfile'), banned_terms)
         
         if found_issues:
             print(f"⚠️  WARNING: Found terms: {', '.join(found_issues)}")
@@ -65,6 +85,35 @@ def check_dockerfile():
         print("⚠️  WARNING: Dockerfile not found")
         return True
 
+def _image_pip_list():
+    """Lower-cased `pip list` output from the image, or None if the image isn't built."""
+    if docker is not None:
+        client = docker.from_env()
+        if not client.images.list(name=IMAGE_NAME):
+            return None
+        output = client.containers.run(IMAGE_NAME, ['pip', 'list', '--format=freeze'], remove=True)
+        return output.decode('utf-8', errors='replace').lower()
+    
+    # Check if image exists
+    result = subprocess.run(
+        ['docker', 'images', '-q', IMAGE_NAME],
+        capture_output=True,
+        text=True
+    )
+    
+    if not result.stdout.strip():
+        return None
+    
+    # Check for torch in pip list
+    result = subprocess.run(
+        ['docker', 'run', '--rm', IMAGE_NAME, 'pip', 'list'],
+        capture_output=True,
+        text=True,
+        timeout=30
+    )
+    
+    return result.stdout.lower()
+
 def check_docker_image():
     """Check if Docker image contains PyTorch."""
     print("\n" + "=" * 80)
@@ -72,32 +121,13 @@ def check_docker_image():
     print("=" * 80)
     
     try:
-        # Check if image exists
-        result = subprocess.run(
-            ['docker', 'images', '-q', 'blackbox-ai-core'],
-            capture_output=True,
-            text=True
-        )
-        
-        if not result.stdout.strip():
+        output = _image_pip_list()
+        if output is None:
             print("⏭️  SKIPPED: Image not built yet. Build with:")
             print("   docker-compose build ai-core")
             return True
         
-        # Check for torch in pip list
-        result = subprocess.run(
-            ['docker', 'run', '--rm', 'blackbox-ai-core', 'pip', 'list'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        output = result.stdout.lower()
-        
-        banned_in_image = []
-        for pkg in ['torch', 'sentence-transformers', 'tensorflow', 'lancedb']:
-            if pkg in output:
-                banned_in_image.append(pkg)
+        banned_in_image = _find_terms(output, ('torch', 'sentence-transformers', 'tensorflow', 'lancedb'))
         
         if banned_in_image:
             print(f"❌ FAILED: Found packages in image: {', '.join(banned_in_image)}")